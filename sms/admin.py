@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.contrib import messages
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Department, Subject, Student, Course, Grade, Attendance
+from .models import User, Department, Subject, Student, Course, Grade, StudentAcademicSummary, ImportJob, Attendance
+from .regrade import regrade_courses
 
 # Custom User Admin
 class CustomUserAdmin(UserAdmin):
@@ -46,6 +48,12 @@ class CourseAdmin(admin.ModelAdmin):
     list_filter = ('year', 'semester', 'academic_year', 'subject__department')
     search_fields = ('subject__name', 'instructor', 'academic_year')
     ordering = ('year', 'semester', 'subject__name')
+    actions = ['regrade']
+
+    @admin.action(description='Recalculate grades from max marks and grading scale')
+    def regrade(self, request, queryset):
+        changed = regrade_courses(queryset)
+        self.message_user(request, f'Regraded {changed} grades in {queryset.count()} course(s).', messages.SUCCESS)
 
 # Grade Admin
 class GradeAdmin(admin.ModelAdmin):
@@ -54,6 +62,22 @@ class GradeAdmin(admin.ModelAdmin):
     search_fields = ('student__student_id', 'student__user__first_name', 'student__user__last_name', 'course__subject__name')
     ordering = ('-created_at',)
 
+# Student Academic Summary Admin
+class StudentAcademicSummaryAdmin(admin.ModelAdmin):
+    list_display = ('student', 'grade_count', 'avg_gpa', 'failing_count', 'trend', 'updated_at')
+    list_filter = ('trend',)
+    search_fields = ('student__student_id', 'student__user__first_name', 'student__user__last_name')
+    readonly_fields = ('student', 'latest_grade')
+    ordering = ('student__student_id',)
+
+# Import Job Admin
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('original_name', 'import_type', 'status', 'processed_rows', 'total_rows', 'success_count', 'error_count', 'created_by', 'created_at')
+    list_filter = ('import_type', 'status', 'created_at')
+    search_fields = ('original_name', 'created_by__username')
+    readonly_fields = ('started_at', 'finished_at')
+    ordering = ('-created_at',)
+
 # Attendance Admin
 class AttendanceAdmin(admin.ModelAdmin):
     list_display = ('student', 'course', 'date', 'is_present')
@@ -68,4 +92,6 @@ admin.site.register(Subject, SubjectAdmin)
 admin.site.register(Student, StudentAdmin)
 admin.site.register(Course, CourseAdmin)
 admin.site.register(Grade, GradeAdmin)
+admin.site.register(StudentAcademicSummary, StudentAcademicSummaryAdmin)
+admin.site.register(ImportJob, ImportJobAdmin)
 admin.site.register(Attendance, AttendanceAdmin)
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class SmsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sms"
+
+    def ready(self):
+        from django.conf import settings
+        from django.core.signals import request_started
+
+        from . import signals  # noqa: F401
+        from .import_jobs import recover_import_jobs_on_first_request
+
+        # Jobs left pending or running by the previous web process; not in ready()
+        # itself, which must not query the database
+        if getattr(settings, 'IMPORT_JOBS_IN_PROCESS', True):
+            request_started.connect(recover_import_jobs_on_first_request)
@@ -0,0 +1,265 @@
+"""
+Synthetic data and view benchmarks.
+
+``seed_benchmark_data`` bulk-creates departments, subjects, courses, students and
+grades (``manage.py seed_benchmark``; also used by the query-count tests).
+``benchmark_cases`` lists one request for every URL in sms/urls.py and
+``run_view_benchmarks`` replays them with the test client, recording query
+count, wall time and peak Python memory (``manage.py benchmark_views``).
+"""
+import math
+import statistics
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max
+from django.db.models.functions import Mod
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .caching import invalidate_admin_dashboard_stats
+from .grading import band_grades
+from .models import Course, Department, Grade, ImportJob, Student, Subject, User
+from .summaries import refresh_student_summaries
+
+BENCHMARK_DEPARTMENTS = [
+    ('CS', 'Computer Science'),
+    ('EE', 'Electrical Engineering'),
+    ('ME', 'Mechanical Engineering'),
+    ('CE', 'Civil Engineering'),
+]
+BENCHMARK_ADMIN_USERNAME = 'bench_admin'
+BENCHMARK_PASSWORD = 'student123'
+BENCHMARK_BATCH_SIZE = 2000
+
+FIRST_NAMES = ['Aarav', 'Maria', 'Chen', 'Fatima', 'Liam', 'Priya', 'Noah', 'Amara', 'Lucas', 'Sofia']
+LAST_NAMES = ['Patel', 'Garcia', 'Wang', 'Khan', 'Smith', 'Okafor', 'Muller', 'Rossi', 'Kim', 'Silva']
+
+
+def seed_benchmark_data(students=1000, grades=10000, subjects_per_department=6, seed=0, stdout=None):
+    """Bulk-create a synthetic data set next to whatever is already in the database.
+
+    Every student gets grades in distinct courses, so ``grades`` may not exceed
+    ``students`` times the number of courses. Returns the number of rows created
+    per model.
+    """
+    course_count = len(BENCHMARK_DEPARTMENTS) * subjects_per_department
+    grades_per_student = math.ceil(grades / students) if students else 0
+    if grades_per_student > course_count:
+        raise ValueError(f'{grades} grades need at least {math.ceil(grades / course_count)} students for {course_count} courses')
+
+    rng = np.random.default_rng(seed)
+    log = stdout.write if stdout else (lambda message: None)
+    start = Student.objects.count()
+
+    with transaction.atomic():
+        User.objects.get_or_create(
+            username=BENCHMARK_ADMIN_USERNAME,
+            defaults={'user_type': 'admin', 'is_staff': True, 'password': make_password(BENCHMARK_PASSWORD)},
+        )
+
+        departments = [
+            Department.objects.get_or_create(code=code, defaults={'name': name})[0]
+            for code, name in BENCHMARK_DEPARTMENTS
+        ]
+        courses = []
+        for department in departments:
+            for number in range(subjects_per_department):
+                subject, _ = Subject.objects.get_or_create(
+                    code=f'{department.code}{101 + number}',
+                    defaults={'name': f'{department.name} {101 + number}', 'department': department},
+                )
+                course, _ = Course.objects.get_or_create(
+                    subject=subject,
+                    year=str(1 + number % 4),
+                    semester=str(1 + number % 2),
+                    academic_year='2024-2025',
+                )
+                courses.append(course)
+        log(f'{len(departments)} departments, {len(courses)} courses')
+
+    # One PBKDF2 hash shared by every synthetic student
+    password = make_password(BENCHMARK_PASSWORD)
+    enrollment_start = date(2021, 8, 1)
+    created_students = []
+    for batch_start in range(0, students, BENCHMARK_BATCH_SIZE):
+        numbers = range(start + batch_start, start + min(students, batch_start + BENCHMARK_BATCH_SIZE))
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(
+                    username=f'bench{number}',
+                    email=f'bench{number}@example.com',
+                    password=password,
+                    first_name=FIRST_NAMES[number % len(FIRST_NAMES)],
+                    last_name=LAST_NAMES[number // len(FIRST_NAMES) % len(LAST_NAMES)],
+                    user_type='student',
+                )
+                for number in numbers
+            ])
+            created_students.extend(Student.objects.bulk_create([
+                Student(
+                    user=user,
+                    student_id=f'BM{number:07d}',
+                    department=departments[number % len(departments)],
+                    year=str(1 + number % 4),
+                    enrollment_date=enrollment_start + timedelta(days=365 * (number % 4)),
+                    is_active=number % 50 != 0,
+                )
+                for user, number in zip(users, numbers)
+            ]))
+    log(f'{len(created_students)} students')
+
+    # Distinct random courses per student, then marks around a realistic mean
+    course_choice = np.argsort(rng.random((len(created_students), len(courses))), axis=1)[:, :grades_per_student]
+    student_index = np.repeat(np.arange(len(created_students)), grades_per_student)[:grades]
+    course_index = course_choice.ravel()[:grades]
+    max_marks = np.array([course.max_marks for course in courses], dtype=float)[course_index]
+    marks = np.round(np.clip(rng.normal(0.68, 0.16, len(course_index)), 0, 1) * max_marks, 1)
+    letters, gpas = band_grades(marks, max_marks, [courses[index].get_grading_scale() for index in course_index])
+    exam_offsets = rng.integers(0, 365, len(course_index))
+
+    last_grade_id = Grade.objects.aggregate(last=Max('id'))['last'] or 0
+    for batch_start in range(0, len(course_index), BENCHMARK_BATCH_SIZE):
+        rows = range(batch_start, min(len(course_index), batch_start + BENCHMARK_BATCH_SIZE))
+        Grade.objects.bulk_create([
+            Grade(
+                student=created_students[student_index[row]],
+                course=courses[course_index[row]],
+                marks_obtained=float(marks[row]),
+                grade=letters[row],
+                gpa=float(gpas[row]),
+                exam_date=date(2024, 1, 1) + timedelta(days=int(exam_offsets[row])),
+            )
+            for row in rows
+        ])
+    log(f'{len(course_index)} grades')
+
+    # auto_now_add stamps every row with now; spread them over the last year for the trend views
+    # (and touch updated_at, which the analytics endpoints use as their version token)
+    now = datetime.now(dt_timezone.utc)
+    new_grades = Grade.objects.filter(id__gt=last_grade_id)
+    with transaction.atomic():
+        for month in range(12):
+            new_grades.alias(bucket=Mod('id', 12)).filter(bucket=month).update(
+                created_at=now - timedelta(days=30 * month), updated_at=now
+            )
+
+    refresh_student_summaries(student.pk for student in created_students)
+    invalidate_admin_dashboard_stats()
+    return {'courses': len(courses), 'students': len(created_students), 'grades': len(course_index)}
+
+
+class BenchmarkCase:
+    def __init__(self, name, url, role, expected_status=200):
+        self.name = name
+        self.url = url
+        self.role = role
+        self.expected_status = expected_status
+
+
+def benchmark_cases():
+    """One request per URL name in sms/urls.py, using objects from the current data"""
+    student = Student.objects.filter(academic_summary__grade_count__gt=0).order_by('pk').first()
+    grade = Grade.objects.order_by('pk').first()
+    course = Course.objects.filter(grades__isnull=False).order_by('pk').first()
+    job = ImportJob.objects.order_by('pk').first()
+
+    cases = [
+        BenchmarkCase('login', reverse('sms:login'), None),
+        BenchmarkCase('admin_dashboard', reverse('sms:admin_dashboard'), 'admin'),
+        BenchmarkCase('manage_students', reverse('sms:manage_students'), 'admin'),
+        BenchmarkCase('get_student_details', reverse('sms:get_student_details', args=[student.pk]), 'admin'),
+        BenchmarkCase('add_student', reverse('sms:add_student'), 'admin'),
+        BenchmarkCase('edit_student', reverse('sms:edit_student', args=[student.pk]), 'admin'),
+        BenchmarkCase('delete_student', reverse('sms:delete_student', args=[student.pk]), 'admin'),
+        BenchmarkCase('manage_grades', reverse('sms:manage_grades'), 'admin'),
+        BenchmarkCase('grades_data', reverse('sms:grades_data'), 'admin'),
+        BenchmarkCase('add_grade', reverse('sms:add_grade'), 'admin'),
+        BenchmarkCase('edit_grade', reverse('sms:edit_grade', args=[grade.pk]), 'admin'),
+        BenchmarkCase('delete_grade', reverse('sms:delete_grade', args=[grade.pk]), 'admin'),
+        BenchmarkCase('student_dashboard', reverse('sms:student_dashboard'), 'student'),
+        BenchmarkCase('student_performance', reverse('sms:student_performance'), 'student'),
+        BenchmarkCase('course_analysis', reverse('sms:course_analysis'), 'admin'),
+        BenchmarkCase('course_analysis_data', reverse('sms:course_analysis_data'), 'admin'),
+        BenchmarkCase('course_analysis_data_detail', f"{reverse('sms:course_analysis_data')}?course_id={course.pk}", 'admin'),
+        BenchmarkCase('performance_trends', reverse('sms:performance_trends'), 'admin'),
+        BenchmarkCase('performance_trends_data', reverse('sms:performance_trends_data'), 'admin'),
+        BenchmarkCase('import_csv_data', reverse('sms:import_csv_data'), 'admin'),
+        BenchmarkCase('at_risk_students', reverse('sms:at_risk_students'), 'admin'),
+        BenchmarkCase('admin_panel', reverse('sms:admin_panel'), 'admin', expected_status=302),
+        BenchmarkCase('request_timings', reverse('sms:request_timings'), 'admin'),
+        BenchmarkCase('assignment_tracking', reverse('sms:assignment_tracking'), 'admin'),
+        BenchmarkCase('data_export', reverse('sms:data_export'), 'admin'),
+        BenchmarkCase('export_students', f"{reverse('sms:data_export')}?type=students", 'admin'),
+        BenchmarkCase('export_grades', f"{reverse('sms:data_export')}?type=grades", 'admin'),
+        BenchmarkCase('export_performance', f"{reverse('sms:data_export')}?type=performance", 'admin'),
+        BenchmarkCase('logout', reverse('sms:logout'), 'admin', expected_status=302),
+    ]
+    if job is not None:
+        cases.insert(20, BenchmarkCase('import_job_status', reverse('sms:import_job_status', args=[job.pk]), 'admin'))
+    return cases
+
+
+def benchmark_users():
+    """Users the cases run as, by role"""
+    student = Student.objects.filter(academic_summary__grade_count__gt=0).select_related('user').order_by('pk').first()
+    return {
+        'admin': User.objects.filter(user_type='admin').order_by('pk').first(),
+        'student': student.user if student else None,
+        None: None,
+    }
+
+
+def log_in(client, user):
+    client.logout()
+    if user is not None:
+        client.force_login(user)
+
+
+def fetch(client, case):
+    """Issue the case's request, reading streamed bodies to the end"""
+    response = client.get(case.url)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def run_view_benchmarks(cases=None, repeat=3):
+    """Query count (cold cache), median wall time and peak traced memory of every case"""
+    cases = cases if cases is not None else benchmark_cases()
+    users = benchmark_users()
+    client = Client()
+    results = {}
+
+    for case in cases:
+        cache.clear()
+        log_in(client, users[case.role])
+        with CaptureQueriesContext(connection) as queries:
+            response = fetch(client, case)
+        query_count = len(queries)
+
+        timings = []
+        peak = 0
+        for _ in range(repeat):
+            log_in(client, users[case.role])
+            tracemalloc.start()
+            started = time.perf_counter()
+            fetch(client, case)
+            timings.append((time.perf_counter() - started) * 1000)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        results[case.name] = {
+            'url': case.url,
+            'status': response.status_code,
+            'queries': query_count,
+            'wall_ms': round(statistics.median(timings), 2),
+            'peak_kb': round(peak / 1024, 1),
+        }
+    return results
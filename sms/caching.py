@@ -0,0 +1,103 @@
+"""
+Cached statistics built on Django's cache framework.
+
+Cache keys carry a version, so a stale value computed concurrently with a write
+is never served: it lands under a key nobody reads any more.
+
+- The admin dashboard's version lives in the cache and is bumped on commit.
+  It starts at a random number, so one that is evicted never comes back to a
+  value older entries are still cached under.
+- Student dashboards are keyed on a version read from the database, so writes
+  made by any process (other workers, process_import_jobs) reach them.
+"""
+import hashlib
+import random
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Q
+
+from .models import Course, Grade, Student, StudentAcademicSummary, Subject
+
+ADMIN_DASHBOARD_VERSION_KEY = 'sms:admin_dashboard:version'
+
+# Bumping the version only reaches processes sharing the cache; with the
+# per-process default, writes made by other workers or by process_import_jobs
+# show up on this process's dashboard within this many seconds
+ADMIN_DASHBOARD_TIMEOUT = 60
+
+# Dashboards of students who stop refreshing expire rather than fill the cache
+STUDENT_DASHBOARD_TIMEOUT = 60 * 60
+
+
+def new_version():
+    return random.getrandbits(48)
+
+
+def bump_version(version_key):
+    """Invalidate everything cached under version_key"""
+    cache.add(version_key, new_version(), None)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(version_key, new_version(), None)
+
+
+def admin_dashboard_stats():
+    """Dashboard counters, from the cache or from one grade aggregate plus three counts"""
+    key = f"sms:admin_dashboard:{cache.get_or_set(ADMIN_DASHBOARD_VERSION_KEY, new_version, None)}"
+    stats = cache.get(key)
+    if stats is None:
+        stats = Grade.objects.aggregate(
+            total_grades=Count('id'),
+            a_grades=Count('id', filter=Q(grade='A')),
+            failing_grades=Count('id', filter=Q(grade='F')),
+            avg_gpa=Avg('gpa'),
+        )
+        stats['avg_gpa'] = stats['avg_gpa'] or 0
+        stats['total_students'] = Student.objects.filter(is_active=True).count()
+        stats['total_courses'] = Course.objects.count()
+        stats['total_subjects'] = Subject.objects.count()
+        cache.set(key, stats, ADMIN_DASHBOARD_TIMEOUT)
+    return stats
+
+
+def invalidate_admin_dashboard_stats():
+    bump_version(ADMIN_DASHBOARD_VERSION_KEY)
+
+
+def student_dashboard_version(student):
+    """One aggregate over everything the dashboard shows.
+
+    The grade count catches deletions; the latest updated_at of the grades,
+    their courses and subjects and of the summary catch edits.
+    """
+    version = Student.objects.filter(pk=student.pk).aggregate(
+        grade_count=Count('grades'),
+        grade_updated=Max('grades__updated_at'),
+        course_updated=Max('grades__course__updated_at'),
+        subject_updated=Max('grades__course__subject__updated_at'),
+        summary_updated=Max('academic_summary__updated_at'),
+    )
+    return hashlib.md5(repr(sorted(version.items())).encode(), usedforsecurity=False).hexdigest()
+
+
+def student_dashboard_data(student):
+    """Average GPA, failing count, grades and failing grades of one student.
+
+    Cached until the student's grades, their courses or subjects, or their
+    summary change.
+    """
+    key = f'sms:student_dashboard:{student.pk}:{student_dashboard_version(student)}'
+    data = cache.get(key)
+    if data is None:
+        grades = list(Grade.objects.filter(student=student).select_related('course__subject'))
+        summary = StudentAcademicSummary.objects.filter(student=student).first()
+        data = {
+            'avg_gpa': (summary.avg_gpa if summary else None) or 0,
+            'failing_count': summary.failing_count if summary else 0,
+            'grades': grades,
+            'failing_grades': [grade for grade in grades if grade.grade == 'F'],
+        }
+        cache.set(key, data, STUDENT_DASHBOARD_TIMEOUT)
+    return data
@@ -0,0 +1,497 @@
+"""
+Bulk CSV importers for students and grades, run per chunk by the background
+import jobs (sms/import_jobs.py).
+
+Kept out of views.py so that pandas is only loaded by the processes that run
+imports.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import django
+import numpy as np
+import pandas as pd
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .caching import invalidate_admin_dashboard_stats
+from .grading import band_grades
+from .import_validation import course_department_code
+from .models import Course, Department, Grade, Student, Subject, User
+from .predictions import predict_performances
+from .summaries import refresh_student_summaries
+
+logger = logging.getLogger(__name__)
+
+# Number of students written per bulk insert / transaction
+STUDENT_IMPORT_BATCH_SIZE = 500
+
+# Password assigned when the CSV has no (or a blank) password for a row
+DEFAULT_STUDENT_PASSWORD = 'student123'
+
+# Below this many per-row passwords, hashing in-process beats starting a pool
+PASSWORD_POOL_THRESHOLD = 32
+
+
+def hash_passwords(passwords):
+    """Hash per-row passwords, spreading the PBKDF2 work over a process pool for large imports"""
+    if len(passwords) < PASSWORD_POOL_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    # Spawned, not forked: the calling process runs import job threads and holds
+    # database connections that a forked child would inherit
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'), initializer=django.setup) as pool:
+        return list(pool.map(make_password, passwords, chunksize=16))
+
+
+def import_students_pandas(df):
+    """Import students using pandas DataFrame with prefetched lookups and chunked bulk inserts"""
+    # (row index, message) pairs, reported in file order
+    errors = []
+
+    # Clean the data
+    df = df.dropna(subset=['username', 'email', 'student_id'])  # Remove rows with missing critical data
+    df = df.assign(phone=df['phone'].fillna('') if 'phone' in df.columns else '')
+    if df.empty:
+        return 0, 0, []
+
+    usernames = df['username'].map(lambda value: User.normalize_username(str(value)))
+    emails = df['email'].map(lambda value: User.objects.normalize_email(str(value)))
+    student_ids = df['student_id'].astype(str)
+    enrollment_dates = pd.to_datetime(df['enrollment_date'], errors='coerce', format='mixed')
+
+    # Everything the per-row checks need, in four queries
+    existing_usernames = set(User.objects.filter(username__in=usernames.unique().tolist()).values_list('username', flat=True))
+    existing_emails = set(User.objects.filter(email__in=emails.unique().tolist()).values_list('email', flat=True))
+    existing_student_ids = set(Student.objects.filter(student_id__in=student_ids.unique().tolist()).order_by().values_list('student_id', flat=True))
+    departments = Department.objects.in_bulk(field_name='code')
+
+    if 'password' in df.columns:
+        passwords = df['password'].map(lambda value: str(value) if pd.notna(value) and str(value) else DEFAULT_STUDENT_PASSWORD)
+    else:
+        passwords = pd.Series(DEFAULT_STUDENT_PASSWORD, index=df.index)
+
+    accepted = []
+    for index, row in df.iterrows():
+        username, email, student_id = usernames[index], emails[index], student_ids[index]
+
+        # Validate required fields
+        if not row['username'] or not row['email'] or not row['student_id']:
+            errors.append((index, "Missing required fields"))
+            continue
+
+        # Check against existing users and the rows accepted so far
+        if username in existing_usernames:
+            errors.append((index, f"Username '{row['username']}' already exists"))
+            continue
+
+        if email in existing_emails:
+            errors.append((index, f"Email '{row['email']}' already exists"))
+            continue
+
+        if student_id in existing_student_ids:
+            errors.append((index, f"Student ID '{row['student_id']}' already exists"))
+            continue
+
+        department = departments.get(str(row['department_code']))
+        if department is None:
+            errors.append((index, f"Department '{row['department_code']}' not found"))
+            continue
+
+        if pd.isna(enrollment_dates[index]):
+            errors.append((index, "Invalid enrollment date format"))
+            continue
+
+        existing_usernames.add(username)
+        existing_emails.add(email)
+        existing_student_ids.add(student_id)
+        accepted.append(index)
+
+    # The shared default password is hashed once; per-row passwords each get their own hash
+    default_hash = make_password(DEFAULT_STUDENT_PASSWORD)
+    custom = [index for index in accepted if passwords[index] != DEFAULT_STUDENT_PASSWORD]
+    password_hashes = dict(zip(custom, hash_passwords([passwords[index] for index in custom])))
+
+    def create_students(indexes):
+        users = User.objects.bulk_create([
+            User(
+                username=usernames[index],
+                email=emails[index],
+                password=password_hashes.get(index, default_hash),
+                first_name=df.at[index, 'first_name'],
+                last_name=df.at[index, 'last_name'],
+                user_type='student',
+                phone=str(df.at[index, 'phone'])
+            )
+            for index in indexes
+        ])
+        Student.objects.bulk_create([
+            Student(
+                user=user,
+                student_id=student_ids[index],
+                department=departments[str(df.at[index, 'department_code'])],
+                year=str(df.at[index, 'year']),
+                enrollment_date=enrollment_dates[index].date()
+            )
+            for user, index in zip(users, indexes)
+        ])
+
+    success_count = 0
+    for start in range(0, len(accepted), STUDENT_IMPORT_BATCH_SIZE):
+        batch = accepted[start:start + STUDENT_IMPORT_BATCH_SIZE]
+        try:
+            with transaction.atomic():
+                create_students(batch)
+        except Exception:
+            # Retry the failed batch row by row, each in its own savepoint, so
+            # only the rows that actually fail are reported
+            for index in batch:
+                try:
+                    with transaction.atomic():
+                        create_students([index])
+                except Exception as e:
+                    errors.append((index, str(e)))
+                else:
+                    success_count += 1
+            continue
+        success_count += len(batch)
+
+    # bulk_create bypasses the Student signals
+    if success_count:
+        invalidate_admin_dashboard_stats()
+
+    errors.sort(key=lambda error: error[0])
+    error_details = [f"Row {index + 2}: {message}" for index, message in errors]
+    return success_count, len(error_details), error_details
+
+
+def import_students_csv(csv_data):
+    """Legacy function for backward compatibility"""
+    success_count = 0
+    error_count = 0
+
+    for row in csv_data:
+        try:
+            # Create user
+            user = User.objects.create_user(
+                username=row['username'],
+                email=row['email'],
+                password=row.get('password', 'student123'),
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                user_type='student',
+                phone=row.get('phone', '')
+            )
+
+            # Create student profile
+            department = Department.objects.get(code=row['department_code'])
+            Student.objects.create(
+                user=user,
+                student_id=row['student_id'],
+                department=department,
+                year=row['year'],
+                enrollment_date=datetime.strptime(row['enrollment_date'], '%Y-%m-%d').date()
+            )
+            success_count += 1
+
+        except Exception as e:
+            error_count += 1
+            continue
+
+    return success_count, error_count
+
+
+# Number of grade rows written per bulk upsert / transaction
+GRADE_IMPORT_BATCH_SIZE = 1000
+
+
+def parse_exam_dates(values):
+    """Parse a column of exam dates, falling back to today for missing/invalid values"""
+    today = date.today()
+    try:
+        parsed = pd.to_datetime(values, errors='coerce', format='mixed')
+        return [d.date() if pd.notna(d) else today for d in parsed]
+    except (ValueError, TypeError):
+        exam_dates = []
+        for value in values:
+            try:
+                exam_dates.append(pd.to_datetime(value).date() if pd.notna(value) else today)
+            except:
+                exam_dates.append(today)
+        return exam_dates
+
+
+def resolve_import_courses(course_codes):
+    """Map subject codes to courses, creating missing subjects/courses like the row importer did.
+
+    Returns a dict of code -> Course, or None when no department exists for the code.
+    """
+    course_by_code = {}
+    courses = Course.objects.filter(subject__code__in=course_codes).select_related('subject').order_by('year', 'semester', 'id')
+    for course in courses:
+        course_by_code.setdefault(course.subject.code, course)
+
+    missing_codes = [code for code in course_codes if code not in course_by_code]
+    if not missing_codes:
+        return course_by_code
+
+    subjects = Subject.objects.in_bulk(missing_codes, field_name='code')
+    departments = Department.objects.in_bulk(field_name='code')
+
+    # All missing subjects/courses in one transaction instead of one per insert
+    with transaction.atomic():
+        for course_code in missing_codes:
+            subject = subjects.get(course_code)
+            if subject is None:
+                department = departments.get(course_department_code(course_code))
+                if department is None:
+                    course_by_code[course_code] = None
+                    continue
+
+                subject = Subject.objects.create(
+                    name=f"{course_code} Subject",
+                    code=course_code,
+                    credits=3,
+                    department=department
+                )
+
+            course_by_code[course_code] = Course.objects.create(
+                subject=subject,
+                year='1',
+                semester='1',
+                academic_year='2024-2025'
+            )
+
+    return course_by_code
+
+
+def import_grades_pandas(df):
+    """Import grades using pandas DataFrame with set-based lookups and chunked bulk upserts.
+
+    Returns (success_count, error_count, predictions, error_details, warnings).
+    """
+    predictions = []
+    warnings = []
+
+    # Clean the data
+    df = df.dropna(subset=['student_id', 'course_code', 'marks_obtained'])
+    if df.empty:
+        return 0, 0, predictions, [], warnings
+
+    row_labels = 'Row ' + pd.Series(df.index + 2, index=df.index).astype(str) + ': '
+    errors = pd.Series(None, index=df.index, dtype=object)
+
+    def add_errors(mask, messages):
+        # Keep only the first error per row, mirroring the row-by-row checks
+        mask = mask & errors.isna()
+        errors[mask] = (row_labels + messages)[mask]
+
+    # Resolve all students in one IN query
+    student_keys = df['student_id'].astype(str)
+    students = Student.objects.select_related('user').in_bulk(student_keys.unique().tolist(), field_name='student_id')
+    student_found = student_keys.isin(students.keys())
+    add_errors(~student_found, "Student '" + student_keys + "' not found")
+
+    # Resolve (or create) the courses referenced by rows with a known student
+    course_codes = df['course_code'].astype(str)
+    course_by_code = resolve_import_courses(course_codes[student_found].unique().tolist())
+    course_found = course_codes.map(lambda code: course_by_code.get(code) is not None)
+    add_errors(~course_found, "Department for course '" + course_codes + "' not found")
+
+    # Validate marks against each row's course
+    marks = pd.to_numeric(df['marks_obtained'], errors='coerce')
+    max_marks = course_codes.map(lambda code: course_by_code[code].max_marks if course_by_code.get(code) else np.nan)
+    add_errors(marks.isna(), pd.Series('Invalid marks format', index=df.index))
+    out_of_range = (marks < 0) | (marks > max_marks)
+    add_errors(out_of_range, 'Invalid marks ' + marks.map(lambda m: str(float(m))) + ' (should be 0-' + max_marks.map(lambda m: str(int(m)) if pd.notna(m) else '') + ')')
+
+    valid = errors.isna()
+    if valid.any():
+        valid_index = df.index[valid]
+        valid_marks = marks[valid].to_numpy(dtype=float)
+        valid_courses = [course_by_code[code] for code in course_codes[valid]]
+        letters, gpas = band_grades(valid_marks, max_marks[valid].to_numpy(dtype=float), [course.get_grading_scale() for course in valid_courses])
+
+        if 'exam_date' in df.columns:
+            exam_dates = parse_exam_dates(df.loc[valid, 'exam_date'])
+        else:
+            exam_dates = [date.today()] * len(valid_index)
+
+        # Later rows for the same student/course overwrite earlier ones
+        grades_by_key = {}
+        rows_by_key = {}
+        grade_for_row = {}
+        for index, student_key, course_code, mark, letter, gpa, exam_date in zip(
+            valid_index, student_keys[valid], course_codes[valid], valid_marks, letters, gpas, exam_dates
+        ):
+            student = students[student_key]
+            course = course_by_code[course_code]
+            key = (student.pk, course.pk)
+            grade = Grade(
+                student=student,
+                course=course,
+                marks_obtained=float(mark),
+                grade=str(letter),
+                gpa=float(gpa),
+                exam_date=exam_date
+            )
+            grades_by_key[key] = grade
+            rows_by_key.setdefault(key, []).append(index)
+
+        def upsert_grades(grades):
+            Grade.objects.bulk_create(
+                grades,
+                update_conflicts=True,
+                unique_fields=['student', 'course'],
+                update_fields=['marks_obtained', 'grade', 'gpa', 'exam_date', 'updated_at']
+            )
+
+        keys = list(grades_by_key)
+        for start in range(0, len(keys), GRADE_IMPORT_BATCH_SIZE):
+            batch_keys = keys[start:start + GRADE_IMPORT_BATCH_SIZE]
+            try:
+                with transaction.atomic():
+                    upsert_grades([grades_by_key[key] for key in batch_keys])
+            except Exception:
+                # Retry the failed batch row by row, each in its own savepoint, so
+                # only the rows that actually fail are reported
+                for key in batch_keys:
+                    grade = grades_by_key[key]
+                    grade.pk = None  # may be set by a sub-batch that was rolled back
+                    try:
+                        with transaction.atomic():
+                            upsert_grades([grade])
+                    except Exception as e:
+                        for index in rows_by_key[key]:
+                            errors[index] = f"Row {index + 2}: {str(e)}"
+                    else:
+                        for index in rows_by_key[key]:
+                            grade_for_row[index] = grade
+                continue
+
+            for key in batch_keys:
+                for index in rows_by_key[key]:
+                    grade_for_row[index] = grades_by_key[key]
+
+        # bulk_create bypasses the Grade signals, so refresh the summaries and caches here
+        imported = [grade_for_row[index] for index in valid_index if index in grade_for_row]
+        refresh_student_summaries({grade.student_id for grade in imported})
+        invalidate_admin_dashboard_stats()
+
+        # AI-powered performance prediction, run once for the whole import
+        try:
+            for grade, prediction in zip(imported, predict_performances([(grade.student, grade) for grade in imported])):
+                predictions.append({
+                    'student': grade.student,
+                    'current_grade': grade,
+                    'prediction': prediction
+                })
+        except Exception:
+            # The grades are imported either way; say why there are no predictions
+            logger.exception('Performance predictions failed for %d imported grades', len(imported))
+            predictions = []
+            warnings.append('Performance predictions could not be computed for the imported grades.')
+
+    error_details = errors.dropna().tolist()
+    error_count = len(error_details)
+    success_count = len(df) - error_count
+
+    return success_count, error_count, predictions, error_details, warnings
+
+
+def import_grades_csv(csv_data):
+    success_count = 0
+    error_count = 0
+    predictions = []
+    imported = []
+
+    for row in csv_data:
+        try:
+            # Get or create student
+            try:
+                student = Student.objects.get(student_id=row['student_id'])
+            except Student.DoesNotExist:
+                error_count += 1
+                continue
+
+            # Get or create course
+            course_code = row['course_code']
+            try:
+                # Use filter().first() to handle multiple courses with same subject code
+                course = Course.objects.filter(subject__code=course_code).first()
+                if not course:
+                    raise Course.DoesNotExist()
+            except Course.DoesNotExist:
+                # Try to create the course if subject exists
+                try:
+                    subject = Subject.objects.get(code=course_code)
+                    course = Course.objects.create(
+                        subject=subject,
+                        year='1',  # Default year
+                        semester='1',  # Default semester
+                        academic_year='2024-2025'
+                    )
+                except Subject.DoesNotExist:
+                    # Create both subject and course
+                    # Determine department based on course code
+                    if course_code.startswith('CS'):
+                        dept_code = 'CS'
+                    elif course_code.startswith('EE'):
+                        dept_code = 'EE'
+                    else:
+                        dept_code = 'CS'  # Default to CS
+
+                    try:
+                        department = Department.objects.get(code=dept_code)
+                        subject = Subject.objects.create(
+                            name=f"{course_code} Subject",
+                            code=course_code,
+                            credits=3,
+                            department=department
+                        )
+                        course = Course.objects.create(
+                            subject=subject,
+                            year='1',
+                            semester='1',
+                            academic_year='2024-2025'
+                        )
+                    except Department.DoesNotExist:
+                        error_count += 1
+                        continue
+
+            marks = float(row['marks_obtained'])
+
+            # Check if grade already exists
+            existing_grade = Grade.objects.filter(student=student, course=course).first()
+            if existing_grade:
+                # Update existing grade
+                existing_grade.marks_obtained = marks
+                existing_grade.exam_date = datetime.strptime(row.get('exam_date', str(date.today())), '%Y-%m-%d').date()
+                existing_grade.save()
+                grade = existing_grade
+            else:
+                # Create new grade
+                grade = Grade.objects.create(
+                    student=student,
+                    course=course,
+                    marks_obtained=marks,
+                    exam_date=datetime.strptime(row.get('exam_date', str(date.today())), '%Y-%m-%d').date()
+                )
+
+            imported.append((student, grade))
+            success_count += 1
+
+        except Exception as e:
+            error_count += 1
+            continue
+
+    # AI-powered performance prediction, run once for the whole import
+    for (student, grade), prediction in zip(imported, predict_performances(imported)):
+        predictions.append({
+            'student': student,
+            'current_grade': grade,
+            'prediction': prediction
+        })
+
+    return success_count, error_count, predictions
@@ -0,0 +1,172 @@
+"""
+Per-student performance features held in NumPy arrays.
+
+``feature_store()`` pulls (student_id, gpa, grade) for every grade with one
+values_list query, ordered by student and created_at (grade_student_created_idx
+serves the order), and computes every student's statistics at once with
+np.unique / ufunc.reduceat group-bys over the sorted rows.
+
+The store is kept per process and reused until the grade watermark (count and
+latest updated_at) moves. It is then refreshed incrementally: only the students
+with grades updated since the watermark are recomputed. Deletions (the counts no
+longer add up), large changes and a watermark moving backwards rebuild it.
+
+updated_at is set when a grade is saved, not when its transaction commits, so a
+grade can become visible with an updated_at older than the watermark. Refreshes
+therefore re-read REFRESH_OVERLAP before the watermark, and a store is checked
+on every use until it has been checked REFRESH_OVERLAP after its watermark.
+"""
+import threading
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import Grade
+
+FEATURE_NAMES = ['avg_gpa', 'latest_gpa', 'trend', 'consistency', 'failing_count']
+
+# Refreshes touching more students than this rebuild the whole store
+INCREMENTAL_STUDENT_LIMIT = 500
+
+# Longest expected gap between saving a grade and committing it; writers wait
+# at most busy_timeout (20 s) for the database lock
+REFRESH_OVERLAP = timedelta(minutes=1)
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def grade_watermark():
+    """Grade count and latest updated_at; moves whenever a grade is added, changed or removed"""
+    return Grade.objects.aggregate(grade_count=Count('id'), updated_at=Max('updated_at'))
+
+
+class FeatureStore:
+    """Grade statistics per student, in parallel arrays sorted by student id"""
+
+    def __init__(self, student_ids, grade_count, failing_count, avg_gpa, first_gpa, latest_gpa, min_gpa, max_gpa, watermark=None):
+        self.student_ids = student_ids
+        self.grade_count = grade_count
+        self.failing_count = failing_count
+        self.avg_gpa = avg_gpa
+        self.first_gpa = first_gpa
+        self.latest_gpa = latest_gpa
+        self.min_gpa = min_gpa
+        self.max_gpa = max_gpa
+        self.watermark = watermark
+        # When the grades were last compared with this store (set by feature_store)
+        self.checked_at = None
+
+    def arrays(self):
+        return [self.student_ids, self.grade_count, self.failing_count, self.avg_gpa,
+                self.first_gpa, self.latest_gpa, self.min_gpa, self.max_gpa]
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def settled(self):
+        """Whether every grade up to the watermark had committed when the store was last checked"""
+        if self.watermark['updated_at'] is None:
+            return True
+        return self.checked_at is not None and self.checked_at - self.watermark['updated_at'] > REFRESH_OVERLAP
+
+    @classmethod
+    def from_grades(cls, student_ids, gpas, failing, watermark=None):
+        """Group-by over grade rows already sorted by student, then created_at"""
+        if not len(student_ids):
+            counts, gpas = np.empty(0, np.int32), np.empty(0)
+            return cls(np.empty(0, np.int64), counts, counts, gpas, gpas, gpas, gpas, gpas, watermark=watermark)
+
+        ids, starts, counts = np.unique(student_ids, return_index=True, return_counts=True)
+        return cls(
+            ids,
+            counts.astype(np.int32),
+            np.add.reduceat(failing.astype(np.int32), starts),
+            np.add.reduceat(gpas, starts) / counts,
+            gpas[starts],
+            gpas[starts + counts - 1],
+            np.minimum.reduceat(gpas, starts),
+            np.maximum.reduceat(gpas, starts),
+            watermark=watermark,
+        )
+
+    @classmethod
+    def load(cls, student_ids=None, watermark=None):
+        """Store of the given students (all when None), from one values_list query"""
+        grades = Grade.objects.all()
+        if student_ids is not None:
+            grades = grades.filter(student_id__in=list(student_ids))
+        rows = grades.order_by('student_id', 'created_at', 'id').values_list('student_id', 'gpa', 'grade')
+        ids, gpas, letters = zip(*rows) if rows else ((), (), ())
+        return cls.from_grades(
+            np.array(ids, dtype=np.int64),
+            np.array(gpas, dtype=float),
+            np.array([letter == 'F' for letter in letters], dtype=bool),
+            watermark=watermark,
+        )
+
+    def replace(self, student_ids, fresh, watermark):
+        """A copy with the rows of student_ids replaced by those of fresh"""
+        keep = ~np.isin(self.student_ids, np.fromiter(student_ids, np.int64))
+        merged = [np.concatenate([old[keep], new]) for old, new in zip(self.arrays(), fresh.arrays())]
+        order = np.argsort(merged[0], kind='stable')
+        return FeatureStore(*[array[order] for array in merged], watermark=watermark)
+
+    def lookup(self, student_ids):
+        """Statistics of the given students, in that order; students without grades get a count of 0 and NaN GPAs"""
+        wanted = np.asarray(student_ids, dtype=np.int64)
+        positions = np.searchsorted(self.student_ids, wanted)
+        found = positions < len(self)
+        found[found] = self.student_ids[positions[found]] == wanted[found]
+
+        columns = []
+        for array in self.arrays()[1:]:
+            column = np.full(len(wanted), 0 if array.dtype.kind == 'i' else np.nan, dtype=array.dtype)
+            column[found] = array[positions[found]]
+            columns.append(column)
+        return FeatureStore(wanted, *columns, watermark=self.watermark)
+
+    def features(self, latest_gpa=None):
+        """Feature matrix (FEATURE_NAMES), optionally with latest_gpa standing in for each student's latest grade"""
+        latest = self.latest_gpa if latest_gpa is None else latest_gpa
+        has_history = self.grade_count > 1
+        trend = np.where(has_history, (latest - self.first_gpa) / np.maximum(self.grade_count, 1), 0.0)
+        consistency = np.where(has_history, 1.0 - (self.max_gpa - self.min_gpa) / 4.0, 1.0)
+        return np.column_stack([self.avg_gpa, latest, trend, consistency, self.failing_count])
+
+
+def refreshed(store, watermark):
+    """store brought up to watermark by recomputing the changed students, or None when a rebuild is needed"""
+    if store is None or store.watermark['updated_at'] is None or watermark['updated_at'] is None:
+        return None
+    if watermark['updated_at'] < store.watermark['updated_at']:
+        return None
+
+    changed = set(
+        Grade.objects.filter(updated_at__gt=store.watermark['updated_at'] - REFRESH_OVERLAP)
+        .order_by().values_list('student_id', flat=True).distinct()
+    )
+    if len(changed) > INCREMENTAL_STUDENT_LIMIT:
+        return None
+
+    store = store.replace(changed, FeatureStore.load(changed), watermark)
+    # Grades removed from students that were not otherwise changed
+    if store.grade_count.sum() != watermark['grade_count']:
+        return None
+    return store
+
+
+def feature_store():
+    """The process-wide store, up to date with the grades"""
+    global _store
+
+    checked_at = timezone.now()
+    watermark = grade_watermark()
+    with _store_lock:
+        if _store is None or _store.watermark != watermark or not _store.settled():
+            store = refreshed(_store, watermark)
+            _store = store if store is not None else FeatureStore.load(watermark=watermark)
+            _store.checked_at = checked_at
+        return _store
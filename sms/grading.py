@@ -0,0 +1,102 @@
+"""
+Table-driven grading scales.
+
+A scale is a list of bands, lowest first, each with the minimum percentage it
+starts at, its letter grade and its grade points. Courses may override the
+default scale through ``Course.grading_scale``. ``GradingScale.band`` grades one
+percentage for ``Grade.save``; ``band_grades`` grades whole arrays of marks
+with ``np.searchsorted`` for the bulk import and regrade paths.
+"""
+import json
+from bisect import bisect_right
+from functools import cached_property, lru_cache
+
+DEFAULT_GRADING_BANDS = [
+    {'min': 0, 'grade': 'F', 'gpa': 0.0},
+    {'min': 40, 'grade': 'C', 'gpa': 2.0},
+    {'min': 50, 'grade': 'C+', 'gpa': 2.3},
+    {'min': 60, 'grade': 'B', 'gpa': 3.0},
+    {'min': 70, 'grade': 'B+', 'gpa': 3.3},
+    {'min': 80, 'grade': 'A', 'gpa': 3.7},
+    {'min': 90, 'grade': 'A+', 'gpa': 4.0},
+]
+
+
+class GradingScale:
+    def __init__(self, bands):
+        self.bands = [dict(band) for band in bands]
+        # Lower bounds of every band but the first, which catches everything below them
+        self.thresholds = [float(band['min']) for band in bands[1:]]
+        self.letters = [band['grade'] for band in bands]
+        self.points = [float(band['gpa']) for band in bands]
+
+    def band(self, percentage):
+        """(letter, gpa) for a single percentage"""
+        index = bisect_right(self.thresholds, percentage)
+        return self.letters[index], self.points[index]
+
+    @cached_property
+    def _arrays(self):
+        # numpy is only needed by the bulk paths, so Grade.save never loads it
+        import numpy as np
+
+        return np.array(self.thresholds), np.array(self.letters, dtype=object), np.array(self.points)
+
+    def band_array(self, percentages):
+        """(letters, gpas) arrays for an array of percentages"""
+        import numpy as np
+
+        thresholds, letters, points = self._arrays
+        indexes = np.searchsorted(thresholds, np.asarray(percentages, dtype=float), side='right')
+        return letters[indexes], points[indexes]
+
+
+DEFAULT_GRADING_SCALE = GradingScale(DEFAULT_GRADING_BANDS)
+
+
+def validate_grading_bands(bands, letters):
+    """Raise ValueError unless bands is a usable scale using only the given letters"""
+    if not isinstance(bands, list) or not bands:
+        raise ValueError('The grading scale must be a non-empty list of bands.')
+    for band in bands:
+        if not isinstance(band, dict) or set(band) != {'min', 'grade', 'gpa'}:
+            raise ValueError('Each band needs exactly "min", "grade" and "gpa".')
+        if band['grade'] not in letters:
+            raise ValueError(f"Unknown grade '{band['grade']}'.")
+        if not isinstance(band['gpa'], (int, float)) or not 0 <= band['gpa'] <= 4:
+            raise ValueError(f"GPA of grade '{band['grade']}' must be between 0 and 4.")
+        if not isinstance(band['min'], (int, float)):
+            raise ValueError(f"Minimum percentage of grade '{band['grade']}' must be a number.")
+    if bands[0]['min'] != 0:
+        raise ValueError('The lowest band must start at 0%.')
+    if any(lower['min'] >= upper['min'] for lower, upper in zip(bands, bands[1:])):
+        raise ValueError('Bands must be listed from the lowest minimum percentage up.')
+
+
+@lru_cache(maxsize=128)
+def _scale_from_json(bands_json):
+    return GradingScale(json.loads(bands_json))
+
+
+def get_grading_scale(bands=None):
+    """Shared GradingScale for a course's configured bands, the default scale when None"""
+    if not bands:
+        return DEFAULT_GRADING_SCALE
+    return _scale_from_json(json.dumps(bands, sort_keys=True))
+
+
+def band_grades(marks, max_marks, scales):
+    """Vectorized letters and GPAs for arrays of marks, each with its course's max marks and scale"""
+    import numpy as np
+
+    percentages = np.asarray(marks, dtype=float) / np.asarray(max_marks, dtype=float) * 100
+    letters = np.empty(len(percentages), dtype=object)
+    points = np.empty(len(percentages))
+
+    # Almost every course uses the default scale, so this is usually a single searchsorted
+    scale_by_id = {}
+    scale_codes = np.array([scale_by_id.setdefault(id(scale), (len(scale_by_id), scale))[0] for scale in scales], dtype=int)
+    for code, scale in scale_by_id.values():
+        mask = scale_codes == code
+        letters[mask], points[mask] = scale.band_array(percentages[mask])
+    return letters, points
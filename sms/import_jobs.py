@@ -0,0 +1,215 @@
+"""
+Background processing of uploaded CSV imports.
+
+The upload view only stores the file as an ImportJob and returns. Jobs are run
+either on a small thread pool inside the web process (IMPORT_JOBS_IN_PROCESS) or
+by ``manage.py process_import_jobs``, which runs one worker process per core.
+Workers claim a job with a conditional UPDATE, so any number of them can share
+the queue, and record row counters after every chunk for the progress endpoint.
+Dry-run jobs only validate the file (see sms/import_validation.py).
+
+Jobs outlive the process running them. ``recover_import_jobs`` fails the ones
+whose worker stopped mid-run and queues the pending ones again; it runs on
+the first request of each web process and when process_import_jobs starts.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+# Rows read, validated and written per step; bounds the memory used by a job
+# and progress is saved after each one
+IMPORT_JOB_CHUNK_ROWS = 5000
+
+# Predictions kept on the job for display; the import itself is not limited
+IMPORT_JOB_MAX_PREDICTIONS = 1000
+
+# Error messages kept on the job for display; error_count still counts every
+# failed row. Bounds the JSON rewritten by each progress save
+IMPORT_JOB_MAX_ERRORS = 1000
+
+# A running job saves its progress after every chunk; one that has not for this
+# long lost its worker (restart, crash) and is marked failed
+IMPORT_JOB_STALE_AFTER = timedelta(minutes=30)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def serialize_prediction(prediction):
+    """JSON-friendly version of an import_grades_pandas prediction entry"""
+    student = prediction['student']
+    grade = prediction['current_grade']
+    return {
+        'student_name': student.user.get_full_name(),
+        'student_id': student.student_id,
+        'grade': grade.grade,
+        'gpa': grade.gpa,
+        'prediction': prediction['prediction'],
+    }
+
+
+def count_rows(file):
+    """Data rows in an uploaded CSV, counted from raw bytes without parsing.
+
+    Quoted values spanning lines make this an overestimate, which only affects
+    the progress bar.
+    """
+    lines = 0
+    last = b'\n'
+    with file.open('rb') as csv_file:
+        for block in iter(lambda: csv_file.read(1 << 20), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1  # No trailing newline after the last row
+    return max(0, lines - 1)
+
+
+def read_csv_chunks(file):
+    """Stream an uploaded CSV as DataFrames of IMPORT_JOB_CHUNK_ROWS rows.
+
+    Every column is read as text so pandas does no type inference; the importers
+    convert marks and dates themselves. The row index keeps counting across
+    chunks, so error messages report file row numbers.
+    """
+    import pandas as pd
+
+    with file.open('rb') as csv_file:
+        yield from pd.read_csv(csv_file, dtype=str, chunksize=IMPORT_JOB_CHUNK_ROWS)
+
+
+def delete_upload(job):
+    """Remove a job's CSV from media/imports/; it is read by one run and not needed afterwards"""
+    if not job.file:
+        return
+    try:
+        job.file.delete(save=False)
+    except OSError:
+        logger.warning('Could not delete the upload of import job %s', job.pk, exc_info=True)
+
+
+def run_import_job(job_id):
+    """Claim and process one pending job. Returns False if another worker got it first."""
+    # pandas and the importers are loaded by the first job, not by every process importing this module
+    import pandas as pd
+
+    from .csv_imports import import_grades_pandas, import_students_pandas
+    from .import_validation import ImportValidator
+
+    now = timezone.now()
+    claimed = ImportJob.objects.filter(pk=job_id, status='pending').update(status='running', started_at=now, updated_at=now)
+    if not claimed:
+        return False
+
+    job = ImportJob.objects.get(pk=job_id)
+    try:
+        job.total_rows = count_rows(job.file)
+        job.save(update_fields=['total_rows', 'updated_at'])
+        validator = ImportValidator(job.import_type) if job.dry_run else None
+
+        for chunk in read_csv_chunks(job.file):
+            if validator is not None:
+                success_count, error_details, warnings = validator.validate(chunk)
+                error_count = len(error_details)
+                job.warnings.extend(warnings)
+            elif job.import_type == 'students':
+                success_count, error_count, error_details = import_students_pandas(chunk)
+            else:
+                success_count, error_count, predictions, error_details, warnings = import_grades_pandas(chunk)
+                job.warnings.extend(warning for warning in warnings if warning not in job.warnings)
+                room = IMPORT_JOB_MAX_PREDICTIONS - len(job.predictions)
+                job.predictions.extend(serialize_prediction(prediction) for prediction in predictions[:max(room, 0)])
+
+            job.success_count += success_count
+            job.error_count += error_count
+            room = IMPORT_JOB_MAX_ERRORS - len(job.errors)
+            job.errors.extend(error_details[:max(room, 0)])
+            job.processed_rows += len(chunk)
+            job.save(update_fields=['processed_rows', 'success_count', 'error_count', 'errors', 'warnings', 'predictions', 'updated_at'])
+
+        job.status = 'completed'
+    except pd.errors.EmptyDataError:
+        job.status = 'failed'
+        job.errors.append('The CSV file is empty.')
+    except pd.errors.ParserError as e:
+        job.status = 'failed'
+        job.errors.append(f'Error parsing CSV file: {str(e)}')
+    except Exception as e:
+        logger.exception('Import job %s failed', job_id)
+        job.status = 'failed'
+        job.errors.append(f'Error processing CSV file: {str(e)}')
+    finally:
+        delete_upload(job)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'file', 'errors', 'finished_at', 'updated_at'])
+    return True
+
+
+def fail_stale_import_jobs():
+    """Mark running jobs whose worker stopped as failed. Returns their number."""
+    now = timezone.now()
+    failed = 0
+    for job in ImportJob.objects.filter(status='running', updated_at__lt=now - IMPORT_JOB_STALE_AFTER):
+        # Conditional on the heartbeat, in case the worker saved progress meanwhile
+        updated = ImportJob.objects.filter(pk=job.pk, status='running', updated_at=job.updated_at).update(
+            status='failed',
+            file='',
+            errors=job.errors + ['The import was interrupted before it finished. Please upload the file again.'],
+            finished_at=now,
+            updated_at=now,
+        )
+        if updated:
+            delete_upload(job)
+        failed += updated
+    if failed:
+        logger.warning('Marked %d interrupted import job(s) as failed', failed)
+    return failed
+
+
+def recover_import_jobs():
+    """Fail interrupted jobs and queue the pending ones on this process's pool"""
+    fail_stale_import_jobs()
+    pending = ImportJob.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True)
+    for job_id in pending:
+        get_executor().submit(_run_in_thread, job_id)
+
+
+def recover_import_jobs_on_first_request(**kwargs):
+    """request_started receiver connected by SmsConfig.ready; runs once per process"""
+    request_started.disconnect(recover_import_jobs_on_first_request)
+    recover_import_jobs()
+
+
+def _run_in_thread(job_id):
+    try:
+        run_import_job(job_id)
+    finally:
+        connection.close()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMPORT_JOB_THREADS', 2),
+                thread_name_prefix='import-job',
+            )
+        return _executor
+
+
+def submit_import_job(job):
+    """Queue a saved job; it starts once the current transaction commits"""
+    if getattr(settings, 'IMPORT_JOBS_IN_PROCESS', True):
+        transaction.on_commit(lambda: get_executor().submit(_run_in_thread, job.pk))
@@ -0,0 +1,132 @@
+"""
+Validate-only (dry run) checks for CSV imports.
+
+An ImportValidator loads every lookup it needs once, then checks each chunk of
+the upload with vectorized pandas operations instead of per-row queries. It
+reports every problem of every row and writes nothing.
+"""
+import numpy as np
+import pandas as pd
+
+from .models import Course, Department, Student, Subject, User
+
+# Department of subjects created on the fly by the grade importer, by code prefix
+IMPORT_COURSE_DEPARTMENTS = ('CS', 'EE', 'ME')
+DEFAULT_COURSE_DEPARTMENT = 'CS'
+
+
+def course_department_code(course_code):
+    """Department code a new subject with this code is created in"""
+    prefix = course_code[:2]
+    return prefix if prefix in IMPORT_COURSE_DEPARTMENTS else DEFAULT_COURSE_DEPARTMENT
+
+
+def collect_errors(index, checks):
+    """Combine (mask, messages) checks into 'Row N: a; b' strings, one per failing row"""
+    joined = pd.Series('', index=index, dtype=object)
+    for mask, messages in checks:
+        mask = mask.fillna(False).astype(bool)
+        if not mask.any():
+            continue
+        messages = pd.Series(messages, index=index)[mask]
+        separators = np.where(joined[mask] == '', '', '; ')
+        joined[mask] = joined[mask] + separators + messages
+    failed = joined[joined != '']
+    return 'Row ' + (failed.index.to_series() + 2).astype(str) + ': ' + failed
+
+
+class ImportValidator:
+    """Dry-run checks for one import, with lookups shared by all of its chunks"""
+
+    def __init__(self, import_type):
+        self.import_type = import_type
+        self.departments = set(Department.objects.order_by().values_list('code', flat=True))
+        self.seen = {}
+
+        if import_type == 'students':
+            self.usernames = set(User.objects.values_list('username', flat=True))
+            self.emails = set(User.objects.values_list('email', flat=True))
+            self.student_ids = set(Student.objects.order_by().values_list('student_id', flat=True))
+        else:
+            self.student_ids = set(Student.objects.order_by().values_list('student_id', flat=True))
+            # The importer grades against the first course of a subject by year/semester
+            courses = pd.DataFrame.from_records(
+                Course.objects.order_by('year', 'semester', 'id').values_list('subject__code', 'max_marks'),
+                columns=['code', 'max_marks'],
+            )
+            self.course_max_marks = courses.drop_duplicates('code').set_index('code')['max_marks']
+            self.subject_codes = set(Subject.objects.order_by().values_list('code', flat=True))
+            self.default_max_marks = Course._meta.get_field('max_marks').default
+
+    def duplicated_in_file(self, name, values):
+        """Mask of values already seen earlier in the file, including earlier chunks"""
+        seen = self.seen.setdefault(name, set())
+        duplicated = values.isin(seen) | values.duplicated(keep='first')
+        seen.update(values.dropna())
+        return duplicated & values.notna()
+
+    def validate(self, df):
+        """Check one chunk; returns (valid row count, error strings, warning strings)"""
+        if self.import_type == 'students':
+            errors, warnings = self.validate_students(df)
+        else:
+            errors, warnings = self.validate_grades(df)
+        return len(df) - len(errors), errors.tolist(), warnings.tolist()
+
+    def validate_students(self, df):
+        usernames = df['username'].map(User.normalize_username, na_action='ignore')
+        emails = df['email'].map(User.objects.normalize_email, na_action='ignore')
+        student_ids = df['student_id']
+        departments = df['department_code']
+        enrollment_dates = pd.to_datetime(df['enrollment_date'], errors='coerce', format='mixed')
+
+        checks = [
+            (df[['username', 'email', 'student_id']].isna().any(axis=1), 'Missing required fields'),
+            (usernames.isin(self.usernames), "Username '" + df['username'] + "' already exists"),
+            (self.duplicated_in_file('username', usernames), "Username '" + df['username'] + "' appears more than once"),
+            (emails.isin(self.emails), "Email '" + df['email'] + "' already exists"),
+            (self.duplicated_in_file('email', emails), "Email '" + df['email'] + "' appears more than once"),
+            (student_ids.isin(self.student_ids), "Student ID '" + student_ids + "' already exists"),
+            (self.duplicated_in_file('student_id', student_ids), "Student ID '" + student_ids + "' appears more than once"),
+            (~departments.isin(self.departments), "Department '" + departments.fillna('') + "' not found"),
+            (enrollment_dates.isna(), "Invalid enrollment date '" + df['enrollment_date'].fillna('') + "'"),
+        ]
+        return collect_errors(df.index, checks), pd.Series(dtype=object)
+
+    def validate_grades(self, df):
+        student_ids = df['student_id']
+        codes = df['course_code']
+
+        # Codes without a course are created by the importer when their department exists
+        existing = codes.isin(self.course_max_marks.index)
+        new_subject = ~existing & codes.notna() & ~codes.isin(self.subject_codes)
+        prefixes = codes.str[:2]
+        department_codes = prefixes.where(prefixes.isin(IMPORT_COURSE_DEPARTMENTS), DEFAULT_COURSE_DEPARTMENT)
+        unknown_course = new_subject & ~department_codes.isin(self.departments)
+        max_marks = codes.map(self.course_max_marks).fillna(self.default_max_marks)
+
+        marks = pd.to_numeric(df['marks_obtained'], errors='coerce')
+        marks_text = df['marks_obtained'].fillna('')
+
+        checks = [
+            (df[['student_id', 'course_code', 'marks_obtained']].isna().any(axis=1), 'Missing required fields'),
+            (student_ids.notna() & ~student_ids.isin(self.student_ids), "Student '" + student_ids.fillna('') + "' not found"),
+            (unknown_course, "Unknown course code '" + codes.fillna('') + "' (no department " + department_codes + ')'),
+            (df['marks_obtained'].notna() & marks.isna(), "Invalid marks '" + marks_text + "'"),
+            (~unknown_course & ((marks < 0) | (marks > max_marks)),
+             "Marks " + marks_text + ' out of range (should be 0-' + max_marks.astype(int).astype(str) + ')'),
+        ]
+        errors = collect_errors(df.index, checks)
+
+        warnings = []
+        created = codes[~existing & codes.notna() & ~unknown_course].unique()
+        created = [code for code in created if code not in self.seen.setdefault('created_courses', set())]
+        if created:
+            self.seen['created_courses'].update(created)
+            warnings.append(f"Course(s) would be created for new code(s): {', '.join(sorted(created))}")
+        if 'exam_date' in df.columns:
+            exam_dates = pd.to_datetime(df['exam_date'], errors='coerce', format='mixed')
+            bad_dates = df['exam_date'].notna() & exam_dates.isna()
+            warnings.extend(collect_errors(df.index, [(bad_dates, "Invalid exam date '" + df['exam_date'].fillna('') + "', today's date would be used")]))
+
+        return errors, pd.Series(warnings, dtype=object)
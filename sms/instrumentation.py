@@ -0,0 +1,175 @@
+"""
+Opt-in per-request instrumentation (``SMS_REQUEST_TIMING=1``).
+
+``RequestTimingMiddleware`` wraps every request in ``connection.execute_wrapper``
+to count queries, time them and spot repeated SQL (the same statement with
+different parameters, i.e. N+1 patterns). ``TimedDjangoTemplates`` adds template
+render time. Each response gets a ``Server-Timing`` header, each request one
+JSON log line on the ``sms.requests`` logger, and ``request_timings`` keeps the
+last samples per view for the staff-only percentile endpoint.
+
+Samples live in the memory of each worker process. Time spent streaming a
+response body after the view returned is not included.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('sms.requests')
+
+# A statement run this many times in one request is reported as repeated
+REPEATED_QUERY_THRESHOLD = 3
+
+_current_metrics = ContextVar('sms_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Queries and render time of one request; also the execute_wrapper callable"""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def repeated(self):
+        """(sql, count) of the statements run at least REPEATED_QUERY_THRESHOLD times"""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= REPEATED_QUERY_THRESHOLD]
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates whose renders are added to the current request's metrics.
+
+    Querysets evaluated lazily inside a template count towards both the SQL and
+    the template time.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class TimingStore:
+    """The last ``size`` samples per view, plus how often each view repeated a statement"""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._samples = defaultdict(partial(deque, maxlen=self.size))
+            self._repeated = defaultdict(Counter)
+
+    def add(self, view, view_ms, sql_ms, template_ms, queries, repeated):
+        with self._lock:
+            self._samples[view].append((view_ms, sql_ms, template_ms, queries))
+            if repeated:
+                counter = self._repeated[view]
+                counter.update(sql for sql, _ in repeated)
+                # Statements with varying IN lists never repeat; keep the common ones only
+                if len(counter) > 50:
+                    self._repeated[view] = Counter(dict(counter.most_common(25)))
+
+    def summary(self):
+        with self._lock:
+            samples = {view: list(rows) for view, rows in self._samples.items()}
+            repeated = {view: counter.most_common(5) for view, counter in self._repeated.items()}
+
+        views = {}
+        for view, rows in sorted(samples.items()):
+            stats = {'count': len(rows)}
+            for position, name in enumerate(['view_ms', 'sql_ms', 'template_ms', 'queries']):
+                ordered = sorted(row[position] for row in rows)
+                stats[name] = {
+                    'p50': round(percentile(ordered, 0.50), 2),
+                    'p95': round(percentile(ordered, 0.95), 2),
+                    'p99': round(percentile(ordered, 0.99), 2),
+                    'max': round(ordered[-1], 2),
+                }
+            stats['repeated_queries'] = [{'sql': sql, 'requests': count} for sql, count in repeated.get(view, [])]
+            views[view] = stats
+        return views
+
+
+request_timings = TimingStore(getattr(settings, 'REQUEST_TIMING_SAMPLES', 1000))
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'SMS_REQUEST_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        view_ms = (time.perf_counter() - started) * 1000
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        repeated = metrics.repeated()
+        response['Server-Timing'] = (
+            f'sql;dur={metrics.sql_ms:.2f};desc="{metrics.queries} queries, {len(repeated)} repeated", '
+            f'tpl;dur={metrics.template_ms:.2f}, '
+            f'view;dur={view_ms:.2f}'
+        )
+        request_timings.add(view, view_ms, metrics.sql_ms, metrics.template_ms, metrics.queries, repeated)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': view,
+                'status': response.status_code,
+                'view_ms': round(view_ms, 2),
+                'sql_ms': round(metrics.sql_ms, 2),
+                'template_ms': round(metrics.template_ms, 2),
+                'queries': metrics.queries,
+                'repeated': [{'sql': sql[:200], 'count': count} for sql, count in repeated],
+            }))
+        return response
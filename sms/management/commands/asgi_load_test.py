@@ -0,0 +1,165 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import Client
+
+from sms.benchmark import benchmark_cases, benchmark_users
+from sms.instrumentation import percentile
+
+# The async JSON endpoints the dashboards poll
+ASYNC_ENDPOINTS = [
+    'get_student_details',
+    'course_analysis_data',
+    'course_analysis_data_detail',
+    'performance_trends_data',
+    'student_performance',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the async JSON endpoints through the WSGI handler on a pool of worker threads '
+        'and through the ASGI handler on one event loop, and compare throughput and latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per server type')
+        parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+        parser.add_argument('--concurrency', type=int, default=64, help='Requests in flight at once')
+        parser.add_argument('--endpoint', action='append', choices=ASYNC_ENDPOINTS, help='Only these endpoints (repeatable)')
+
+    def handle(self, *args, **options):
+        endpoints = options['endpoint'] or ASYNC_ENDPOINTS
+        cases = [case for case in benchmark_cases() if case.name in endpoints]
+        users = benchmark_users()
+        if users['student'] is None:
+            raise CommandError('No student with grades found; run `manage.py seed_benchmark` first.')
+
+        cookies = {}
+        for case in cases:
+            if case.role not in cookies:
+                client = Client()
+                client.force_login(users[case.role])
+                cookies[case.role] = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        workload = [(case, cookies[case.role]) for case in (cases * (options['requests'] // len(cases) + 1))[:options['requests']]]
+
+        self.stdout.write(f"{'server':26} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        results = {
+            f"WSGI, {options['threads']} threads": self.run_wsgi(workload, options['threads'], options['concurrency']),
+            f"ASGI, {options['concurrency']} in flight": self.run_asgi(workload, options['concurrency']),
+        }
+        for name, (elapsed, timings, errors) in results.items():
+            ordered = sorted(timings)
+            self.stdout.write(
+                f'{name:26} {len(timings) / elapsed:>8.0f} {statistics.median(ordered):>8.1f} '
+                f'{percentile(ordered, 0.95):>8.1f} {errors:>7}'
+            )
+        self.stdout.write(self.style.SUCCESS('Load test finished'))
+
+    def run_wsgi(self, workload, threads, concurrency):
+        """Like a threaded WSGI server: requests beyond the worker threads wait in its queue"""
+        application = get_wsgi_application()
+        slots = threading.Semaphore(concurrency)
+
+        def call(item, queued_at):
+            case, cookie = item
+            url = urlsplit(case.url)
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': url.path,
+                'QUERY_STRING': url.query,
+                'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'localhost',
+                'HTTP_COOKIE': cookie,
+                'wsgi.input': BytesIO(),
+                'wsgi.url_scheme': 'http',
+            }
+            statuses = []
+            try:
+                response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+                try:
+                    b''.join(response)
+                finally:
+                    response.close()
+            finally:
+                slots.release()
+            # Latency includes the time spent queued, as the client sees it
+            return (time.perf_counter() - queued_at) * 1000, statuses[0].startswith('200')
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = []
+            for item in workload:
+                slots.acquire()
+                futures.append(pool.submit(call, item, time.perf_counter()))
+            outcomes = [future.result() for future in futures]
+        return time.perf_counter() - started, [elapsed for elapsed, _ in outcomes], sum(not ok for _, ok in outcomes)
+
+    def run_asgi(self, workload, concurrency):
+        """Like an ASGI server: every request is a task on one event loop"""
+        application = get_asgi_application()
+
+        async def call(item, semaphore):
+            case, cookie = item
+            url = urlsplit(case.url)
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': url.path,
+                'raw_path': url.path.encode(),
+                'query_string': url.query.encode(),
+                'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+                'client': ('127.0.0.1', 50000),
+                'server': ('localhost', 80),
+            }
+            disconnected = asyncio.Event()
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            statuses = []
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            async with semaphore:
+                started = time.perf_counter()
+                await application(scope, receive, send)
+                disconnected.set()
+                return (time.perf_counter() - started) * 1000, statuses == [200]
+
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*(call(item, semaphore) for item in workload))
+
+        # As configured for ASGI in settings.py
+        database = connections.settings['default']
+        conn_max_age, database['CONN_MAX_AGE'] = database['CONN_MAX_AGE'], 0
+        try:
+            started = time.perf_counter()
+            outcomes = asyncio.run(run())
+            elapsed = time.perf_counter() - started
+        finally:
+            database['CONN_MAX_AGE'] = conn_max_age
+        return elapsed, [elapsed for elapsed, _ in outcomes], sum(not ok for _, ok in outcomes)
@@ -0,0 +1,99 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+HEAVY_MODULES = ['numpy', 'pandas', 'sklearn', 'joblib', 'scipy']
+
+# Runs in a fresh interpreter: load the app like a WSGI worker, serve the login
+# page, then report what that cost
+WORKER_PROBE = '''
+import json, resource, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+from django.urls import get_resolver
+application = get_wsgi_application()
+get_resolver().url_patterns
+ready = time.perf_counter()
+status = Client(HTTP_HOST='localhost').get('/login/').status_code
+print(json.dumps({
+    'startup_ms': (ready - started) * 1000,
+    'first_request_ms': (time.perf_counter() - ready) * 1000,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'status': status,
+    'heavy_modules': sorted(name for name in %r if name in sys.modules),
+}))
+''' % HEAVY_MODULES
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the import time of `manage.py check` (python -X importtime) and the startup time '
+        'and RSS of a worker serving the login page, each in fresh interpreters'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per measurement (the median is kept)')
+        parser.add_argument('--output', default='startup.json', help='Where to write the results')
+        parser.add_argument('--compare', metavar='BASELINE', help='Earlier results to compare against')
+
+    def run_python(self, *args):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'student_management_system.settings')}
+        result = subprocess.run([sys.executable, *args], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'Probe failed')
+        return result
+
+    def import_times(self):
+        """Total and top-level module import times (ms) of one `manage.py check`"""
+        stderr = self.run_python('-X', 'importtime', str(Path(settings.BASE_DIR) / 'manage.py'), 'check').stderr
+        modules = {}
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if not name.startswith('  '):  # Top-level imports only; nested ones are included in them
+                modules[name.strip()] = int(cumulative) / 1000
+        return sum(modules.values()), modules
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+
+        totals, module_times = [], {}
+        for _ in range(repeat):
+            total, modules = self.import_times()
+            totals.append(total)
+            for name, elapsed in modules.items():
+                module_times.setdefault(name, []).append(elapsed)
+        slowest = sorted(((statistics.median(times), name) for name, times in module_times.items()), reverse=True)[:10]
+
+        probes = [json.loads(self.run_python('-c', WORKER_PROBE).stdout) for _ in range(repeat)]
+        report = {
+            'check_import_ms': round(statistics.median(totals), 1),
+            'slowest_imports': {name: round(elapsed, 1) for elapsed, name in slowest},
+            'worker_startup_ms': round(statistics.median(probe['startup_ms'] for probe in probes), 1),
+            'first_request_ms': round(statistics.median(probe['first_request_ms'] for probe in probes), 1),
+            'worker_rss_mb': round(statistics.median(probe['rss_mb'] for probe in probes), 1),
+            'heavy_modules_loaded': probes[0]['heavy_modules'],
+        }
+        Path(options['output']).write_text(json.dumps(report, indent=2))
+
+        baseline = json.loads(Path(options['compare']).read_text()) if options['compare'] else {}
+        for key in ['check_import_ms', 'worker_startup_ms', 'first_request_ms', 'worker_rss_mb']:
+            line = f'{key:20} {report[key]:>10}'
+            if key in baseline:
+                line += f'   (was {baseline[key]}, {report[key] - baseline[key]:+.1f})'
+            self.stdout.write(line)
+        self.stdout.write(f"{'heavy modules':20} {', '.join(report['heavy_modules_loaded']) or 'none'}")
+        self.stdout.write('slowest imports of manage.py check:')
+        for name, elapsed in report['slowest_imports'].items():
+            self.stdout.write(f'  {name:40} {elapsed:>8} ms')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
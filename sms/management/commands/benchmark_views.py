@@ -0,0 +1,50 @@
+import json
+import platform
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sms.benchmark import run_view_benchmarks
+from sms.models import Grade, Student
+
+
+class Command(BaseCommand):
+    help = 'Request every sms URL and record query count, wall time and peak memory as a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='benchmark.json', help='Where to write the results')
+        parser.add_argument('--compare', metavar='BASELINE', help='Earlier results to compare against')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per URL (the median is kept)')
+
+    def handle(self, *args, **options):
+        results = run_view_benchmarks(repeat=max(1, options['repeat']))
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'students': Student.objects.count(),
+            'grades': Grade.objects.count(),
+            'results': results,
+        }
+        Path(options['output']).write_text(json.dumps(report, indent=2))
+
+        baseline = {}
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text())['results']
+
+        regressions = []
+        self.stdout.write(f"{'view':32} {'status':>6} {'queries':>8} {'ms':>10} {'peak KB':>10}")
+        for name, result in results.items():
+            line = f"{name:32} {result['status']:>6} {result['queries']:>8} {result['wall_ms']:>10} {result['peak_kb']:>10}"
+            previous = baseline.get(name)
+            if previous:
+                line += f"   (queries {result['queries'] - previous['queries']:+d}, ms {result['wall_ms'] - previous['wall_ms']:+.1f})"
+                if result['queries'] > previous['queries']:
+                    regressions.append(name)
+            self.stdout.write(line)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        if regressions:
+            raise CommandError(f"Query count grew for: {', '.join(regressions)}")
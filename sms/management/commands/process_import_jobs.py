@@ -0,0 +1,60 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from sms.import_jobs import fail_stale_import_jobs, run_import_job
+from sms.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = 'Process pending CSV import jobs on a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of jobs processed in parallel (default: one per core)')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait between checks for new jobs')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no pending jobs are left instead of polling forever')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        running = {}
+
+        # Pending jobs are picked up below; running ones whose worker stopped are not
+        failed = fail_stale_import_jobs()
+        if failed:
+            self.stdout.write(f'Marked {failed} interrupted import job(s) as failed')
+
+        # Spawned workers set Django up themselves instead of inheriting this process's connections
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=django.setup) as pool:
+            self.stdout.write(f'Processing import jobs with {workers} worker(s)')
+            while True:
+                for job_id, future in list(running.items()):
+                    if future.done():
+                        del running[job_id]
+                        if future.exception() is not None:
+                            self.stderr.write(f'Import job {job_id} crashed: {future.exception()}')
+                        else:
+                            self.stdout.write(f'Finished import job {job_id}')
+
+                free = workers - len(running)
+                pending = []
+                if free > 0:
+                    pending = list(
+                        ImportJob.objects.filter(status='pending').exclude(pk__in=running)
+                        .order_by('created_at').values_list('pk', flat=True)[:free]
+                    )
+                for job_id in pending:
+                    running[job_id] = pool.submit(run_import_job, job_id)
+
+                if options['once'] and not running and not pending:
+                    break
+                time.sleep(options['poll_interval'] if not running else 0.5)
+
+        self.stdout.write(self.style.SUCCESS('No pending import jobs left'))
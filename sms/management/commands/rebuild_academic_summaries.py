@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sms.summaries import refresh_student_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the StudentAcademicSummary row of every student from their grades'
+
+    def handle(self, *args, **options):
+        written = refresh_student_summaries()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} student academic summaries'))
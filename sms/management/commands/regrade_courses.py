@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sms.models import Course
+from sms.regrade import regrade_courses
+
+
+class Command(BaseCommand):
+    help = "Recompute stored grades and GPAs from each course's max marks and grading scale"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='course_ids', metavar='ID',
+                            help='Course id to regrade (repeatable; default: all courses)')
+        parser.add_argument('--subject', action='append', dest='subject_codes', metavar='CODE',
+                            help='Regrade every course of this subject code (repeatable)')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options['course_ids'] or options['subject_codes']:
+            courses = Course.objects.none()
+            if options['course_ids']:
+                courses |= Course.objects.filter(pk__in=options['course_ids'])
+            if options['subject_codes']:
+                courses |= Course.objects.filter(subject__code__in=options['subject_codes'])
+            if not courses.exists():
+                raise CommandError('No matching courses found')
+
+        changed = regrade_courses(courses.order_by('pk'))
+        self.stdout.write(self.style.SUCCESS(f'Regraded {changed} grades'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sms.benchmark import BENCHMARK_ADMIN_USERNAME, BENCHMARK_PASSWORD, seed_benchmark_data
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create synthetic departments, subjects, courses, students and grades for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--grades', type=int, default=10000)
+        parser.add_argument('--subjects-per-department', type=int, default=6)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for marks and course assignment')
+
+    def handle(self, *args, **options):
+        try:
+            created = seed_benchmark_data(
+                students=options['students'],
+                grades=options['grades'],
+                subjects_per_department=options['subjects_per_department'],
+                seed=options['seed'],
+                stdout=self.stdout,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {created['students']} students and {created['grades']} grades in {created['courses']} courses "
+            f"(admin login: {BENCHMARK_ADMIN_USERNAME} / {BENCHMARK_PASSWORD})"
+        ))
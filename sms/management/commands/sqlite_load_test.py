@@ -0,0 +1,121 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from sms.instrumentation import percentile
+
+# Django's SQLite defaults: rollback journal, deferred transactions, a new connection per request
+DEFAULT_PROFILE = {'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent readers and writers against scratch SQLite databases, once with '
+        "Django's defaults and once with the DATABASES settings, and compare throughput"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help='Threads running grade aggregates')
+        parser.add_argument('--writers', type=int, default=4, help='Threads inserting grade batches')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration per profile')
+        parser.add_argument('--rows', type=int, default=20000, help='Rows in the scratch table before the run')
+        parser.add_argument('--batch', type=int, default=20, help='Rows inserted per write transaction')
+
+    def handle(self, *args, **options):
+        base = connections.settings['default']
+        if base['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('The load test needs the SQLite backend.')
+
+        tuned = {key: base[key] for key in DEFAULT_PROFILE}
+        profiles = {'django defaults': DEFAULT_PROFILE, 'settings': tuned}
+
+        self.stdout.write(f"{'profile':16} {'reads/s':>9} {'writes/s':>9} {'read p95 ms':>12} {'write p95 ms':>13} {'locked':>7}")
+        with tempfile.TemporaryDirectory() as directory:
+            for number, (name, profile) in enumerate(profiles.items()):
+                alias = f'load_test_{number}'
+                connections.settings[alias] = {**base, **profile, 'NAME': str(Path(directory) / f'{alias}.sqlite3')}
+                try:
+                    self.create_table(alias, options['rows'])
+                    result = self.run_load(alias, options)
+                finally:
+                    connections[alias].close()
+                    del connections.settings[alias]
+
+                self.stdout.write(
+                    f"{name:16} {result['reads'] / options['seconds']:>9.0f} {result['writes'] / options['seconds']:>9.0f} "
+                    f"{result['read_p95']:>12.1f} {result['write_p95']:>13.1f} {result['locked']:>7}"
+                )
+        self.stdout.write(self.style.SUCCESS('Load test finished'))
+
+    def create_table(self, alias, rows):
+        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+            cursor.execute('CREATE TABLE load_grade (id INTEGER PRIMARY KEY, student INTEGER NOT NULL, marks REAL NOT NULL)')
+            cursor.execute('CREATE INDEX load_grade_student ON load_grade (student)')
+            cursor.executemany(
+                'INSERT INTO load_grade (student, marks) VALUES (%s, %s)',
+                [(row % 1000, row % 100) for row in range(rows)],
+            )
+
+    def run_load(self, alias, options):
+        deadline = time.perf_counter() + options['seconds']
+        results = []
+
+        def request(work):
+            """One simulated request: run work, then release the connection as request_finished does"""
+            started = time.perf_counter()
+            try:
+                work(connections[alias])
+                return (time.perf_counter() - started) * 1000
+            except OperationalError:
+                return None
+            finally:
+                connections[alias].close_if_unusable_or_obsolete()
+
+        def read(connection):
+            with connection.cursor() as cursor:
+                student = int(time.perf_counter_ns() % 1000)
+                cursor.execute('SELECT COUNT(*), AVG(marks) FROM load_grade WHERE student BETWEEN %s AND %s', [student, student + 50])
+                cursor.fetchall()
+
+        def write(connection):
+            # Read, then write in the same transaction, like the import and regrade paths
+            with transaction.atomic(using=alias), connection.cursor() as cursor:
+                cursor.execute('SELECT MAX(id) FROM load_grade')
+                last_id = cursor.fetchone()[0]
+                cursor.executemany(
+                    'INSERT INTO load_grade (student, marks) VALUES (%s, %s)',
+                    [((last_id + row) % 1000, row % 100) for row in range(options['batch'])],
+                )
+
+        def worker(kind, work):
+            timings = []
+            locked = 0
+            while time.perf_counter() < deadline:
+                elapsed = request(work)
+                if elapsed is None:
+                    locked += 1
+                else:
+                    timings.append(elapsed)
+            connections[alias].close()
+            results.append((kind, timings, locked))
+
+        threads = [threading.Thread(target=worker, args=('read', read)) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=('write', write)) for _ in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        reads = sorted(elapsed for kind, timings, _ in results if kind == 'read' for elapsed in timings)
+        writes = sorted(elapsed for kind, timings, _ in results if kind == 'write' for elapsed in timings)
+        return {
+            'reads': len(reads),
+            'writes': len(writes),
+            'read_p95': percentile(reads, 0.95) if reads else 0.0,
+            'write_p95': percentile(writes, 0.95) if writes else 0.0,
+            'locked': sum(locked for _, _, locked in results),
+        }
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from sms import performance_model
+
+
+class Command(BaseCommand):
+    help = 'Train the K-NN performance model from all grades and save it to PERFORMANCE_MODEL_PATH'
+
+    def handle(self, *args, **options):
+        artifact = performance_model.train_model()
+        performance_model.save_model(artifact)
+
+        path = performance_model.model_path()
+        if artifact['model'] is None:
+            self.stdout.write(self.style.WARNING(
+                f"Not enough grades for ML ({artifact['grade_count']}); saved a rule-based placeholder to {path}"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Trained performance model on {artifact['grade_count']} grades "
+                f"(schema v{artifact['schema_version']}, watermark {artifact['watermark']}) -> {path}"
+            ))
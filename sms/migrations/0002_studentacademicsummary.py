@@ -0,0 +1,94 @@
+# Generated by Django 5.1.1 on 2026-10-18 01:07
+
+from itertools import groupby
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of sms.summaries.summarize_grades as of this migration, so later
+# changes to the app code cannot change what this migration writes
+def summarize_grades(grades):
+    gpas = [gpa for _, gpa, _ in grades]
+    grade_count = len(gpas)
+
+    if grade_count == 0:
+        return {
+            'grade_count': 0,
+            'failing_count': 0,
+            'avg_gpa': None,
+            'first_gpa': None,
+            'latest_gpa': None,
+            'min_gpa': None,
+            'max_gpa': None,
+            'trend': 'Insufficient Data',
+            'latest_grade_id': None,
+        }
+
+    if grade_count >= 2:
+        recent = gpas[-3:]
+        older = gpas[:-3]
+        if older:
+            trend = 'Improving' if sum(recent) / len(recent) > sum(older) / len(older) else 'Declining'
+        else:
+            trend = 'New Student'
+    else:
+        trend = 'Insufficient Data'
+
+    return {
+        'grade_count': grade_count,
+        'failing_count': sum(1 for _, _, letter in grades if letter == 'F'),
+        'avg_gpa': sum(gpas) / grade_count,
+        'first_gpa': gpas[0],
+        'latest_gpa': gpas[-1],
+        'min_gpa': min(gpas),
+        'max_gpa': max(gpas),
+        'trend': trend,
+        'latest_grade_id': grades[-1][0],
+    }
+
+
+def populate_summaries(apps, schema_editor):
+    Student = apps.get_model('sms', 'Student')
+    Grade = apps.get_model('sms', 'Grade')
+    StudentAcademicSummary = apps.get_model('sms', 'StudentAcademicSummary')
+
+    grades = Grade.objects.order_by('student_id', 'created_at', 'id').values_list('student_id', 'id', 'gpa', 'grade')
+    grades_by_student = {
+        student_id: [row[1:] for row in rows]
+        for student_id, rows in groupby(grades, key=lambda row: row[0])
+    }
+    StudentAcademicSummary.objects.bulk_create(
+        [
+            StudentAcademicSummary(student_id=student_id, **summarize_grades(grades_by_student.get(student_id, [])))
+            for student_id in Student.objects.values_list('id', flat=True)
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentAcademicSummary',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='academic_summary', serialize=False, to='sms.student')),
+                ('grade_count', models.IntegerField(default=0)),
+                ('failing_count', models.IntegerField(default=0)),
+                ('avg_gpa', models.FloatField(blank=True, null=True)),
+                ('first_gpa', models.FloatField(blank=True, null=True)),
+                ('latest_gpa', models.FloatField(blank=True, null=True)),
+                ('min_gpa', models.FloatField(blank=True, null=True)),
+                ('max_gpa', models.FloatField(blank=True, null=True)),
+                ('trend', models.CharField(choices=[('Improving', 'Improving'), ('Declining', 'Declining'), ('New Student', 'New Student'), ('Insufficient Data', 'Insufficient Data')], default='Insufficient Data', max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('latest_grade', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='sms.grade')),
+            ],
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.1 on 2026-10-18 01:16
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms', '0002_studentacademicsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('import_type', models.CharField(choices=[('students', 'Students'), ('grades', 'Grades')], max_length=10)),
+                ('file', models.FileField(upload_to='imports/')),
+                ('original_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('total_rows', models.IntegerField(default=0)),
+                ('processed_rows', models.IntegerField(default=0)),
+                ('success_count', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('predictions', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
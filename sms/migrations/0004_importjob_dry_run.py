@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-18 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms', '0003_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='dry_run',
+            field=models.BooleanField(default=False, help_text='Only validate the file, write nothing'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='warnings',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
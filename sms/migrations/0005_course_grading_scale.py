@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms', '0004_importjob_dry_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='grading_scale',
+            field=models.JSONField(blank=True, help_text='Optional bands overriding the default scale, lowest first: [{"min": 0, "grade": "F", "gpa": 0.0}, ...]', null=True),
+        ),
+    ]
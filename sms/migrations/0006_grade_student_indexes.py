@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-18 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms', '0005_course_grading_scale'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='grade',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['created_at', 'id'], name='grade_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['student', 'created_at', 'id'], name='grade_student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['course', 'grade'], name='grade_course_grade_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['grade', 'created_at', 'id'], name='grade_letter_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['gpa'], name='grade_gpa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['-created_at'], name='student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['student_id'], name='student_active_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 03:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms', '0006_grade_student_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .grading import get_grading_scale, validate_grading_bands
 
 # Custom User Model
 class User(AbstractUser):
@@ -76,6 +80,12 @@ class Student(models.Model):
 
     class Meta:
         ordering = ['student_id']
+        indexes = [
+            # Recently added students
+            models.Index(fields=['-created_at'], name='student_created_idx'),
+            # Active-student listings in the default order
+            models.Index(fields=['student_id'], condition=models.Q(is_active=True), name='student_active_idx'),
+        ]
 
 # Course Model (for specific semester/year courses)
 class Course(models.Model):
@@ -90,9 +100,23 @@ class Course(models.Model):
     academic_year = models.CharField(max_length=9, help_text="e.g., 2023-2024")
     instructor = models.CharField(max_length=100, blank=True, null=True)
     max_marks = models.IntegerField(default=100, validators=[MinValueValidator(1)])
+    grading_scale = models.JSONField(
+        blank=True, null=True,
+        help_text='Optional bands overriding the default scale, lowest first: [{"min": 0, "grade": "F", "gpa": 0.0}, ...]'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def clean(self):
+        if self.grading_scale:
+            try:
+                validate_grading_bands(self.grading_scale, [choice[0] for choice in Grade.GRADE_CHOICES])
+            except ValueError as e:
+                raise ValidationError({'grading_scale': str(e)})
+
+    def get_grading_scale(self):
+        return get_grading_scale(self.grading_scale)
+
     def __str__(self):
         return f"{self.subject.name} - Year {self.year} Sem {self.semester} ({self.academic_year})"
 
@@ -123,30 +147,13 @@ class Grade(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        # Auto-calculate grade and GPA based on marks
-        percentage = (self.marks_obtained / self.course.max_marks) * 100
-
-        if percentage >= 90:
-            self.grade = 'A+'
-            self.gpa = 4.0
-        elif percentage >= 80:
-            self.grade = 'A'
-            self.gpa = 3.7
-        elif percentage >= 70:
-            self.grade = 'B+'
-            self.gpa = 3.3
-        elif percentage >= 60:
-            self.grade = 'B'
-            self.gpa = 3.0
-        elif percentage >= 50:
-            self.grade = 'C+'
-            self.gpa = 2.3
-        elif percentage >= 40:
-            self.grade = 'C'
-            self.gpa = 2.0
+        # Auto-calculate grade and GPA based on marks, without loading the whole course
+        if Grade.course.is_cached(self):
+            max_marks, scale = self.course.max_marks, self.course.get_grading_scale()
         else:
-            self.grade = 'F'
-            self.gpa = 0.0
+            max_marks, bands = Course.objects.values_list('max_marks', 'grading_scale').get(pk=self.course_id)
+            scale = get_grading_scale(bands)
+        self.grade, self.gpa = scale.band((self.marks_obtained / max_marks) * 100)
 
         super().save(*args, **kwargs)
 
@@ -155,6 +162,92 @@ class Grade(models.Model):
 
     class Meta:
         unique_together = ['student', 'course']
+        # id breaks created_at ties so listings are deterministic and served by grade_created_idx
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Newest-first listings, keyset pages and created_at month ranges
+            models.Index(fields=['created_at', 'id'], name='grade_created_idx'),
+            # A student's grades in chronological order (summaries, dashboards)
+            models.Index(fields=['student', 'created_at', 'id'], name='grade_student_created_idx'),
+            # Per-course grade distributions
+            models.Index(fields=['course', 'grade'], name='grade_course_grade_idx'),
+            # Listings filtered by letter grade, e.g. failing grades
+            models.Index(fields=['grade', 'created_at', 'id'], name='grade_letter_created_idx'),
+            models.Index(fields=['gpa'], name='grade_gpa_idx'),
+        ]
+
+# Per-student academic summary, kept up to date from Grade writes (see sms/summaries.py)
+class StudentAcademicSummary(models.Model):
+    TREND_CHOICES = (
+        ('Improving', 'Improving'),
+        ('Declining', 'Declining'),
+        ('New Student', 'New Student'),
+        ('Insufficient Data', 'Insufficient Data'),
+    )
+
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='academic_summary')
+    grade_count = models.IntegerField(default=0)
+    failing_count = models.IntegerField(default=0)
+    avg_gpa = models.FloatField(blank=True, null=True)
+    first_gpa = models.FloatField(blank=True, null=True)
+    latest_gpa = models.FloatField(blank=True, null=True)
+    min_gpa = models.FloatField(blank=True, null=True)
+    max_gpa = models.FloatField(blank=True, null=True)
+    trend = models.CharField(max_length=20, choices=TREND_CHOICES, default='Insufficient Data')
+    latest_grade = models.ForeignKey(Grade, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student.student_id} - {self.grade_count} grades, GPA {self.avg_gpa}"
+
+# Uploaded CSV import, processed in the background (see sms/import_jobs.py)
+class ImportJob(models.Model):
+    IMPORT_TYPE_CHOICES = (
+        ('students', 'Students'),
+        ('grades', 'Grades'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    import_type = models.CharField(max_length=10, choices=IMPORT_TYPE_CHOICES)
+    dry_run = models.BooleanField(default=False, help_text='Only validate the file, write nothing')
+    file = models.FileField(upload_to='imports/')
+    original_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    total_rows = models.IntegerField(default=0)
+    processed_rows = models.IntegerField(default=0)
+    success_count = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    warnings = models.JSONField(default=list, blank=True)
+    predictions = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, related_name='import_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Touched with every progress save; a running job that stops moving lost its worker
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    @property
+    def progress(self):
+        if self.status == 'completed':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, round(self.processed_rows * 100 / self.total_rows))
+
+    def __str__(self):
+        return f"{self.get_import_type_display()} import {self.original_name} ({self.status})"
+
+    class Meta:
         ordering = ['-created_at']
 
 # Attendance Model (optional for future enhancement)
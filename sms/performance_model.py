@@ -0,0 +1,205 @@
+"""
+Persisted K-Nearest Neighbors performance model.
+
+The model is trained offline with ``manage.py train_performance_model`` and saved
+with joblib together with its scaler, the feature schema version and the grade
+watermark it was trained on. Views only load it (memory-mapped, once per process)
+and run inference. When enough grades have changed since the watermark the model
+is refit on a background thread.
+"""
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import joblib
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils import timezone
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import StandardScaler
+
+from .features import FEATURE_NAMES, feature_store
+from .models import Grade
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the features produced by FeatureStore.features change
+FEATURE_SCHEMA_VERSION = 1
+
+# Below either minimum the artifact holds no model and the rule-based predictor is used
+MIN_TRAINING_GRADES = 10
+MIN_TRAINING_STUDENTS = 5  # with at least 2 grades each, for the trend feature
+
+_artifact = None
+_artifact_mtime = None
+_load_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+
+
+def model_path():
+    return Path(getattr(settings, 'PERFORMANCE_MODEL_PATH', settings.BASE_DIR / 'ml_models' / 'performance_model.joblib'))
+
+
+def refresh_threshold():
+    return getattr(settings, 'PERFORMANCE_MODEL_REFRESH_THRESHOLD', 100)
+
+
+def classify_performance(gpa):
+    """Map a GPA onto the performance classes used by the predictors"""
+    if gpa >= 3.7:
+        return 'Excellent'
+    elif gpa >= 3.0:
+        return 'Best'
+    elif gpa >= 2.5:
+        return 'Better'
+    return 'Good'
+
+
+def has_training_data(store):
+    """Whether the store holds enough grades and students for train_model to fit a model"""
+    return store.watermark['grade_count'] >= MIN_TRAINING_GRADES and (store.grade_count >= 2).sum() >= MIN_TRAINING_STUDENTS
+
+
+def train_model():
+    """Fit the scaler and classifier on every student's features from the feature store.
+
+    Returns the artifact dict that save_model persists. ``model`` is None when there
+    is not enough data for ML, in which case callers use the rule-based predictor.
+    """
+    store = feature_store()
+    watermark = store.watermark
+
+    artifact = {
+        'schema_version': FEATURE_SCHEMA_VERSION,
+        'feature_names': FEATURE_NAMES,
+        'model': None,
+        'scaler': None,
+        'grade_count': watermark['grade_count'],
+        'watermark': watermark['updated_at'],
+        'trained_at': timezone.now(),
+    }
+
+    if not has_training_data(store):
+        return artifact
+
+    # Need at least 2 grades per student for trend analysis
+    training = store.grade_count >= 2
+
+    features_array = store.features()[training]
+    labels = [classify_performance(gpa) for gpa in store.latest_gpa[training]]
+
+    scaler = StandardScaler()
+    features_scaled = scaler.fit_transform(features_array)
+
+    # Ensure k is appropriate for the dataset
+    k = max(1, min(5, len(features_array) // 2))  # At least 1, at most 5
+    if k >= len(features_array):
+        k = len(features_array) - 1 if len(features_array) > 1 else 1
+
+    knn = KNeighborsClassifier(n_neighbors=k, weights='distance')
+    knn.fit(features_scaled, labels)
+
+    artifact['model'] = knn
+    artifact['scaler'] = scaler
+    return artifact
+
+
+def save_model(artifact):
+    """Atomically write the artifact so concurrent readers never see a partial file"""
+    global _artifact, _artifact_mtime
+
+    path = model_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    os.close(fd)
+    try:
+        # Uncompressed so the arrays can be memory-mapped on load
+        joblib.dump(artifact, tmp_path)
+        # mkstemp creates the file 0600; other users running the app must be able to read it
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    with _load_lock:
+        _artifact = artifact
+        _artifact_mtime = path.stat().st_mtime
+
+
+def load_model():
+    """Process-wide cached artifact, reloaded when the file on disk changes"""
+    global _artifact, _artifact_mtime
+
+    path = model_path()
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+    with _load_lock:
+        if _artifact is None or _artifact_mtime != mtime:
+            artifact = joblib.load(path, mmap_mode='r')
+            if artifact.get('schema_version') != FEATURE_SCHEMA_VERSION:
+                logger.warning('Ignoring performance model with schema version %s', artifact.get('schema_version'))
+                return None
+            _artifact = artifact
+            _artifact_mtime = mtime
+        return _artifact
+
+
+def stale_grade_count(artifact):
+    """Number of grades added, changed or removed since the artifact's watermark"""
+    if artifact['watermark'] is None:
+        changed = Q(pk__isnull=False)
+    else:
+        changed = Q(updated_at__gt=artifact['watermark'])
+    counts = Grade.objects.aggregate(total=Count('id'), changed=Count('id', filter=changed))
+    return counts['changed'] + max(0, artifact['grade_count'] - counts['total'])
+
+
+def refresh_in_background():
+    """Retrain on a daemon thread unless a refresh is already running in this process"""
+    if not _refresh_lock.acquire(blocking=False):
+        return False
+
+    def refresh():
+        try:
+            save_model(train_model())
+            logger.info('Performance model refreshed')
+        except Exception:
+            logger.exception('Performance model refresh failed')
+        finally:
+            connection.close()
+            _refresh_lock.release()
+
+    threading.Thread(target=refresh, name='performance-model-refresh', daemon=True).start()
+    return True
+
+
+def get_model():
+    """Artifact for inference, training it once if none has been saved yet.
+
+    A placeholder saved while there was too little data is replaced as soon as
+    there is enough, rather than after refresh_threshold() more grade changes.
+    """
+    artifact = load_model()
+    if artifact is None:
+        artifact = train_model()
+        save_model(artifact)
+    elif artifact['model'] is None:
+        if stale_grade_count(artifact) and has_training_data(feature_store()):
+            artifact = train_model()
+            save_model(artifact)
+    elif stale_grade_count(artifact) >= refresh_threshold():
+        refresh_in_background()
+    return artifact
+
+
+def predict(artifact, features):
+    """Predicted classes and confidences for a feature matrix, from one predict_proba call"""
+    probabilities = artifact['model'].predict_proba(artifact['scaler'].transform(features))
+    return artifact['model'].classes_[probabilities.argmax(axis=1)], probabilities.max(axis=1)
@@ -0,0 +1,65 @@
+"""
+Set-based recalculation of stored grades after a course's max_marks or grading
+scale changes.
+
+Each course is regraded with a single UPDATE whose Case/When expression applies
+the course's scale in the database, touching only the rows whose letter or GPA
+actually changes. The percentage is computed as (marks / max_marks) * 100 in
+floating point, exactly like Grade.save, so both paths agree on the boundaries.
+"""
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from .caching import invalidate_admin_dashboard_stats
+from .models import Course, Grade
+from .summaries import refresh_student_summaries
+
+
+def banding_expressions(course):
+    """(letter, gpa) Case expressions applying the course's scale to marks_obtained"""
+    scale = course.get_grading_scale()
+    percentage = F('marks_obtained') / Value(float(course.max_marks)) * Value(100.0)
+
+    # Highest band first, the lowest one is the default
+    bands = scale.bands[::-1]
+    letter = Case(
+        *[When(GreaterThanOrEqual(percentage, band['min']), then=Value(band['grade'])) for band in bands[:-1]],
+        default=Value(bands[-1]['grade']),
+    )
+    gpa = Case(
+        *[When(GreaterThanOrEqual(percentage, band['min']), then=Value(float(band['gpa']))) for band in bands[:-1]],
+        default=Value(float(bands[-1]['gpa'])),
+        output_field=FloatField(),
+    )
+    return letter, gpa
+
+
+def regrade_courses(courses=None):
+    """Recompute grade and GPA of every grade in the given courses (all when None).
+
+    Returns the number of grades whose letter or GPA changed. Student summaries
+    and the dashboard statistics are refreshed afterwards, since the UPDATE
+    bypasses the Grade signals.
+    """
+    if courses is None:
+        courses = Course.objects.all()
+
+    changed = 0
+    student_ids = set()
+    for course in courses:
+        letter, gpa = banding_expressions(course)
+        stale = (
+            Grade.objects.filter(course=course)
+            .alias(new_grade=letter, new_gpa=gpa)
+            .filter(~Q(grade=F('new_grade')) | ~Q(gpa=F('new_gpa')) | Q(gpa__isnull=True))
+        )
+        with transaction.atomic():
+            student_ids.update(stale.values_list('student_id', flat=True))
+            changed += stale.update(grade=letter, gpa=gpa, updated_at=timezone.now())
+
+    if changed:
+        refresh_student_summaries(student_ids)
+        invalidate_admin_dashboard_stats()
+    return changed
@@ -0,0 +1,28 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_admin_dashboard_stats
+from .models import Course, Grade, Student, Subject
+from .summaries import refresh_student_summaries
+
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def refresh_summary_on_grade_change(sender, instance, **kwargs):
+    # Deferred to commit so cascading deletes of the student are not undone
+    transaction.on_commit(partial(refresh_student_summaries, [instance.student_id]))
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def invalidate_dashboard_on_change(sender, **kwargs):
+    transaction.on_commit(invalidate_admin_dashboard_stats)
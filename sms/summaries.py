@@ -0,0 +1,101 @@
+"""
+Maintenance of the materialized StudentAcademicSummary rows.
+
+Summaries are refreshed per student from Grade post_save/post_delete signals,
+explicitly by the bulk import paths (bulk_create bypasses signals) and in full by
+``manage.py rebuild_academic_summaries``.
+"""
+from itertools import groupby
+
+from .models import Grade, Student, StudentAcademicSummary
+
+# Number of most recent grades compared against the older ones for the trend
+RECENT_GRADE_COUNT = 3
+
+# Students per query / bulk upsert
+SUMMARY_BATCH_SIZE = 500
+
+SUMMARY_FIELDS = [
+    'grade_count', 'failing_count', 'avg_gpa', 'first_gpa', 'latest_gpa',
+    'min_gpa', 'max_gpa', 'trend', 'latest_grade_id',
+]
+
+
+def summarize_grades(grades):
+    """Summary field values for one student's grades, given as (id, gpa, grade) tuples ordered by created_at"""
+    gpas = [gpa for _, gpa, _ in grades]
+    grade_count = len(gpas)
+
+    if grade_count == 0:
+        return {
+            'grade_count': 0,
+            'failing_count': 0,
+            'avg_gpa': None,
+            'first_gpa': None,
+            'latest_gpa': None,
+            'min_gpa': None,
+            'max_gpa': None,
+            'trend': 'Insufficient Data',
+            'latest_grade_id': None,
+        }
+
+    # Recent performance trend: last few grades against everything before them
+    if grade_count >= 2:
+        recent = gpas[-RECENT_GRADE_COUNT:]
+        older = gpas[:-RECENT_GRADE_COUNT]
+        if older:
+            trend = 'Improving' if sum(recent) / len(recent) > sum(older) / len(older) else 'Declining'
+        else:
+            trend = 'New Student'
+    else:
+        trend = 'Insufficient Data'
+
+    return {
+        'grade_count': grade_count,
+        'failing_count': sum(1 for _, _, letter in grades if letter == 'F'),
+        'avg_gpa': sum(gpas) / grade_count,
+        'first_gpa': gpas[0],
+        'latest_gpa': gpas[-1],
+        'min_gpa': min(gpas),
+        'max_gpa': max(gpas),
+        'trend': trend,
+        'latest_grade_id': grades[-1][0],
+    }
+
+
+def refresh_student_summaries(student_ids=None):
+    """Recompute the summaries of the given students (all students when None).
+
+    Ids of students that no longer exist are ignored. Returns the number of
+    summaries written.
+    """
+    if student_ids is None:
+        student_ids = Student.objects.order_by('id').values_list('id', flat=True)
+    student_ids = sorted(set(student_ids))
+
+    written = 0
+    for start in range(0, len(student_ids), SUMMARY_BATCH_SIZE):
+        batch_ids = Student.objects.filter(id__in=student_ids[start:start + SUMMARY_BATCH_SIZE]).order_by('id').values_list('id', flat=True)
+        grades = (
+            Grade.objects.filter(student_id__in=list(batch_ids))
+            .order_by('student_id', 'created_at', 'id')
+            .values_list('student_id', 'id', 'gpa', 'grade')
+        )
+        grades_by_student = {
+            student_id: [row[1:] for row in rows]
+            for student_id, rows in groupby(grades, key=lambda row: row[0])
+        }
+
+        summaries = [
+            StudentAcademicSummary(student_id=student_id, **summarize_grades(grades_by_student.get(student_id, [])))
+            for student_id in batch_ids
+        ]
+        StudentAcademicSummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=SUMMARY_FIELDS + ['updated_at'],
+        )
+        written += len(summaries)
+
+    return written
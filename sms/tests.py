@@ -1,3 +1,1598 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from importlib import import_module
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.signals import request_started
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Avg, Count
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from . import features, import_jobs, performance_model, urls, views
+from .caching import ADMIN_DASHBOARD_TIMEOUT, admin_dashboard_stats, student_dashboard_data
+from .grading import band_grades
+from .summaries import refresh_student_summaries
+from .instrumentation import RequestMetrics, request_timings
+from .management.commands.benchmark_startup import HEAVY_MODULES
+from .benchmark import benchmark_cases, benchmark_users, fetch, log_in, seed_benchmark_data
+from .models import User, Student, Department, Subject, Course, Grade, ImportJob, StudentAcademicSummary
+from .views import at_risk_queryset, filter_grades, grade_keyset_page, grade_listing_filters, monthly_grade_rollup
+
+# Tests train and save the performance model and store import files; keep them out of the project tree
+_tmp_dir = tempfile.TemporaryDirectory()
+_tmp_settings = override_settings(
+    PERFORMANCE_MODEL_PATH=os.path.join(_tmp_dir.name, 'performance_model.joblib'),
+    MEDIA_ROOT=_tmp_dir.name,
+)
+
+
+def setUpModule():
+    _tmp_settings.enable()
+    performance_model._artifact = None
+    # Would add its queries to whichever test makes the first request; ImportJobTests call it directly
+    request_started.disconnect(import_jobs.recover_import_jobs_on_first_request)
+
+
+def tearDownModule():
+    _tmp_settings.disable()
+    performance_model._artifact = None
+    _tmp_dir.cleanup()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked against SQLite')
+class IndexUsageTests(TestCase):
+    """The hot Grade/Student queries of the views must be served by the indexes in 0006"""
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', code='CS')
+        subject = Subject.objects.create(name='Algorithms', code='CS101', department=department)
+        course = Course.objects.create(subject=subject, year='1', semester='1', academic_year='2024-2025')
+        for number, marks in enumerate([95, 72, 30]):
+            user = User.objects.create_user(username=f'student{number}', password='student123')
+            student = Student.objects.create(user=user, student_id=f'CS{number}', department=department, enrollment_date=date(2024, 8, 1))
+            Grade.objects.create(student=student, course=course, marks_obtained=marks)
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertRegex(plan, rf'USING (COVERING )?INDEX {index_name}\b')
+
+    def test_grade_listing(self):
+        # manage_grades / grades_data / assignment_tracking keyset pages
+        self.assertUsesIndex(Grade.objects.all()[:51], 'grade_created_idx')
+        cursor = datetime(2030, 1, 1, tzinfo=dt_timezone.utc)
+        self.assertUsesIndex(Grade.objects.filter(created_at__lt=cursor)[:51], 'grade_created_idx')
+
+    def test_grade_listing_filtered_by_letter(self):
+        filters = grade_listing_filters({'grade': 'F'})
+        self.assertUsesIndex(filter_grades(Grade.objects.all(), filters)[:51], 'grade_letter_created_idx')
+
+    def test_course_grade_distribution(self):
+        rows = Grade.objects.values_list('course_id', 'grade').annotate(count=Count('id')).order_by()
+        self.assertUsesIndex(rows, 'grade_course_grade_idx')
+
+    def test_student_grade_history(self):
+        self.assertUsesIndex(Grade.objects.filter(student_id__in=[1, 2]).order_by('student_id', 'created_at', 'id'), 'grade_student_created_idx')
+
+    def test_month_range(self):
+        since = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        self.assertUsesIndex(monthly_grade_rollup().filter(created_at__gte=since), 'grade_created_idx')
+
+    def test_recent_and_active_students(self):
+        self.assertUsesIndex(Student.objects.order_by('-created_at')[:5], 'student_created_idx')
+        self.assertUsesIndex(Student.objects.filter(is_active=True), 'student_active_idx')
+        self.assertUsesIndex(at_risk_queryset(), 'student_active_idx')
+
+
+class GradeListingTests(TestCase):
+    """Keyset pages of manage_grades / grades_data / assignment_tracking"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', user_type='admin')
+        cs = Department.objects.create(name='Computer Science', code='CS')
+        ee = Department.objects.create(name='Electrical', code='EE')
+        cls.algorithms = Course.objects.create(
+            subject=Subject.objects.create(name='Algorithms', code='CS101', department=cs),
+            year='1', semester='1', academic_year='2024-2025',
+        )
+        circuits = Course.objects.create(
+            subject=Subject.objects.create(name='Circuits', code='EE101', department=ee),
+            year='1', semester='1', academic_year='2024-2025',
+        )
+        cls.departments = {'CS': cs, 'EE': ee}
+        students = []
+        for number, name in enumerate(['Ada', 'Alan', 'Grace', 'Linus']):
+            user = User.objects.create(username=name.lower(), first_name=name, last_name='Test', user_type='student')
+            students.append(Student.objects.create(user=user, student_id=f'S{number}', department=cs, enrollment_date=date(2024, 8, 1)))
+        for student, marks in zip(students, [95, 30, 72, 30]):
+            Grade.objects.create(student=student, course=cls.algorithms, marks_obtained=marks)
+            Grade.objects.create(student=student, course=circuits, marks_obtained=100 - marks)
+
+        # Three rows share a created_at, so the id must break the tie
+        base = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        for position, grade in enumerate(Grade.objects.order_by('id')):
+            Grade.objects.filter(pk=grade.pk).update(created_at=base + timedelta(days=min(position, 3)))
+
+    def expected_ids(self, grades=None):
+        grades = Grade.objects.all() if grades is None else grades
+        return list(grades.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def walk(self, grades, page_size):
+        seen, cursor = [], None
+        while True:
+            page, cursor = grade_keyset_page(grades, cursor, page_size=page_size)
+            seen += [grade.id for grade in page]
+            if cursor is None:
+                return seen
+
+    def test_every_grade_visited_once_in_order(self):
+        for page_size in (1, 2, 3, 8, 50):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(Grade.objects.all(), page_size), self.expected_ids())
+
+    def test_filters_apply_on_every_page(self):
+        cases = [
+            {'q': 'a'},
+            {'q': 'algo S1'},
+            {'course': str(self.algorithms.pk)},
+            {'department': str(self.departments['EE'].pk)},
+            {'grade': 'F'},
+            {'department': str(self.departments['CS'].pk), 'grade': 'F'},
+        ]
+        for params in cases:
+            filters = grade_listing_filters(params)
+            with self.subTest(**params):
+                expected = self.expected_ids(filter_grades(Grade.objects.all(), filters))
+                self.assertTrue(expected)
+                self.assertEqual(self.walk(filter_grades(Grade.objects.all(), filters), 1), expected)
+
+    def test_bad_cursor_starts_from_the_newest(self):
+        first_page = self.expected_ids()[:2]
+        for cursor in ('', 'garbage', '1.2.3', 'x.1', '99999999999999999999999.1'):
+            with self.subTest(cursor=cursor):
+                page, _ = grade_keyset_page(Grade.objects.all(), cursor, page_size=2)
+                self.assertEqual([grade.id for grade in page], first_page)
+
+    def test_grades_data(self):
+        self.client.force_login(self.admin)
+        url = reverse('sms:grades_data')
+        expected = self.expected_ids(Grade.objects.filter(grade='F'))
+
+        with mock.patch.object(views, 'GRADE_PAGE_SIZE', 1):
+            data = self.client.get(url, {'grade': 'F'}).json()
+            ids = [row['id'] for row in data['grades']]
+            while data['next_cursor']:
+                data = self.client.get(url, {'grade': 'F', 'after': data['next_cursor']}).json()
+                ids += [row['id'] for row in data['grades']]
+        self.assertEqual(ids, expected)
+
+        data = self.client.get(url, {'grade': 'F'}).json()
+        self.assertIsNone(data['next_cursor'])
+        grade = Grade.objects.select_related('student__user', 'course__subject__department').get(pk=expected[0])
+        self.assertEqual(data['grades'][0], {
+            'id': grade.id,
+            'student_id': grade.student.student_id,
+            'student_name': grade.student.user.get_full_name(),
+            'course': grade.course.subject.name,
+            'department': grade.course.subject.department.name,
+            'marks_obtained': grade.marks_obtained,
+            'max_marks': 100,
+            'grade': 'F',
+            'gpa': 0.0,
+            'exam_date': None,
+            'edit_url': reverse('sms:edit_grade', args=[grade.id]),
+            'delete_url': reverse('sms:delete_grade', args=[grade.id]),
+        })
+
+    def test_pages_keep_filters_in_next_link(self):
+        self.client.force_login(self.admin)
+        department = str(self.departments['CS'].pk)
+        for name in ('sms:manage_grades', 'sms:assignment_tracking'):
+            with self.subTest(view=name), mock.patch.object(views, 'GRADE_PAGE_SIZE', 1):
+                response = self.client.get(reverse(name), {'department': department, 'course': '1&x=<2>'})
+                listed = response.context['grades' if name == 'sms:manage_grades' else 'assignments']
+                self.assertEqual([grade.id for grade in listed], self.expected_ids(Grade.objects.filter(course__subject__department=department))[:1])
+                self.assertContains(response, f'?course=1%26x%3D%3C2%3E&department={department}&grade=&after={response.context["next_cursor"]}"')
+
+                second = self.client.get(reverse(name), {'department': department, 'after': response.context['next_cursor']})
+                listed = second.context['grades' if name == 'sms:manage_grades' else 'assignments']
+                self.assertEqual([grade.id for grade in listed], self.expected_ids(Grade.objects.filter(course__subject__department=department))[1:2])
+
+
+class AtRiskStudentsTests(TestCase):
+    """The server-side at-risk ranking matches the per-student rules it replaced"""
+
+    STUDENTS = 40
+    # Critical, high, medium and safe students, with ties in average GPA
+    MARKS = [
+        (30, 30, 90), (30, 85, 90), (45, 45, 45), (45, 55, 45), (30, 45, 45),
+        (95, 95, 95), (65, 45, 42), (30, 30, 30), (35, 72, 61), (55, 55, 45),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', user_type='admin')
+        department = Department.objects.create(name='Computer Science', code='CS')
+        courses = [
+            Course.objects.create(
+                subject=Subject.objects.create(name=f'Subject {number}', code=f'CS10{number}', department=department),
+                year='1', semester='1', academic_year='2024-2025',
+            )
+            for number in range(3)
+        ]
+        for number in range(cls.STUDENTS + 2):
+            user = User.objects.create(username=f'student{number}', first_name=f'Name{number * 7 % 30:02d}', last_name='Test', user_type='student')
+            student = Student.objects.create(
+                user=user, student_id=f'S{number:02d}', department=department, enrollment_date=date(2024, 8, 1),
+                # Never listed: one inactive, one without grades
+                is_active=number != cls.STUDENTS,
+            )
+            if number == cls.STUDENTS + 1:
+                continue
+            for course, marks in zip(courses, cls.MARKS[number % len(cls.MARKS)]):
+                Grade.objects.create(student=student, course=course, marks_obtained=marks)
+        refresh_student_summaries()
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def expected_rows(self):
+        """The former view's rules, applied student by student to the grades"""
+        rows = []
+        for student in Student.objects.filter(is_active=True).select_related('user'):
+            grades = list(Grade.objects.filter(student=student))
+            if not grades:
+                continue
+            gpas = [grade.gpa for grade in grades]
+            avg_gpa = sum(gpas) / len(gpas)
+            failing = sum(1 for grade in grades if grade.grade == 'F')
+            if not (avg_gpa < 2.5 or failing > 0 or failing / len(gpas) > 0.3):
+                continue
+            if avg_gpa < 1.5 or failing >= 2:
+                risk = 'Critical'
+            elif avg_gpa < 2.0 or failing >= 1:
+                risk = 'High'
+            else:
+                risk = 'Medium'
+            rows.append({
+                'student_id': student.student_id, 'name': (student.user.first_name, student.user.last_name),
+                'risk': risk, 'avg_gpa': avg_gpa, 'failing': failing,
+            })
+        return rows
+
+    def listed(self, **params):
+        response = self.client.get(reverse('sms:at_risk_students'), params)
+        return response, [row['student'].student_id for row in response.context['at_risk_students']]
+
+    def all_pages(self, **params):
+        response, ids = self.listed(**params)
+        for page in range(2, response.context['page_obj'].paginator.num_pages + 1):
+            ids += self.listed(page=page, **params)[1]
+        return ids
+
+    def test_risk_levels_and_counts(self):
+        expected = self.expected_rows()
+        levels = {'Critical': 0, 'High': 0, 'Medium': 0}
+        for row in expected:
+            levels[row['risk']] += 1
+        self.assertTrue(all(levels.values()))
+
+        response, _ = self.listed()
+        self.assertEqual(
+            [response.context[key] for key in ('total_at_risk', 'critical_count', 'high_count', 'medium_count')],
+            [len(expected), levels['Critical'], levels['High'], levels['Medium']],
+        )
+        for risk in levels:
+            with self.subTest(risk=risk):
+                rows = self.listed(risk=risk)[0].context['at_risk_students']
+                self.assertTrue(all(row['risk_level'] == risk for row in rows))
+                self.assertEqual(
+                    sorted(row['student'].student_id for row in rows),
+                    sorted(row['student_id'] for row in expected if row['risk'] == risk),
+                )
+        # Unknown levels list everyone
+        self.assertEqual(self.listed(risk='Unknown')[0].context['risk_filter'], '')
+
+    def test_sort_orders(self):
+        expected = self.expected_rows()
+        rank = {'Critical': 0, 'High': 1, 'Medium': 2}
+        keys = {
+            'risk': lambda row: (rank[row['risk']], row['avg_gpa'], row['student_id']),
+            'gpa': lambda row: (row['avg_gpa'], row['student_id']),
+            '-gpa': lambda row: (-row['avg_gpa'], row['student_id']),
+            'failing': lambda row: (-row['failing'], row['avg_gpa'], row['student_id']),
+            'student_id': lambda row: row['student_id'],
+            'name': lambda row: (row['name'], row['student_id']),
+        }
+        for sort, key in keys.items():
+            with self.subTest(sort=sort):
+                self.assertEqual(self.all_pages(sort=sort), [row['student_id'] for row in sorted(expected, key=key)])
+        # Unknown sorts fall back to the risk order
+        self.assertEqual(self.all_pages(sort='bogus'), self.all_pages(sort='risk'))
+
+    def test_pages(self):
+        expected = self.all_pages()
+        self.assertGreater(len(expected), views.AT_RISK_PAGE_SIZE)
+
+        response, first = self.listed()
+        self.assertEqual(first, expected[:views.AT_RISK_PAGE_SIZE])
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+        self.assertEqual(self.listed(page=2)[1], expected[views.AT_RISK_PAGE_SIZE:])
+        self.assertEqual(len(set(expected)), len(expected))
+        # Out of range and malformed page numbers, as Paginator.get_page handles them
+        self.assertEqual(self.listed(page=99)[1], expected[views.AT_RISK_PAGE_SIZE:])
+        self.assertEqual(self.listed(page='x')[1], first)
+
+
+class DataExportTests(TestCase):
+    """The streamed CSV exports carry the columns and values of the original exports"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', user_type='admin')
+        department = Department.objects.create(name='Computer Science', code='CS')
+        courses = [
+            Course.objects.create(
+                subject=Subject.objects.create(name=f'Subject {number}', code=f'CS10{number}', department=department),
+                year='1', semester='1', academic_year='2024-2025', max_marks=max_marks,
+            )
+            for number, max_marks in enumerate((100, 50, 100))
+        ]
+        marks_by_student = [(95, 45, 88), (30, 20, 70), (45, 25), (55,), (30,), ()]
+        for number, marks in enumerate(marks_by_student):
+            user = User.objects.create(
+                username=f'student{number}', first_name=f'First{number}', last_name='Last' if number % 2 else '',
+                email=f'student{number}@example.com', phone='555-0100' if number % 3 == 0 else None, user_type='student',
+            )
+            student = Student.objects.create(
+                user=user, student_id=f'S{number}', department=department, year=str(number % 4 + 1),
+                enrollment_date=date(2024, 8, 1), is_active=number != 4,
+            )
+            for course, mark in zip(courses, marks):
+                Grade.objects.create(
+                    student=student, course=course, marks_obtained=mark,
+                    exam_date=date(2024, 12, 1) if mark > 40 else None,
+                )
+        refresh_student_summaries()
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def export(self, export_type):
+        response = self.client.get(reverse('sms:data_export'), {'type': export_type})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        return response, list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def as_csv(self, rows):
+        # The values as the original exports wrote them through csv.writer
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return list(csv.reader(io.StringIO(buffer.getvalue())))
+
+    def test_students(self):
+        response, rows = self.export('students')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="students_export.csv"')
+        self.assertEqual(rows[0], ['Student ID', 'Name', 'Email', 'Department', 'Year', 'Phone', 'Enrollment Date', 'Status'])
+        self.assertEqual(rows[1:], self.as_csv([
+            [
+                student.student_id, student.user.get_full_name(), student.user.email, student.department.name,
+                student.get_year_display(), student.user.phone or 'N/A', student.enrollment_date,
+                'Active' if student.is_active else 'Inactive',
+            ]
+            for student in Student.objects.select_related('user', 'department').all()
+        ]))
+        self.assertEqual(len(rows), 7)
+
+    def test_grades(self):
+        response, rows = self.export('grades')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="grades_export.csv"')
+        self.assertEqual(rows[0], ['Student ID', 'Student Name', 'Course', 'Subject Code', 'Marks Obtained', 'Max Marks', 'Grade', 'GPA', 'Exam Date'])
+        self.assertEqual(rows[1:], self.as_csv([
+            [
+                grade.student.student_id, grade.student.user.get_full_name(), grade.course.subject.name,
+                grade.course.subject.code, grade.marks_obtained, grade.course.max_marks, grade.grade, grade.gpa,
+                grade.exam_date or 'N/A',
+            ]
+            for grade in Grade.objects.select_related('student__user', 'course__subject').all()
+        ]))
+        self.assertEqual(len(rows), 11)
+
+    def expected_performance(self):
+        """The original per-student export, computed from the grades themselves"""
+        expected = []
+        for student in Student.objects.select_related('user', 'department').filter(is_active=True):
+            grades = Grade.objects.filter(student=student)
+            if not grades.exists():
+                continue
+            avg_gpa = grades.aggregate(avg_gpa=Avg('gpa'))['avg_gpa']
+            failing_grades = grades.filter(grade='F').count()
+            if avg_gpa < 2.0 or failing_grades > 0:
+                risk_level = 'High'
+            elif avg_gpa < 2.5:
+                risk_level = 'Medium'
+            else:
+                risk_level = 'Low'
+            expected.append([
+                student.student_id, student.user.get_full_name(), student.department.name,
+                round(avg_gpa, 2), grades.count(), failing_grades, risk_level,
+            ])
+        return self.as_csv(expected)
+
+    def test_performance(self):
+        response, rows = self.export('performance')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="performance_analysis.csv"')
+        self.assertEqual(rows[0], ['Student ID', 'Student Name', 'Department', 'Average GPA', 'Total Grades', 'Failing Grades', 'Risk Level'])
+        self.assertEqual(rows[1:], self.expected_performance())
+        # Every risk level, and no row for the inactive student or the one without grades
+        self.assertEqual([row[0] for row in rows[1:]], ['S0', 'S1', 'S2', 'S3'])
+        self.assertEqual({row[6] for row in rows[1:]}, {'High', 'Medium', 'Low'})
+
+        # Follows grade changes through the summaries
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.filter(student__student_id='S3').get().delete()
+        self.assertEqual(self.export('performance')[1][1:], self.expected_performance())
+
+
+class CourseAnalysisTests(TestCase):
+    """The grouped course statistics match the per-course aggregates they replaced"""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_benchmark_data(students=12, grades=60, subjects_per_department=2, seed=11)
+        cls.admin = benchmark_users()['admin']
+        subject = Subject.objects.create(name='Ungraded', code='UG100', department=Department.objects.first())
+        cls.ungraded = Course.objects.create(subject=subject, year='1', semester='1', academic_year='2024-2025')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def expected(self):
+        """{course_id: stats} computed per course, the way the original view did"""
+        expected = {}
+        for course in Course.objects.all():
+            grades = Grade.objects.filter(course=course)
+            if not grades.exists():
+                continue
+            distribution = {}
+            for grade in grades:
+                distribution[grade.grade] = distribution.get(grade.grade, 0) + 1
+            expected[course.id] = {
+                'avg_marks': grades.aggregate(avg_marks=Avg('marks_obtained'))['avg_marks'],
+                'avg_gpa': grades.aggregate(avg_gpa=Avg('gpa'))['avg_gpa'],
+                'total_students': grades.count(),
+                'grade_distribution': distribution,
+            }
+        return expected
+
+    def test_course_grade_stats(self):
+        expected = self.expected()
+        stats = views.course_grade_stats()
+        self.assertEqual(stats.keys(), expected.keys())
+        self.assertNotIn(self.ungraded.id, stats)
+        for course_id, course_stats in stats.items():
+            with self.subTest(course_id=course_id):
+                self.assertAlmostEqual(float(course_stats['avg_marks']), float(expected[course_id]['avg_marks']))
+                self.assertAlmostEqual(course_stats['avg_gpa'], expected[course_id]['avg_gpa'])
+                self.assertEqual(course_stats['total_students'], expected[course_id]['total_students'])
+                self.assertEqual(course_stats['grade_distribution'], expected[course_id]['grade_distribution'])
+
+    def test_course_analysis(self):
+        expected = self.expected()
+        course_data = self.client.get(reverse('sms:course_analysis')).context['course_data']
+        self.assertEqual([row['course'].id for row in course_data], [
+            course.id for course in Course.objects.all() if course.id in expected
+        ])
+        for row in course_data:
+            with self.subTest(course=row['course'].id):
+                course_stats = expected[row['course'].id]
+                self.assertEqual(row['avg_marks'], round(course_stats['avg_marks'], 2))
+                self.assertEqual(row['avg_gpa'], round(course_stats['avg_gpa'], 2))
+                self.assertEqual(row['total_students'], course_stats['total_students'])
+                self.assertEqual(row['grade_distribution'], course_stats['grade_distribution'])
+
+    def test_course_analysis_data(self):
+        expected = self.expected()
+        courses = self.client.get(reverse('sms:course_analysis_data')).json()['courses']
+        graded = [course for course in Course.objects.select_related('subject') if course.id in expected]
+        self.assertEqual(
+            [(course['course_name'], course['max_marks']) for course in courses],
+            [(course.subject.name, course.max_marks) for course in graded],
+        )
+        for row, course in zip(courses, graded):
+            self.assertAlmostEqual(row['avg_marks'], float(expected[course.id]['avg_marks']))
+        self.assertNotIn('Ungraded', [course['course_name'] for course in courses])
+
+
+class PerformanceTrendsTests(TestCase):
+    """The monthly rollup gives the months, averages, student counts and trends of the original loop"""
+
+    # (month, student, marks) with the student's department taken from its position
+    GRADES = [
+        (1, 0, 95), (1, 1, 95),
+        (2, 0, 30), (2, 0, 95),
+        (3, 1, 30), (3, 1, 95),
+        (4, 0, 95),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', user_type='admin')
+        departments = [
+            Department.objects.create(name=name, code=code)
+            for name, code in (('Computer Science', 'CS'), ('Mathematics', 'MA'), ('Physics', 'PH'))
+        ]
+        students = [
+            Student.objects.create(
+                user=User.objects.create(username=f'student{number}', user_type='student'),
+                student_id=f'S{number}', department=department, year='1', enrollment_date=date(2024, 1, 1),
+            )
+            for number, department in enumerate(departments[:2])
+        ]
+        for number, (month, student, marks) in enumerate(cls.GRADES):
+            course = Course.objects.create(
+                subject=Subject.objects.create(name=f'Subject {number}', code=f'SUB{number}', department=departments[0]),
+                year='1', semester='1', academic_year='2024-2025',
+            )
+            grade = Grade.objects.create(student=students[student], course=course, marks_obtained=marks)
+            Grade.objects.filter(pk=grade.pk).update(created_at=datetime(2024, month, 15, 12, tzinfo=dt_timezone.utc))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_monthly_grade_rollup(self):
+        self.assertEqual(Grade.objects.filter(marks_obtained=95).values_list('gpa', flat=True).distinct().get(), 4.0)
+        self.assertEqual(Grade.objects.filter(marks_obtained=30).values_list('gpa', flat=True).distinct().get(), 0.0)
+        self.assertEqual(
+            [(row['month'].strftime('%Y-%m'), row['avg_gpa'], row['grade_count'], row['student_count']) for row in monthly_grade_rollup()],
+            [('2024-01', 4.0, 2, 2), ('2024-02', 2.0, 2, 1), ('2024-03', 2.0, 2, 1), ('2024-04', 4.0, 1, 1)],
+        )
+
+    def test_performance_trends(self):
+        context = self.client.get(reverse('sms:performance_trends')).context
+        self.assertEqual(
+            [(row['month'], row['avg_gpa'], row['student_count'], row['grade_count'], row['trend'], row['trend_class']) for row in context['trend_data']],
+            [
+                ('2024-01', 4.0, 2, 2, '— N/A', 'muted'),
+                ('2024-02', 2.0, 1, 2, '↘️ Declining', 'danger'),
+                ('2024-03', 2.0, 1, 2, '→ Stable', 'info'),
+                ('2024-04', 4.0, 1, 1, '↗️ Improving', 'success'),
+            ],
+        )
+        self.assertEqual(context['total_grades'], len(self.GRADES))
+        self.assertEqual(context['latest_avg_gpa'], 4.0)
+        self.assertEqual(context['total_departments'], 3)
+        # By the student's department, with the department that has no grades still listed at 0
+        self.assertEqual(context['dept_data'], [
+            {'department': 'Computer Science', 'avg_gpa': 3.0, 'student_count': 4},
+            {'department': 'Mathematics', 'avg_gpa': 2.67, 'student_count': 3},
+            {'department': 'Physics', 'avg_gpa': 0, 'student_count': 0},
+        ])
+
+    def test_performance_trends_data(self):
+        response = self.client.get(reverse('sms:performance_trends_data'))
+        self.assertEqual(response.json(), {
+            'months': ['2024-01', '2024-02', '2024-03', '2024-04'],
+            'avg_gpas': [4.0, 2.0, 2.0, 4.0],
+        })
+
+
+class ViewQueryCountTests(TestCase):
+    """Query ceilings for every sms URL; raise one only together with the view change that needs it"""
+
+    # Measured with a cold cache; none of them depend on the number of rows
+    QUERY_COUNTS = {
+        'login': 0,
+        'admin_dashboard': 8,
+        'manage_students': 4,
+        'get_student_details': 6,
+        'add_student': 3,
+        'edit_student': 6,
+        'delete_student': 5,
+        'manage_grades': 6,
+        'grades_data': 3,
+        'add_grade': 4,
+        'edit_grade': 7,
+        'delete_grade': 8,
+        'student_dashboard': 7,
+        'student_performance': 4,
+        'course_analysis': 4,
+        'course_analysis_data': 5,
+        'course_analysis_data_detail': 5,
+        'performance_trends': 5,
+        'performance_trends_data': 4,
+        'import_csv_data': 2,
+        'import_job_status': 3,
+        'at_risk_students': 5,
+        'admin_panel': 2,
+        'request_timings': 2,
+        'assignment_tracking': 6,
+        'data_export': 6,
+        'export_students': 3,
+        'export_grades': 3,
+        'export_performance': 3,
+        'logout': 4,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_benchmark_data(students=40, grades=200, subjects_per_department=3, seed=1)
+        ImportJob.objects.create(import_type='grades', original_name='grades.csv', status='completed')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_url_is_benchmarked(self):
+        url_names = {pattern.name for pattern in urls.urlpatterns if isinstance(pattern, URLPattern)}
+        case_names = {case.name for case in benchmark_cases()}
+        self.assertLessEqual(url_names, case_names)
+
+    def test_query_counts(self):
+        users = benchmark_users()
+        for case in benchmark_cases():
+            with self.subTest(case.name):
+                log_in(self.client, users[case.role])
+                cache.clear()
+                with self.assertNumQueries(self.QUERY_COUNTS[case.name]):
+                    response = fetch(self.client, case)
+                self.assertEqual(response.status_code, case.expected_status)
+
+
+@override_settings(
+    SMS_REQUEST_TIMING=True,
+    TEMPLATES=[{**settings.TEMPLATES[0], 'BACKEND': 'sms.instrumentation.TimedDjangoTemplates'}],
+)
+class RequestTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_benchmark_data(students=10, grades=30, subjects_per_department=2, seed=2)
+        cls.admin = benchmark_users()['admin']
+        cls.student_user = benchmark_users()['student']
+
+    def setUp(self):
+        request_timings.clear()
+        self.client.force_login(self.admin)
+
+    def test_server_timing_header_and_log_line(self):
+        with self.assertLogs('sms.requests', 'INFO') as logs:
+            response = self.client.get(reverse('sms:admin_dashboard'))
+
+        self.assertRegex(response['Server-Timing'], r'^sql;dur=[\d.]+;desc="\d+ queries, 0 repeated", tpl;dur=[\d.]+, view;dur=[\d.]+$')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'sms:admin_dashboard')
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+
+    def test_repeated_statements(self):
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            for student in Student.objects.order_by('pk')[:3]:
+                Grade.objects.filter(student=student).count()
+        self.assertEqual(metrics.queries, 4)
+        self.assertEqual(len(metrics.repeated()), 1)
+        self.assertEqual(metrics.repeated()[0][1], 3)
+
+    def test_percentiles_are_staff_only(self):
+        with self.assertLogs('sms.requests', 'INFO'):
+            for _ in range(3):
+                self.client.get(reverse('sms:manage_grades'))
+            response = self.client.get(reverse('sms:request_timings'))
+            stats = response.json()['views']['sms:manage_grades']
+            self.assertEqual(stats['count'], 3)
+            self.assertLessEqual(stats['view_ms']['p50'], stats['view_ms']['p99'])
+
+            self.client.force_login(self.student_user)
+            self.assertEqual(self.client.get(reverse('sms:request_timings')).status_code, 403)
+
+
+class SqliteSettingsTests(SimpleTestCase):
+    """New connections get the pragmas from settings.SQLITE_PRAGMAS"""
+
+    def test_connection_pragmas(self):
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+
+        pragmas = dict(pragma.split('=') for pragma in settings.SQLITE_PRAGMAS)
+        # A file database: the in-memory test database cannot use WAL
+        with tempfile.TemporaryDirectory() as directory:
+            database = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(directory, 'db.sqlite3')}, alias='pragmas')
+            try:
+                with database.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], pragmas['journal_mode'].lower())
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], int(pragmas['busy_timeout']))
+            finally:
+                database.close()
+
+
+class StartupImportTests(SimpleTestCase):
+    def test_views_do_not_load_analytics_libraries(self):
+        # A fresh interpreter, since this one already imported them for the other tests
+        probe = f'import sys, django; django.setup(); import sms.urls; print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])'
+        result = subprocess.run([sys.executable, '-c', probe], cwd=settings.BASE_DIR, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '')
+
+
+class AsyncEndpointTests(TestCase):
+    """The async JSON endpoints, served through the ASGI request path"""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_benchmark_data(students=10, grades=30, subjects_per_department=2, seed=3)
+        cls.users = benchmark_users()
+        cls.student = Student.objects.get(user=cls.users['student'])
+        cls.course = Course.objects.filter(grades__isnull=False).order_by('pk').first()
+
+    async def test_admin_endpoints(self):
+        await self.async_client.aforce_login(self.users['admin'])
+
+        response = await self.async_client.get(reverse('sms:get_student_details', args=[self.student.pk]))
+        details = response.json()['student']
+        self.assertEqual(details['total_grades'], await Grade.objects.filter(student=self.student).acount())
+        self.assertEqual(sum(details['grade_counts'].values()), details['total_grades'])
+        response = await self.async_client.get(reverse('sms:get_student_details', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+        response = await self.async_client.get(reverse('sms:course_analysis_data'), {'course_id': self.course.pk})
+        self.assertEqual(len(response.json()['marks']), await self.course.grades.acount())
+        response = await self.async_client.get(reverse('sms:course_analysis_data'), {'course_id': 0})
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(reverse('sms:course_analysis_data'))
+        self.assertEqual(len(response.json()['courses']), await Course.objects.filter(grades__isnull=False).distinct().acount())
+
+        response = await self.async_client.get(reverse('sms:performance_trends_data'))
+        self.assertEqual(len(response.json()['months']), await monthly_grade_rollup().acount())
+
+    async def test_student_performance(self):
+        await self.async_client.aforce_login(self.users['student'])
+        response = await self.async_client.get(reverse('sms:student_performance'))
+        self.assertEqual(len(response.json()['marks']), await Grade.objects.filter(student=self.student).acount())
+
+        await self.async_client.aforce_login(self.users['admin'])
+        response = await self.async_client.get(reverse('sms:student_performance'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_conditional_get(self):
+        """Repeat loads are answered with 304 after the session, the user and one version query"""
+        self.client.force_login(self.users['admin'])
+        urls = [
+            reverse('sms:course_analysis_data'),
+            f"{reverse('sms:course_analysis_data')}?course_id={self.course.pk}",
+            reverse('sms:performance_trends_data'),
+        ]
+        etags = {}
+        for url in urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('no-cache', response['Cache-Control'])
+            # Deletions do not move the latest updated_at, so only the ETag validates
+            self.assertFalse(response.has_header('Last-Modified'))
+            etags[url] = response['ETag']
+
+            with self.assertNumQueries(3):
+                response = self.client.get(url, headers={'if-none-match': etags[url]})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response['ETag'], etags[url])
+
+        grade = self.course.grades.first()
+        grade.marks_obtained = 100 - grade.marks_obtained
+        grade.save()
+        for url in urls:
+            response = self.client.get(url, headers={'if-none-match': etags[url]})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etags[url])
+            etags[url] = response['ETag']
+
+        grade.delete()
+        for url in urls:
+            response = self.client.get(url, headers={'if-none-match': etags[url]})
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get(url, headers={'if-modified-since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+            self.assertEqual(response.status_code, 200)
+
+        self.client.force_login(self.users['student'])
+        url = reverse('sms:student_performance')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+
+class AcademicSummaryTests(TestCase):
+    """StudentAcademicSummary follows grade saves and deletes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', code='CS')
+        cls.courses = [
+            Course.objects.create(
+                subject=Subject.objects.create(name=f'Subject {code}', code=code, department=department),
+                year='1', semester='1', academic_year='2024-2025',
+            )
+            for code in ('CS101', 'CS102')
+        ]
+        user = User.objects.create(username='student', user_type='student')
+        cls.student = Student.objects.create(user=user, student_id='CS1', department=department, enrollment_date=date(2024, 8, 1))
+
+    def summary(self):
+        return StudentAcademicSummary.objects.get(student=self.student)
+
+    def test_refreshed_on_save_and_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = Grade.objects.create(student=self.student, course=self.courses[0], marks_obtained=85)
+        summary = self.summary()
+        self.assertEqual((summary.grade_count, summary.avg_gpa, summary.failing_count, summary.trend), (1, 3.7, 0, 'Insufficient Data'))
+        self.assertEqual(summary.latest_grade_id, first.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second = Grade.objects.create(student=self.student, course=self.courses[1], marks_obtained=30)
+        summary = self.summary()
+        self.assertEqual((summary.grade_count, summary.avg_gpa, summary.failing_count, summary.trend), (2, 3.7 / 2, 1, 'New Student'))
+        self.assertEqual((summary.min_gpa, summary.max_gpa, summary.latest_grade_id), (0.0, 3.7, second.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.marks_obtained = 65
+            second.save()
+        summary = self.summary()
+        self.assertEqual((summary.avg_gpa, summary.failing_count), ((3.7 + 3.0) / 2, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        summary = self.summary()
+        self.assertEqual((summary.grade_count, summary.avg_gpa, summary.latest_grade_id), (1, 3.0, second.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        summary = self.summary()
+        self.assertEqual((summary.grade_count, summary.avg_gpa, summary.trend, summary.latest_grade_id), (0, None, 'Insufficient Data', None))
+
+    def test_migration_populates_the_same_summaries(self):
+        from django.apps import apps
+
+        for course, marks in zip(self.courses, (85, 30)):
+            Grade.objects.create(student=self.student, course=course, marks_obtained=marks)
+        refresh_student_summaries()
+        expected = list(StudentAcademicSummary.objects.values())
+
+        StudentAcademicSummary.objects.all().delete()
+        import_module('sms.migrations.0002_studentacademicsummary').populate_summaries(apps, None)
+        populated = list(StudentAcademicSummary.objects.values())
+        for row in expected + populated:
+            del row['updated_at']
+        self.assertEqual(populated, expected)
+
+
+class AdminDashboardStatsTests(TestCase):
+    """Admin dashboard counters are cached until a write commits, and for at most ADMIN_DASHBOARD_TIMEOUT"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Computer Science', code='CS')
+        subject = Subject.objects.create(name='Algorithms', code='CS101', department=cls.department)
+        cls.course = Course.objects.create(subject=subject, year='1', semester='1', academic_year='2024-2025')
+        user = User.objects.create(username='student', user_type='student')
+        cls.student = Student.objects.create(user=user, student_id='CS1', department=cls.department, enrollment_date=date(2024, 8, 1))
+        cls.grade = Grade.objects.create(student=cls.student, course=cls.course, marks_obtained=80)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_until_a_write_commits(self):
+        stats = admin_dashboard_stats()
+        self.assertEqual((stats['total_grades'], stats['failing_grades'], stats['total_students']), (1, 0, 1))
+        with self.assertNumQueries(0):
+            self.assertEqual(admin_dashboard_stats(), stats)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grade.marks_obtained = 30
+            self.grade.save()
+        self.assertEqual(admin_dashboard_stats()['failing_grades'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grade.delete()
+        self.assertEqual(admin_dashboard_stats()['total_grades'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.create(username='student2', user_type='student')
+            Student.objects.create(user=user, student_id='CS2', department=self.department, enrollment_date=date(2024, 8, 1))
+        self.assertEqual(admin_dashboard_stats()['total_students'], 2)
+
+    def test_writes_not_seen_by_this_process_expire(self):
+        self.assertEqual(admin_dashboard_stats()['failing_grades'], 0)
+        # Like a write committed by another worker: no signal reaches this cache
+        Grade.objects.filter(pk=self.grade.pk).update(grade='F')
+        self.assertEqual(admin_dashboard_stats()['failing_grades'], 0)
+
+        with mock.patch('time.time', return_value=time.time() + ADMIN_DASHBOARD_TIMEOUT + 1):
+            self.assertEqual(admin_dashboard_stats()['failing_grades'], 1)
+
+
+class StudentDashboardCacheTests(TestCase):
+    """Each student's dashboard is cached until their grades, courses, subjects or summary change"""
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', code='CS')
+        cls.subject = Subject.objects.create(name='Algorithms', code='CS101', department=department)
+        course = Course.objects.create(subject=cls.subject, year='1', semester='1', academic_year='2024-2025')
+        cls.user = User.objects.create_user(username='student', password='student123', user_type='student')
+        student = Student.objects.create(user=cls.user, student_id='CS1', department=department, enrollment_date=date(2024, 8, 1))
+        cls.grade = Grade.objects.create(student=student, course=course, marks_obtained=80)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def dashboard(self):
+        return self.client.get(reverse('sms:student_dashboard')).content.decode()
+
+    def test_dashboard_cached_until_grades_change(self):
+        self.assertIn('80.0/100', self.dashboard())
+        # Session, user, student profile, department and the version aggregate
+        with self.assertNumQueries(5):
+            self.assertIn('80.0/100', self.dashboard())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grade.marks_obtained = 30
+            self.grade.save()
+        content = self.dashboard()
+        self.assertIn('30.0/100', content)
+        self.assertIn('Academic Alert', content)
+
+        # The bulk import bypasses the Grade signals
+        import pandas as pd
+        from .csv_imports import import_grades_pandas
+        import_grades_pandas(pd.DataFrame([{'student_id': 'CS1', 'course_code': 'CS101', 'marks_obtained': 95}]))
+        self.assertIn('95.0/100', self.dashboard())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject.name = 'Advanced Algorithms'
+            self.subject.save()
+        self.assertIn('Advanced Algorithms', self.dashboard())
+
+    def test_writes_from_other_processes_reach_the_dashboard(self):
+        self.assertIn('80.0/100', self.dashboard())
+        # Like a write committed by another worker: no signal reaches this cache
+        Grade.objects.filter(pk=self.grade.pk).update(marks_obtained=55, updated_at=timezone.now())
+        self.assertIn('55.0/100', self.dashboard())
+
+        Grade.objects.filter(pk=self.grade.pk)._raw_delete(connection.alias)
+        self.assertNotIn('55.0/100', self.dashboard())
+
+    def test_performance_payload_cached_per_version(self):
+        url = reverse('sms:student_performance')
+        self.assertEqual(self.client.get(url).json()['marks'], [80.0])
+        # Session, user and the version query
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(url).json()['marks'], [80.0])
+
+        self.grade.marks_obtained = 60
+        self.grade.save()
+        self.assertEqual(self.client.get(url).json()['marks'], [60.0])
+
+
+class GradeImporterParityTests(TestCase):
+    """import_grades_pandas imports what the row-by-row import_grades_csv did"""
+
+    CSV = (
+        'student_id,course_code,marks_obtained,exam_date\n'
+        'CS1,CS101,85,2024-12-01\n'
+        'NOPE,CS101,70,2024-12-01\n'
+        'CS2,CS101,abc,2024-12-01\n'
+        'CS2,CS102,55,2024-12-02\n'
+        'CS1,CS101,45,2024-12-03\n'
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', code='CS')
+        for code in ('CS101', 'CS102'):
+            subject = Subject.objects.create(name=f'Subject {code}', code=code, department=department)
+            Course.objects.create(subject=subject, year='1', semester='1', academic_year='2024-2025')
+        for student_id in ('CS1', 'CS2'):
+            user = User.objects.create(username=student_id, user_type='student')
+            Student.objects.create(user=user, student_id=student_id, department=department, enrollment_date=date(2024, 8, 1))
+
+    def imported_rows(self):
+        return sorted(Grade.objects.values_list(
+            'student__student_id', 'course__subject__code', 'marks_obtained', 'grade', 'gpa', 'exam_date'
+        ))
+
+    def test_same_rows_and_counts(self):
+        import pandas as pd
+        from .csv_imports import import_grades_csv, import_grades_pandas
+
+        with transaction.atomic():
+            old_success, old_errors, old_predictions = import_grades_csv(csv.DictReader(io.StringIO(self.CSV)))
+            old_rows = self.imported_rows()
+            transaction.set_rollback(True)
+        self.assertFalse(Grade.objects.exists())
+
+        new_success, new_errors, new_predictions, error_details, warnings = import_grades_pandas(pd.read_csv(io.StringIO(self.CSV), dtype=str))
+
+        self.assertEqual((new_success, new_errors), (old_success, old_errors))
+        self.assertEqual((new_success, new_errors), (3, 2))
+        self.assertEqual(self.imported_rows(), old_rows)
+        # The duplicate row overwrites the first one in both
+        self.assertEqual([row[:3] for row in old_rows], [('CS1', 'CS101', 45.0), ('CS2', 'CS102', 55.0)])
+        self.assertEqual(error_details, ["Row 3: Student 'NOPE' not found", 'Row 4: Invalid marks format'])
+        self.assertEqual(warnings, [])
+        # One prediction per imported row; the row importer predicted the overwritten
+        # row from its first marks, the bulk importer from the grade actually stored
+        self.assertEqual(
+            [entry['student'].student_id for entry in new_predictions],
+            [entry['student'].student_id for entry in old_predictions],
+        )
+        self.assertEqual([entry['current_grade'].marks_obtained for entry in new_predictions], [45.0, 55.0, 45.0])
+
+    def test_failed_batch_retried_row_by_row(self):
+        import pandas as pd
+        from .csv_imports import import_grades_pandas
+        bulk_create = Grade.objects.bulk_create
+
+        def fail_cs102(grades, *args, **kwargs):
+            if any(grade.course.subject.code == 'CS102' for grade in grades):
+                raise IntegrityError('CHECK constraint failed')
+            return bulk_create(grades, *args, **kwargs)
+
+        with mock.patch.object(Grade.objects, 'bulk_create', side_effect=fail_cs102):
+            success_count, error_count, predictions, error_details, warnings = import_grades_pandas(pd.read_csv(io.StringIO(self.CSV), dtype=str))
+
+        # Only the bad row of the batch is lost; the other one is retried on its own
+        self.assertEqual((success_count, error_count), (2, 3))
+        self.assertEqual(error_details, ["Row 3: Student 'NOPE' not found", 'Row 4: Invalid marks format', 'Row 5: CHECK constraint failed'])
+        self.assertEqual([row[:3] for row in self.imported_rows()], [('CS1', 'CS101', 45.0)])
+        self.assertEqual([entry['current_grade'].marks_obtained for entry in predictions], [45.0, 45.0])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class StudentImportTests(TestCase):
+    """import_students_pandas: per-row checks, bulk inserts and errors in file order"""
+
+    CSV = (
+        'username,email,first_name,last_name,student_id,department_code,year,enrollment_date,password\n'
+        'ada,ada@example.com,Ada,Lovelace,CS10,CS,1,2024-08-01,secret1\n'
+        'ada,other@example.com,Ada,Byron,CS11,CS,1,2024-08-01,\n'
+        'bob,taken@example.com,Bob,Smith,CS12,CS,1,2024-08-01,\n'
+        'cy,cy@example.com,Cy,Young,CS13,XX,1,2024-08-01,\n'
+        'di,di@example.com,Di,Prince,CS14,CS,1,not a date,\n'
+        'ed,ed@example.com,Ed,Wood,CS15,CS,2,2024-09-01,\n'
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        Department.objects.create(name='Computer Science', code='CS')
+        User.objects.create(username='taken', email='taken@example.com', user_type='admin')
+
+    def import_csv(self):
+        import pandas as pd
+        from .csv_imports import import_students_pandas
+        return import_students_pandas(pd.read_csv(io.StringIO(self.CSV), dtype=str))
+
+    def test_import(self):
+        success_count, error_count, error_details = self.import_csv()
+
+        self.assertEqual((success_count, error_count), (2, 4))
+        self.assertEqual(error_details, [
+            "Row 3: Username 'ada' already exists",
+            "Row 4: Email 'taken@example.com' already exists",
+            "Row 5: Department 'XX' not found",
+            'Row 6: Invalid enrollment date format',
+        ])
+        self.assertEqual(
+            list(Student.objects.order_by('student_id').values_list('student_id', 'user__username', 'year', 'enrollment_date')),
+            [('CS10', 'ada', '1', date(2024, 8, 1)), ('CS15', 'ed', '2', date(2024, 9, 1))],
+        )
+        self.assertTrue(User.objects.get(username='ada').check_password('secret1'))
+        self.assertTrue(User.objects.get(username='ed').check_password('student123'))
+
+    def test_failed_batches_reported_in_file_order(self):
+        from . import csv_imports
+        bulk_create = User.objects.bulk_create
+
+        def fail_first_batch(users, *args, **kwargs):
+            if users[0].username == 'ada':
+                raise IntegrityError('UNIQUE constraint failed')
+            return bulk_create(users, *args, **kwargs)
+
+        with mock.patch.object(csv_imports, 'STUDENT_IMPORT_BATCH_SIZE', 1), \
+                mock.patch.object(User.objects, 'bulk_create', side_effect=fail_first_batch):
+            success_count, error_count, error_details = self.import_csv()
+
+        self.assertEqual((success_count, error_count), (1, 5))
+        # The batch error is found last but belongs to the first row
+        self.assertEqual(error_details[:2], ['Row 2: UNIQUE constraint failed', "Row 3: Username 'ada' already exists"])
+        self.assertEqual(list(Student.objects.values_list('student_id', flat=True)), ['CS15'])
+
+    def test_failed_batch_retried_row_by_row(self):
+        bulk_create = User.objects.bulk_create
+
+        def fail_ed(users, *args, **kwargs):
+            if any(user.username == 'ed' for user in users):
+                raise IntegrityError('UNIQUE constraint failed')
+            return bulk_create(users, *args, **kwargs)
+
+        with mock.patch.object(User.objects, 'bulk_create', side_effect=fail_ed):
+            success_count, error_count, error_details = self.import_csv()
+
+        # Only the bad row of the batch is lost; the other one is retried on its own
+        self.assertEqual((success_count, error_count), (1, 5))
+        self.assertEqual(error_details[-1], 'Row 7: UNIQUE constraint failed')
+        self.assertEqual(list(Student.objects.values_list('student_id', flat=True)), ['CS10'])
+        self.assertFalse(User.objects.filter(username='ed').exists())
+
+
+class GradingParityTests(SimpleTestCase):
+    """band_grades gives every mark the letter and GPA Grade.save would"""
+
+    SCALES = [
+        None,
+        [
+            {'min': 0, 'grade': 'F', 'gpa': 0.0},
+            {'min': 50, 'grade': 'C', 'gpa': 2.0},
+            {'min': 65, 'grade': 'B', 'gpa': 3.0},
+            {'min': 85.5, 'grade': 'A', 'gpa': 4.0},
+        ],
+    ]
+
+    def marks_for(self, course):
+        # A sweep plus every band boundary and the nearest marks either side of it
+        marks = list(np.arange(0, course.max_marks + 0.25, 0.25))
+        for band in course.get_grading_scale().bands:
+            boundary = band['min'] * course.max_marks / 100
+            marks += [np.nextafter(boundary, -np.inf), boundary, np.nextafter(boundary, np.inf)]
+        return [float(mark) for mark in marks if mark >= 0]
+
+    def test_vectorized_matches_save(self):
+        for bands in self.SCALES:
+            for max_marks in (100, 60, 75):
+                course = Course(max_marks=max_marks, grading_scale=bands)
+                marks = self.marks_for(course)
+                with self.subTest(scale=bands and 'custom', max_marks=max_marks):
+                    expected = []
+                    with mock.patch.object(models.Model, 'save'):
+                        for mark in marks:
+                            grade = Grade(course=course, marks_obtained=mark)
+                            grade.save()
+                            expected.append((grade.grade, grade.gpa))
+
+                    letters, gpas = band_grades(marks, [max_marks] * len(marks), [course.get_grading_scale()] * len(marks))
+                    self.assertEqual(list(zip(letters, gpas.tolist())), expected)
+
+    def test_mixed_scales_in_one_call(self):
+        courses = [Course(max_marks=max_marks, grading_scale=bands) for bands in self.SCALES for max_marks in (100, 60)]
+        marks, max_marks, scales, expected = [], [], [], []
+        with mock.patch.object(models.Model, 'save'):
+            for course in courses:
+                for mark in self.marks_for(course):
+                    grade = Grade(course=course, marks_obtained=mark)
+                    grade.save()
+                    marks.append(mark)
+                    max_marks.append(course.max_marks)
+                    scales.append(course.get_grading_scale())
+                    expected.append((grade.grade, grade.gpa))
+
+        letters, gpas = band_grades(marks, max_marks, scales)
+        self.assertEqual(list(zip(letters, gpas.tolist())), expected)
+
+
+class RegradeTests(TestCase):
+    """regrade_courses rewrites stale letters and refreshes what is derived from them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', code='CS')
+        cls.course = Course.objects.create(
+            subject=Subject.objects.create(name='Algorithms', code='CS101', department=department),
+            year='1', semester='1', academic_year='2024-2025',
+        )
+        other_course = Course.objects.create(
+            subject=Subject.objects.create(name='Databases', code='CS102', department=department),
+            year='1', semester='1', academic_year='2024-2025',
+        )
+        cls.students = []
+        for student_id in ('CS1', 'CS2'):
+            user = User.objects.create(username=student_id, user_type='student')
+            cls.students.append(Student.objects.create(user=user, student_id=student_id, department=department, enrollment_date=date(2024, 8, 1)))
+        cls.first = Grade.objects.create(student=cls.students[0], course=cls.course, marks_obtained=45)
+        cls.second = Grade.objects.create(student=cls.students[1], course=cls.course, marks_obtained=35)
+        cls.untouched = Grade.objects.create(student=cls.students[0], course=other_course, marks_obtained=85)
+        # The on-commit refresh never runs inside the test transaction
+        refresh_student_summaries()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_regrade(self):
+        from .regrade import regrade_courses
+
+        self.assertEqual((self.first.grade, self.second.grade), ('C', 'F'))
+        self.assertEqual(admin_dashboard_stats()['failing_grades'], 1)
+        self.assertEqual(student_dashboard_data(self.students[1])['failing_count'], 1)
+        before = timezone.now()
+
+        # Like a max_marks change saved without signals: nothing is regraded until asked
+        Course.objects.filter(pk=self.course.pk).update(max_marks=50)
+        self.assertEqual(regrade_courses(Course.objects.filter(pk=self.course.pk)), 2)
+
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.untouched.refresh_from_db()
+        self.assertEqual([(self.first.grade, self.first.gpa), (self.second.grade, self.second.gpa)], [('A+', 4.0), ('B+', 3.3)])
+        self.assertGreaterEqual(self.first.updated_at, before)
+        self.assertGreaterEqual(self.second.updated_at, before)
+        self.assertLess(self.untouched.updated_at, before)
+
+        # Same letters as saving each grade again
+        for grade in (self.first, self.second):
+            grade.save()
+            self.assertEqual(Grade.objects.values_list('grade', 'gpa').get(pk=grade.pk), (grade.grade, grade.gpa))
+
+        summaries = StudentAcademicSummary.objects.in_bulk([student.pk for student in self.students])
+        self.assertEqual(summaries[self.students[0].pk].avg_gpa, (4.0 + 3.7) / 2)
+        self.assertEqual((summaries[self.students[1].pk].avg_gpa, summaries[self.students[1].pk].failing_count), (3.3, 0))
+
+        self.assertEqual(admin_dashboard_stats()['failing_grades'], 0)
+        data = student_dashboard_data(self.students[1])
+        self.assertEqual((data['failing_count'], data['failing_grades']), (0, []))
+
+        self.assertEqual(regrade_courses(Course.objects.filter(pk=self.course.pk)), 0)
+
+
+class ImportValidatorTests(TestCase):
+    """Dry-run validation reports every problem per row and writes nothing"""
+
+    STUDENTS_CSV = (
+        'username,email,first_name,last_name,student_id,department_code,year,enrollment_date\n'
+        'ada,ada@example.com,Ada,Lovelace,CS10,CS,1,2024-08-01\n'
+        'taken,taken@example.com,Tom,Taken,CS1,XX,1,someday\n'
+        ',nobody@example.com,No,Body,CS11,CS,1,2024-08-01\n'
+        'ada,ada@example.com,Ada,Again,CS10,CS,1,2024-08-01\n'
+    )
+    GRADES_CSV = (
+        'student_id,course_code,marks_obtained,exam_date\n'
+        'CS1,CS101,85,2024-12-01\n'
+        'NOPE,CS101,abc,2024-12-01\n'
+        'CS1,EE201,70,2024-12-01\n'
+        'CS1,CS101,150,2024-12-01\n'
+        'CS1,CS301,60,someday\n'
+        'CS1,,60,2024-12-01\n'
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', code='CS')
+        subject = Subject.objects.create(name='Algorithms', code='CS101', department=department)
+        Course.objects.create(subject=subject, year='1', semester='1', academic_year='2024-2025')
+        user = User.objects.create(username='taken', email='taken@example.com', user_type='student')
+        Student.objects.create(user=user, student_id='CS1', department=department, enrollment_date=date(2024, 8, 1))
+
+    def validate(self, import_type, content, chunksize=None):
+        import pandas as pd
+        from .import_validation import ImportValidator
+
+        validator = ImportValidator(import_type)
+        valid, errors, warnings = 0, [], []
+        for chunk in pd.read_csv(io.StringIO(content), dtype=str, chunksize=chunksize or 1000):
+            chunk_valid, chunk_errors, chunk_warnings = validator.validate(chunk)
+            valid += chunk_valid
+            errors += chunk_errors
+            warnings += chunk_warnings
+        return valid, errors, warnings
+
+    def test_student_errors(self):
+        # Duplicates are found across chunks too
+        valid, errors, warnings = self.validate('students', self.STUDENTS_CSV, chunksize=2)
+        self.assertEqual(valid, 1)
+        self.assertEqual(errors, [
+            "Row 3: Username 'taken' already exists; Email 'taken@example.com' already exists; "
+            "Student ID 'CS1' already exists; Department 'XX' not found; Invalid enrollment date 'someday'",
+            'Row 4: Missing required fields',
+            "Row 5: Username 'ada' appears more than once; Email 'ada@example.com' appears more than once; "
+            "Student ID 'CS10' appears more than once",
+        ])
+        self.assertEqual(warnings, [])
+
+    def test_grade_errors_and_warnings(self):
+        valid, errors, warnings = self.validate('grades', self.GRADES_CSV)
+        self.assertEqual(valid, 2)
+        self.assertEqual(errors, [
+            "Row 3: Student 'NOPE' not found; Invalid marks 'abc'",
+            "Row 4: Unknown course code 'EE201' (no department EE)",
+            'Row 5: Marks 150 out of range (should be 0-100)',
+            'Row 7: Missing required fields',
+        ])
+        self.assertEqual(warnings, [
+            'Course(s) would be created for new code(s): CS301',
+            "Row 6: Invalid exam date 'someday', today's date would be used",
+        ])
+
+    def test_dry_run_writes_nothing(self):
+        for import_type, content in (('students', self.STUDENTS_CSV), ('grades', self.GRADES_CSV)):
+            job = ImportJob(import_type=import_type, original_name=f'{import_type}.csv', dry_run=True)
+            job.file.save(f'{import_type}.csv', ContentFile(content.encode()), save=False)
+            job.save()
+            import_jobs.run_import_job(job.pk)
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'completed')
+
+        self.assertEqual(list(Student.objects.values_list('student_id', flat=True)), ['CS1'])
+        self.assertEqual(User.objects.count(), 1)
+        self.assertFalse(Grade.objects.exists())
+        self.assertFalse(Subject.objects.filter(code='CS301').exists())
+
+
+class ImportJobTests(TestCase):
+    """Claiming, running and recovering background import jobs"""
+
+    GRADES_CSV = 'student_id,course_code,marks_obtained\nCS1,CS101,85\nCS2,CS101,30\nNOPE,CS101,70\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', code='CS')
+        subject = Subject.objects.create(name='Algorithms', code='CS101', department=department)
+        Course.objects.create(subject=subject, year='1', semester='1', academic_year='2024-2025')
+        for student_id in ('CS1', 'CS2'):
+            user = User.objects.create(username=student_id, user_type='student')
+            Student.objects.create(user=user, student_id=student_id, department=department, enrollment_date=date(2024, 8, 1))
+
+    def create_job(self, content, **kwargs):
+        job = ImportJob(import_type='grades', original_name='grades.csv', **kwargs)
+        job.file.save('grades.csv', ContentFile(content.encode()), save=False)
+        job.save()
+        return job
+
+    def test_job_is_claimed_once(self):
+        job = self.create_job(self.GRADES_CSV)
+        self.assertTrue(import_jobs.run_import_job(job.pk))
+        self.assertFalse(import_jobs.run_import_job(job.pk))
+
+        running = self.create_job(self.GRADES_CSV, status='running')
+        self.assertFalse(import_jobs.run_import_job(running.pk))
+        running.refresh_from_db()
+        self.assertEqual(running.processed_rows, 0)
+
+    def test_successful_import(self):
+        job = self.create_job(self.GRADES_CSV)
+        upload = job.file.path
+        import_jobs.run_import_job(job.pk)
+
+        job.refresh_from_db()
+        # The upload is only read once and is not kept
+        self.assertFalse(os.path.exists(upload))
+        self.assertFalse(job.file)
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.total_rows, job.processed_rows, job.success_count, job.error_count), (3, 3, 2, 1))
+        self.assertEqual(job.errors, ["Row 4: Student 'NOPE' not found"])
+        self.assertEqual(len(job.predictions), 2)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(
+            sorted(Grade.objects.values_list('student__student_id', 'grade')),
+            [('CS1', 'A'), ('CS2', 'F')],
+        )
+
+    def test_import_in_chunks(self):
+        content = (
+            'student_id,course_code,marks_obtained\n'
+            'CS1,CS101,85\nCS2,CS101,30\n'
+            'CS1,CS102,70\nNOPE,CS101,70\n'
+            'CS2,CS102,55\n'
+        )
+        job = self.create_job(content)
+        with mock.patch.object(import_jobs, 'IMPORT_JOB_CHUNK_ROWS', 2):
+            import_jobs.run_import_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.total_rows, job.processed_rows, job.success_count, job.error_count), (5, 5, 4, 1))
+        self.assertEqual(job.success_count + job.error_count, job.processed_rows)
+        # Row numbers keep counting across chunks
+        self.assertEqual(job.errors, ["Row 5: Student 'NOPE' not found"])
+        self.assertEqual(len(job.predictions), 4)
+        self.assertEqual(
+            sorted(Grade.objects.values_list('student__student_id', 'course__subject__code', 'marks_obtained')),
+            [('CS1', 'CS101', 85.0), ('CS1', 'CS102', 70.0), ('CS2', 'CS101', 30.0), ('CS2', 'CS102', 55.0)],
+        )
+
+    def test_stored_errors_are_capped(self):
+        content = 'student_id,course_code,marks_obtained\nNOPE1,CS101,85\nCS1,CS101,85\nNOPE2,CS101,70\nNOPE3,CS101,70\n'
+        job = self.create_job(content)
+        with mock.patch.object(import_jobs, 'IMPORT_JOB_CHUNK_ROWS', 2), mock.patch.object(import_jobs, 'IMPORT_JOB_MAX_ERRORS', 2):
+            import_jobs.run_import_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual((job.processed_rows, job.success_count, job.error_count), (4, 1, 3))
+        self.assertEqual(job.errors, ["Row 2: Student 'NOPE1' not found", "Row 4: Student 'NOPE2' not found"])
+
+    def test_failed_predictions_are_reported(self):
+        from . import csv_imports
+
+        job = self.create_job(self.GRADES_CSV)
+        with mock.patch.object(csv_imports, 'predict_performances', side_effect=RuntimeError('model is corrupt')), \
+                self.assertLogs('sms.csv_imports', 'ERROR'):
+            import_jobs.run_import_job(job.pk)
+
+        job.refresh_from_db()
+        # The grades are still imported, with a warning instead of predictions
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.success_count, job.error_count), (2, 1))
+        self.assertEqual(job.predictions, [])
+        self.assertEqual(job.warnings, ['Performance predictions could not be computed for the imported grades.'])
+
+    def test_failed_import(self):
+        job = self.create_job('')
+        import_jobs.run_import_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.errors, ['The CSV file is empty.'])
+        self.assertIsNotNone(job.finished_at)
+
+    def test_dry_run_writes_nothing(self):
+        job = self.create_job(self.GRADES_CSV, dry_run=True)
+        import_jobs.run_import_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.success_count, job.error_count), (2, 1))
+        self.assertEqual(job.predictions, [])
+        self.assertFalse(Grade.objects.exists())
+
+    def test_recovery(self):
+        stale = self.create_job(self.GRADES_CSV, status='running')
+        stale_upload = stale.file.path
+        ImportJob.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - import_jobs.IMPORT_JOB_STALE_AFTER - timedelta(minutes=1)
+        )
+        live = self.create_job(self.GRADES_CSV, status='running')
+        pending = self.create_job(self.GRADES_CSV)
+
+        with mock.patch.object(import_jobs, 'get_executor') as get_executor, self.assertLogs('sms.import_jobs', 'WARNING'):
+            import_jobs.recover_import_jobs()
+        get_executor.return_value.submit.assert_called_once_with(import_jobs._run_in_thread, pending.pk)
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'failed')
+        self.assertIn('interrupted', stale.errors[-1])
+        self.assertIsNotNone(stale.finished_at)
+        self.assertFalse(stale.file)
+        self.assertFalse(os.path.exists(stale_upload))
+        live.refresh_from_db()
+        self.assertEqual(live.status, 'running')
+        self.assertTrue(live.file.storage.exists(live.file.name))
+
+
+class FeatureStoreTests(TestCase):
+    """The NumPy feature store agrees with the materialized summaries and follows grade changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_benchmark_data(students=12, grades=60, subjects_per_department=2, seed=5)
+        # Long committed, so a store built from them is settled at once
+        Grade.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def setUp(self):
+        features._store = None
+
+    def assertStoreMatchesGrades(self, store):
+        fresh = features.FeatureStore.load()
+        for current, expected in zip(store.arrays(), fresh.arrays()):
+            self.assertTrue(np.allclose(current, expected, equal_nan=True))
+
+    def test_matches_summaries(self):
+        store = features.feature_store()
+        summaries = StudentAcademicSummary.objects.filter(grade_count__gt=0).order_by('student_id').values_list(
+            'student_id', 'grade_count', 'failing_count', 'avg_gpa', 'first_gpa', 'latest_gpa', 'min_gpa', 'max_gpa'
+        )
+        self.assertTrue(np.allclose(np.column_stack(store.arrays()), np.array(list(summaries), dtype=float)))
+
+        missing = store.lookup([0, store.student_ids[0]])
+        self.assertEqual(list(missing.grade_count), [0, store.grade_count[0]])
+        self.assertTrue(np.isnan(missing.avg_gpa[0]))
+        self.assertEqual(missing.features().shape, (2, len(features.FEATURE_NAMES)))
+
+    def test_follows_grade_changes(self):
+        store = features.feature_store()
+        # Reused while no grade changes: only the watermark query runs
+        with self.assertNumQueries(1):
+            self.assertIs(features.feature_store(), store)
+
+        grade = Grade.objects.order_by('id').first()
+        grade.marks_obtained = 100 - grade.marks_obtained
+        grade.save()
+        self.assertStoreMatchesGrades(features.feature_store())
+
+        Grade.objects.order_by('id').last().delete()
+        self.assertStoreMatchesGrades(features.feature_store())
+
+    def test_late_commits(self):
+        first, second, third = Grade.objects.order_by('id')[:3]
+        first.marks_obtained = 100 - first.marks_obtained
+        first.save()
+        watermark = features.feature_store().watermark
+
+        # Saved before the first grade but committed after the store was refreshed:
+        # the watermark does not move, and the grade is older than it
+        second.marks_obtained = 100 - second.marks_obtained
+        second.save()
+        Grade.objects.filter(pk=second.pk).update(updated_at=watermark['updated_at'] - timedelta(seconds=5))
+        self.assertEqual(features.grade_watermark(), watermark)
+        self.assertStoreMatchesGrades(features.feature_store())
+
+        # The same once another grade moves the watermark
+        third.marks_obtained = 100 - third.marks_obtained
+        third.save()
+        Grade.objects.filter(pk=third.pk).update(updated_at=watermark['updated_at'] - timedelta(seconds=10))
+        Grade.objects.filter(pk=first.pk).update(updated_at=watermark['updated_at'] + timedelta(seconds=1))
+        self.assertStoreMatchesGrades(features.feature_store())
+
+        # Checked after the overlap, the store is reused again until the watermark moves
+        settled = features.grade_watermark()['updated_at'] + features.REFRESH_OVERLAP * 2
+        with mock.patch.object(features.timezone, 'now', return_value=settled):
+            store = features.feature_store()
+        self.assertTrue(store.settled())
+        with self.assertNumQueries(1):
+            self.assertIs(features.feature_store(), store)
+
+
+class PerformanceModelTests(TestCase):
+    """The persisted K-NN model: placeholder replacement and the saved file"""
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Computer Science', code='CS')
+        cls.courses = [
+            Course.objects.create(
+                subject=Subject.objects.create(name=f'Subject {number}', code=f'CS{number}', department=department),
+                year='1', semester='1', academic_year='2024-2025',
+            )
+            for number in range(2)
+        ]
+        cls.students = []
+        for number in range(30):
+            user = User.objects.create(username=f'student{number}')
+            cls.students.append(Student.objects.create(user=user, student_id=f'S{number}', department=department, enrollment_date=date(2024, 8, 1)))
+
+    def setUp(self):
+        features._store = None
+        performance_model._artifact = None
+        performance_model.model_path().unlink(missing_ok=True)
+
+    def test_placeholder_replaced_once_there_is_enough_data(self):
+        from .predictions import predict_performances
+
+        first = Grade.objects.create(student=self.students[0], course=self.courses[0], marks_obtained=50)
+        self.assertIsNone(performance_model.get_model()['model'])
+
+        # 30 students with 2 grades each: well below the refresh threshold of changes
+        grades = [first, Grade.objects.create(student=self.students[0], course=self.courses[1], marks_obtained=60)]
+        for number, student in enumerate(self.students[1:], start=1):
+            for course in self.courses:
+                grades.append(Grade.objects.create(student=student, course=course, marks_obtained=(number * 7 + len(grades)) % 100))
+        self.assertLess(len(grades), performance_model.refresh_threshold())
+
+        self.assertIsNotNone(performance_model.get_model()['model'])
+        predictions = predict_performances([(grade.student, grade) for grade in grades[:4]])
+        self.assertEqual({prediction['method'] for prediction in predictions}, {'K-Nearest Neighbors ML'})
+
+    def test_saved_model_is_readable_by_other_users(self):
+        performance_model.save_model(performance_model.train_model())
+        mode = stat.S_IMODE(performance_model.model_path().stat().st_mode)
+        self.assertEqual(mode & 0o044, 0o044)
@@ -17,6 +17,7 @@ urlpatterns = [
     path('edit-student/<int:student_id>/', views.edit_student, name='edit_student'),
     path('delete-student/<int:student_id>/', views.delete_student, name='delete_student'),
     path('manage-grades/', views.manage_grades, name='manage_grades'),
+    path('grades-data/', views.grades_data, name='grades_data'),
     path('add-grade/', views.add_grade, name='add_grade'),
     path('edit-grade/<int:grade_id>/', views.edit_grade, name='edit_grade'),
     path('delete-grade/<int:grade_id>/', views.delete_grade, name='delete_grade'),
@@ -31,8 +32,10 @@ urlpatterns = [
     path('performance-trends/', views.performance_trends, name='performance_trends'),
     path('performance-trends-data/', views.performance_trends_data, name='performance_trends_data'),
     path('import-csv-data/', views.import_csv_data, name='import_csv_data'),
+    path('import-jobs/<int:job_id>/', views.import_job_status, name='import_job_status'),
     path('at-risk-students/', views.at_risk_students, name='at_risk_students'),
     path('admin-panel/', views.admin_panel, name='admin_panel'),
+    path('request-timings/', views.request_timings, name='request_timings'),
 
     # Quick Actions URLs
     path('assignment-tracking/', views.assignment_tracking, name='assignment_tracking'),
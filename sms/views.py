@@ -1,21 +1,23 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse, JsonResponse
-from django.db.models import Count, Avg, Q
-from django.core.files.storage import FileSystemStorage
-from .models import User, Student, Department, Subject, Course, Grade
-import json
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Count, Avg, Max, Sum, Q, Case, When, Value
+from django.db.models.functions import TruncMonth
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.cache import get_conditional_response, patch_cache_control
+from .models import User, Student, Department, Course, Grade, StudentAcademicSummary, ImportJob
+from .caching import STUDENT_DASHBOARD_TIMEOUT, admin_dashboard_stats, student_dashboard_data
+from . import import_jobs, instrumentation
+import hashlib
 import csv
-import io
-import pandas as pd
-from datetime import date, datetime
-import numpy as np
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.preprocessing import StandardScaler
-import warnings
-warnings.filterwarnings('ignore')
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 def login_view(request):
     if request.user.is_authenticated:
@@ -58,17 +60,8 @@ def admin_dashboard(request):
         messages.error(request, 'Access denied. Admin privileges required.')
         return redirect('sms:login')
 
-    # Get dashboard statistics
-    total_students = Student.objects.filter(is_active=True).count()
-    total_courses = Course.objects.count()
-    total_subjects = Subject.objects.count()
-    total_grades = Grade.objects.count()
-
-    # Calculate additional statistics
-    all_grades = Grade.objects.all()
-    a_grades = all_grades.filter(grade='A').count()
-    failing_grades = all_grades.filter(grade='F').count()
-    avg_gpa = all_grades.aggregate(avg_gpa=Avg('gpa'))['avg_gpa'] or 0
+    # Get dashboard statistics (cached, invalidated on writes)
+    stats = admin_dashboard_stats()
 
     # Get recent students (last 5)
     recent_students = Student.objects.select_related('user', 'department').order_by('-created_at')[:5]
@@ -77,13 +70,13 @@ def admin_dashboard(request):
     recent_grades = Grade.objects.select_related('student__user', 'course__subject').order_by('-created_at')[:5]
 
     context = {
-        'total_students': total_students,
-        'total_courses': total_courses,
-        'total_subjects': total_subjects,
-        'total_grades': total_grades,
-        'a_grades': a_grades,
-        'avg_gpa': round(avg_gpa, 1),
-        'failing_grades': failing_grades,
+        'total_students': stats['total_students'],
+        'total_courses': stats['total_courses'],
+        'total_subjects': stats['total_subjects'],
+        'total_grades': stats['total_grades'],
+        'a_grades': stats['a_grades'],
+        'avg_gpa': round(stats['avg_gpa'], 1),
+        'failing_grades': stats['failing_grades'],
         'recent_students': recent_students,
         'recent_grades': recent_grades,
     }
@@ -106,26 +99,51 @@ def manage_students(request):
 
     return render(request, 'sms/manage_students.html', context)
 
+async def fetch_all(queryset):
+    """Rows of a queryset, fetched in one sync_to_async call.
+
+    Not aiterator(): on this Django version it runs values_list() queries
+    outside sync_to_async.
+    """
+    return [row async for row in queryset]
+
+def version_etag(scope, version):
+    """ETag for a payload that only changes with version.
+
+    version is one aggregate over the rows the payload is built from: their
+    count catches deletions, their latest updated_at catches edits. No
+    Last-Modified is sent: a deletion changes the count but not the latest
+    updated_at, so If-Modified-Since would get a 304 for a stale copy.
+    """
+    digest = hashlib.md5(f'{scope}:{sorted(version.items())}'.encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+def with_etag(response, etag):
+    response.headers['ETag'] = etag
+    # Stored by the browser but revalidated on every load; never by shared caches
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def not_modified(request, etag):
+    """A 304 if the client's copy is current (If-None-Match), else None"""
+    response = get_conditional_response(request, etag=etag)
+    return response and with_etag(response, etag)
+
 @login_required
-def get_student_details(request, student_id):
+async def get_student_details(request, student_id):
     """Get detailed student information for the modal"""
-    if request.user.user_type != 'admin':
+    user = await request.auser()
+    if user.user_type != 'admin':
         return JsonResponse({'error': 'Access denied'}, status=403)
 
     try:
-        student = Student.objects.select_related('user', 'department').get(id=student_id)
-
-        # Get student's grades
-        grades = Grade.objects.filter(student=student).select_related('course__subject')
-
-        # Calculate GPA
-        avg_gpa = grades.aggregate(avg_gpa=Avg('gpa'))['avg_gpa'] or 0
-
-        # Get grade distribution
-        grade_counts = {}
-        for grade in grades:
-            grade_letter = grade.grade
-            grade_counts[grade_letter] = grade_counts.get(grade_letter, 0) + 1
+        # Awaited one after another: the ORM calls all run on the one
+        # thread-sensitive sync_to_async thread, so gathering them gains nothing
+        grades = Grade.objects.filter(student_id=student_id)
+        student = await Student.objects.select_related('user', 'department').aget(id=student_id)
+        summary = await StudentAcademicSummary.objects.filter(student_id=student_id).afirst()
+        grade_counts = await fetch_all(grades.values_list('grade').annotate(count=Count('id')).order_by('grade'))
+        recent_grades = await fetch_all(grades.select_related('course__subject').order_by('-created_at')[:5])
 
         # Prepare student data
         student_data = {
@@ -142,9 +160,9 @@ def get_student_details(request, student_id):
             'enrollment_date': student.enrollment_date.strftime('%B %d, %Y') if student.enrollment_date else 'Not provided',
             'parent_phone': student.parent_phone or 'Not provided',
             'is_active': student.is_active,
-            'avg_gpa': round(avg_gpa, 2),
-            'total_grades': grades.count(),
-            'grade_counts': grade_counts,
+            'avg_gpa': round(summary.avg_gpa or 0, 2) if summary else 0,
+            'total_grades': summary.grade_count if summary else 0,
+            'grade_counts': dict(grade_counts),
             'last_login': student.user.last_login.strftime('%B %d, %Y at %I:%M %p') if student.user.last_login else 'Never logged in',
             'date_joined': student.user.date_joined.strftime('%B %d, %Y at %I:%M %p'),
             'current_password': 'student123',
@@ -156,7 +174,7 @@ def get_student_details(request, student_id):
                     'marks': grade.marks_obtained,
                     'date': grade.created_at.strftime('%b %d, %Y')
                 }
-                for grade in grades.order_by('-created_at')[:5]
+                for grade in recent_grades
             ]
         }
 
@@ -164,7 +182,7 @@ def get_student_details(request, student_id):
 
     except Student.DoesNotExist:
         return JsonResponse({'error': 'Student not found'}, status=404)
-    except Exception as e:
+    except Exception:
         return JsonResponse({'error': 'An error occurred'}, status=500)
 
 @login_required
@@ -205,7 +223,7 @@ def add_student(request):
 
             # Create student profile
             department = Department.objects.get(id=department_id)
-            student = Student.objects.create(
+            Student.objects.create(
                 user=user,
                 student_id=student_id,
                 department=department,
@@ -251,8 +269,6 @@ def edit_student(request, student_id):
             # Set default password if none provided
             student.user.set_password('student123')
 
-        student.user.save()
-
         # Update student data
         student.student_id = request.POST.get('student_id')
         student.department_id = request.POST.get('department')
@@ -263,7 +279,9 @@ def edit_student(request, student_id):
         student.parent_phone = request.POST.get('parent_phone')
         student.is_active = request.POST.get('is_active') == 'on'
 
-        student.save()
+        with transaction.atomic():
+            student.user.save()
+            student.save()
 
         messages.success(request, f'Student {student.student_id} updated successfully!')
         return redirect('sms:manage_students')
@@ -292,27 +310,85 @@ def delete_student(request, student_id):
     context = {'student': student}
     return render(request, 'sms/delete_student.html', context)
 
+# Number of grades per page in the grade listings
+GRADE_PAGE_SIZE = 50
+
+def grade_listing_filters(params):
+    """Grade listing filters taken from the query string"""
+    return {
+        'q': params.get('q', '').strip(),
+        'course': params.get('course', ''),
+        'department': params.get('department', ''),
+        'grade': params.get('grade', ''),
+    }
+
+def filter_grades(grades, filters):
+    """Apply grade_listing_filters() to a Grade queryset"""
+    # Every search word must match the student ID, student name or course name
+    for word in filters['q'].split():
+        grades = grades.filter(
+            Q(student__student_id__icontains=word) |
+            Q(student__user__first_name__icontains=word) |
+            Q(student__user__last_name__icontains=word) |
+            Q(course__subject__name__icontains=word)
+        )
+    if filters['course'].isdigit():
+        grades = grades.filter(course_id=filters['course'])
+    if filters['department'].isdigit():
+        grades = grades.filter(course__subject__department_id=filters['department'])
+    if filters['grade'] in dict(Grade.GRADE_CHOICES):
+        grades = grades.filter(grade=filters['grade'])
+    return grades
+
+def encode_grade_cursor(grade):
+    """Keyset cursor for the position after this grade in newest-first order"""
+    delta = grade.created_at - datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+    return f"{delta // timedelta(microseconds=1)}.{grade.id}"
+
+def grade_keyset_page(grades, cursor, page_size=None):
+    """One page of grades ordered newest first, starting after the cursor.
+
+    Returns (grades, next_cursor); next_cursor is None on the last page.
+    """
+    page_size = page_size or GRADE_PAGE_SIZE
+    grades = grades.order_by('-created_at', '-id')
+    try:
+        micros, grade_id = (int(part) for part in cursor.split('.'))
+        created_at = datetime(1970, 1, 1, tzinfo=dt_timezone.utc) + timedelta(microseconds=micros)
+        grades = grades.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=grade_id))
+    except (AttributeError, ValueError, OverflowError):
+        pass  # No (or malformed) cursor: start from the newest grade
+
+    page = list(grades[:page_size + 1])
+    next_cursor = encode_grade_cursor(page[page_size - 1]) if len(page) > page_size else None
+    return page[:page_size], next_cursor
+
 @login_required
 def manage_grades(request):
     if request.user.user_type != 'admin':
         messages.error(request, 'Access denied. Admin privileges required.')
         return redirect('sms:login')
 
-    grades = Grade.objects.select_related('student__user', 'course__subject', 'course__subject__department').all()
-    students = Student.objects.select_related('user', 'department').filter(is_active=True)
+    filters = grade_listing_filters(request.GET)
+    grades = filter_grades(
+        Grade.objects.select_related('student__user', 'course__subject', 'course__subject__department'),
+        filters
+    )
+    grades, next_cursor = grade_keyset_page(grades, request.GET.get('after'))
     courses = Course.objects.select_related('subject', 'subject__department').all()
+    departments = Department.objects.all()
 
-    # Calculate grade statistics
-    total_grades_count = grades.count()
-
-    # Calculate A-level grades (GPA >= 3.7, which represents A-level performance)
-    a_grades = grades.filter(gpa__gte=3.7)
-    a_grades_count = a_grades.count()
-
-    # Calculate failing grades statistics
-    failing_grades = grades.filter(grade='F')
-    failing_grades_count = failing_grades.count()
-    failing_students_count = failing_grades.values('student').distinct().count()
+    # Calculate grade statistics in one conditional-aggregate query
+    # (A-level grades are GPA >= 3.7, which represents A-level performance)
+    stats = Grade.objects.aggregate(
+        total_grades_count=Count('id'),
+        a_grades_count=Count('id', filter=Q(gpa__gte=3.7)),
+        failing_grades_count=Count('id', filter=Q(grade='F')),
+        failing_students_count=Count('student', distinct=True, filter=Q(grade='F')),
+        avg_gpa=Avg('gpa'),
+    )
+    total_grades_count = stats['total_grades_count']
+    failing_grades_count = stats['failing_grades_count']
 
     # Calculate percentage of failing grades
     failing_percentage = (failing_grades_count / total_grades_count * 100) if total_grades_count > 0 else 0
@@ -320,28 +396,61 @@ def manage_grades(request):
     passing_percentage = 100 - failing_percentage
 
     # Calculate A grades percentage
-    a_grades_percentage = (a_grades_count / total_grades_count * 100) if total_grades_count > 0 else 0
-
-    # Calculate average GPA
-    avg_gpa = grades.aggregate(avg_gpa=Avg('gpa'))['avg_gpa'] or 0
+    a_grades_percentage = (stats['a_grades_count'] / total_grades_count * 100) if total_grades_count > 0 else 0
 
     context = {
         'grades': grades,
-        'students': students,
+        'next_cursor': next_cursor,
+        'filters': filters,
+        'grade_choices': Grade.GRADE_CHOICES,
         'courses': courses,
+        'departments': departments,
         'total_grades_count': total_grades_count,
-        'a_grades_count': a_grades_count,
+        'a_grades_count': stats['a_grades_count'],
         'a_grades_percentage': round(a_grades_percentage, 1),
         'failing_grades_count': failing_grades_count,
-        'failing_students_count': failing_students_count,
+        'failing_students_count': stats['failing_students_count'],
         'passing_grades_count': passing_grades_count,
         'failing_percentage': round(failing_percentage, 1),
         'passing_percentage': round(passing_percentage, 1),
-        'avg_gpa': round(avg_gpa, 2),
+        'avg_gpa': round(stats['avg_gpa'] or 0, 2),
     }
 
     return render(request, 'sms/manage_grades.html', context)
 
+@login_required
+def grades_data(request):
+    """JSON page of the grade listing, for incremental loading"""
+    if request.user.user_type != 'admin':
+        return JsonResponse({'error': 'Access denied'}, status=403)
+
+    grades = filter_grades(
+        Grade.objects.select_related('student__user', 'course__subject', 'course__subject__department'),
+        grade_listing_filters(request.GET)
+    )
+    grades, next_cursor = grade_keyset_page(grades, request.GET.get('after'))
+
+    return JsonResponse({
+        'grades': [
+            {
+                'id': grade.id,
+                'student_id': grade.student.student_id,
+                'student_name': grade.student.user.get_full_name(),
+                'course': grade.course.subject.name,
+                'department': grade.course.subject.department.name,
+                'marks_obtained': grade.marks_obtained,
+                'max_marks': grade.course.max_marks,
+                'grade': grade.grade,
+                'gpa': grade.gpa,
+                'exam_date': grade.exam_date.isoformat() if grade.exam_date else None,
+                'edit_url': reverse('sms:edit_grade', args=[grade.id]),
+                'delete_url': reverse('sms:delete_grade', args=[grade.id]),
+            }
+            for grade in grades
+        ],
+        'next_cursor': next_cursor,
+    })
+
 @login_required
 def add_grade(request):
     if request.user.user_type != 'admin':
@@ -364,7 +473,7 @@ def add_grade(request):
                 messages.error(request, 'Grade already exists for this student and course.')
                 return redirect('sms:add_grade')
 
-            grade = Grade.objects.create(
+            Grade.objects.create(
                 student=student,
                 course=course,
                 marks_obtained=float(marks_obtained),
@@ -434,36 +543,56 @@ def delete_grade(request, grade_id):
     return render(request, 'sms/delete_grade.html', context)
 
 # Course Analysis Views
+def course_grade_stats():
+    """Per-course grade statistics from one query grouped by course and grade letter.
+
+    Returns {course_id: {'total_students', 'avg_marks', 'avg_gpa', 'grade_distribution'}}.
+    """
+    grade_order = [grade for grade, _ in Grade.GRADE_CHOICES]
+    rows = (
+        Grade.objects.values_list('course_id', 'grade')
+        .annotate(count=Count('id'), total_marks=Sum('marks_obtained'), total_gpa=Sum('gpa'))
+        .order_by()
+    )
+
+    stats = {}
+    for course_id, grade, count, total_marks, total_gpa in sorted(
+        rows, key=lambda row: (row[0], grade_order.index(row[1]) if row[1] in grade_order else len(grade_order))
+    ):
+        course_stats = stats.setdefault(course_id, {'total_students': 0, 'total_marks': 0, 'total_gpa': 0, 'grade_distribution': {}})
+        course_stats['total_students'] += count
+        course_stats['total_marks'] += total_marks or 0
+        course_stats['total_gpa'] += total_gpa or 0
+        course_stats['grade_distribution'][grade] = count
+
+    for course_stats in stats.values():
+        course_stats['avg_marks'] = course_stats.pop('total_marks') / course_stats['total_students']
+        course_stats['avg_gpa'] = course_stats.pop('total_gpa') / course_stats['total_students']
+
+    return stats
+
 @login_required
 def course_analysis(request):
     if request.user.user_type != 'admin':
         messages.error(request, 'Access denied. Admin privileges required.')
         return redirect('sms:login')
 
-    courses = Course.objects.select_related('subject', 'subject__department').all()
+    courses = list(Course.objects.select_related('subject', 'subject__department').all())
+    stats = course_grade_stats()
     course_data = []
 
     for course in courses:
-        grades = Grade.objects.filter(course=course)
-        if grades.exists():
-            avg_marks = grades.aggregate(avg_marks=Avg('marks_obtained'))['avg_marks']
-            avg_gpa = grades.aggregate(avg_gpa=Avg('gpa'))['avg_gpa']
-            total_students = grades.count()
-
-            # Grade distribution
-            grade_dist = {}
-            for grade in grades:
-                if grade.grade in grade_dist:
-                    grade_dist[grade.grade] += 1
-                else:
-                    grade_dist[grade.grade] = 1
+        course_stats = stats.get(course.id)
+        if course_stats:
+            avg_marks = course_stats['avg_marks']
+            avg_gpa = course_stats['avg_gpa']
 
             course_data.append({
                 'course': course,
                 'avg_marks': round(avg_marks, 2) if avg_marks else 0,
                 'avg_gpa': round(avg_gpa, 2) if avg_gpa else 0,
-                'total_students': total_students,
-                'grade_distribution': grade_dist
+                'total_students': course_stats['total_students'],
+                'grade_distribution': course_stats['grade_distribution']
             })
 
     context = {
@@ -473,21 +602,37 @@ def course_analysis(request):
     return render(request, 'sms/course_analysis.html', context)
 
 @login_required
-def course_analysis_data(request):
-    if request.user.user_type != 'admin':
+async def course_analysis_data(request):
+    user = await request.auser()
+    if user.user_type != 'admin':
         return JsonResponse({'error': 'Access denied'}, status=403)
 
     course_id = request.GET.get('course_id')
     if course_id:
-        course = get_object_or_404(Course, id=course_id)
-        grades = Grade.objects.filter(course=course).select_related('student__user')
+        version = await Course.objects.filter(id=course_id).aaggregate(
+            course_updated=Max('updated_at'),
+            subject_updated=Max('subject__updated_at'),
+            grade_count=Count('grades'),
+            grade_updated=Max('grades__updated_at'),
+            user_updated=Max('grades__student__user__updated_at'),
+        )
+        if version['course_updated'] is None:
+            raise Http404('No Course matches the given query.')
+        etag = version_etag(f'course_analysis_data:{course_id}', version)
+        if response := not_modified(request, etag):
+            return response
+
+        course = await Course.objects.select_related('subject').filter(id=course_id).afirst()
+        if course is None:
+            raise Http404('No Course matches the given query.')
+        grades = await fetch_all(Grade.objects.filter(course_id=course_id).values_list('student__user__first_name', 'student__user__last_name', 'marks_obtained'))
 
         students = []
         marks = []
 
-        for grade in grades:
-            students.append(grade.student.user.get_full_name())
-            marks.append(float(grade.marks_obtained))
+        for first_name, last_name, marks_obtained in grades:
+            students.append(f"{first_name} {last_name}".strip())
+            marks.append(float(marks_obtained))
 
         data = {
             'course_name': course.subject.name,
@@ -495,51 +640,59 @@ def course_analysis_data(request):
             'marks': marks,
             'max_marks': course.max_marks
         }
-        return JsonResponse(data)
+        return with_etag(JsonResponse(data), etag)
 
     # Return all courses data
+    version = await Grade.objects.aaggregate(
+        grade_count=Count('id'),
+        grade_updated=Max('updated_at'),
+        course_updated=Max('course__updated_at'),
+        subject_updated=Max('course__subject__updated_at'),
+    )
+    etag = version_etag('course_analysis_data', version)
+    if response := not_modified(request, etag):
+        return response
+
     courses_data = []
-    courses = Course.objects.all()
+    stats = await sync_to_async(course_grade_stats)()
+    courses = await fetch_all(Course.objects.values_list('id', 'subject__name', 'max_marks'))
 
-    for course in courses:
-        grades = Grade.objects.filter(course=course)
-        if grades.exists():
-            avg_marks = grades.aggregate(avg_marks=Avg('marks_obtained'))['avg_marks']
+    for course_id, subject_name, max_marks in courses:
+        course_stats = stats.get(course_id)
+        if course_stats:
+            avg_marks = course_stats['avg_marks']
             courses_data.append({
-                'course_name': course.subject.name,
+                'course_name': subject_name,
                 'avg_marks': float(avg_marks) if avg_marks else 0,
-                'max_marks': course.max_marks
+                'max_marks': max_marks
             })
 
-    return JsonResponse({'courses': courses_data})
+    return with_etag(JsonResponse({'courses': courses_data}), etag)
 
 # Performance Trends Views
+def monthly_grade_rollup():
+    """Average GPA, grade count and distinct students per month, aggregated in the database"""
+    return (
+        Grade.objects.annotate(month=TruncMonth('created_at'))
+        .values('month')
+        .annotate(avg_gpa=Avg('gpa'), grade_count=Count('id'), student_count=Count('student', distinct=True))
+        .order_by('month')
+    )
+
 @login_required
 def performance_trends(request):
     if request.user.user_type != 'admin':
         messages.error(request, 'Access denied. Admin privileges required.')
         return redirect('sms:login')
 
-    # Get overall performance trends
-    grades = Grade.objects.select_related('student__user', 'course__subject__department').order_by('created_at')
-
-    # Monthly performance data
-    monthly_data = {}
-    for grade in grades:
-        month_key = grade.created_at.strftime('%Y-%m')
-        if month_key not in monthly_data:
-            monthly_data[month_key] = {'total_gpa': 0, 'count': 0, 'students': set()}
-        monthly_data[month_key]['total_gpa'] += grade.gpa
-        monthly_data[month_key]['count'] += 1
-        monthly_data[month_key]['students'].add(grade.student.id)
-
     # Calculate average GPA per month with trends
     trend_data = []
     prev_avg_gpa = None
+    total_grades = 0
 
-    for month, data in sorted(monthly_data.items()):
-        avg_gpa = data['total_gpa'] / data['count'] if data['count'] > 0 else 0
-        unique_students = len(data['students'])
+    for data in monthly_grade_rollup():
+        avg_gpa = data['avg_gpa'] or 0
+        total_grades += data['grade_count']
 
         # Calculate trend compared to previous month
         if prev_avg_gpa is not None:
@@ -557,10 +710,10 @@ def performance_trends(request):
             trend_class = "muted"
 
         trend_data.append({
-            'month': month,
+            'month': data['month'].strftime('%Y-%m'),
             'avg_gpa': round(avg_gpa, 2),
-            'student_count': unique_students,
-            'grade_count': data['count'],
+            'student_count': data['student_count'],
+            'grade_count': data['grade_count'],
             'trend': trend,
             'trend_class': trend_class
         })
@@ -572,69 +725,61 @@ def performance_trends(request):
     if trend_data:
         latest_avg_gpa = trend_data[-1]['avg_gpa']  # Last item in sorted list
 
-    # Department-wise performance - include all departments
-    all_departments = Department.objects.all()
+    # Department-wise performance - include all departments, grouped by the
+    # student's department (not the course department) in one query
+    dept_stats = {
+        row['student__department']: row
+        for row in Grade.objects.values('student__department').annotate(avg_gpa=Avg('gpa'), count=Count('id')).order_by()
+    }
+    all_departments = list(Department.objects.all())
     dept_data = []
 
     for department in all_departments:
-        # Get grades for students belonging to this department (not course department)
-        dept_grades = grades.filter(student__department=department)
-
-        if dept_grades.exists():
-            total_gpa = sum(grade.gpa for grade in dept_grades)
-            count = dept_grades.count()
-            avg_gpa = total_gpa / count if count > 0 else 0
-            student_count = count
-        else:
-            avg_gpa = 0
-            student_count = 0
-
+        stats = dept_stats.get(department.id)
         dept_data.append({
             'department': department.name,
-            'avg_gpa': round(avg_gpa, 2),
-            'student_count': student_count
+            'avg_gpa': round(stats['avg_gpa'] or 0, 2) if stats else 0,
+            'student_count': stats['count'] if stats else 0
         })
 
-    # Get total number of departments
-    total_departments = Department.objects.count()
-
     context = {
         'trend_data': trend_data,
         'dept_data': dept_data,
-        'total_grades': grades.count(),
+        'total_grades': total_grades,
         'latest_avg_gpa': latest_avg_gpa,
-        'total_departments': total_departments
+        'total_departments': len(all_departments)
     }
     return render(request, 'sms/performance_trends.html', context)
 
 @login_required
-def performance_trends_data(request):
-    if request.user.user_type != 'admin':
+async def performance_trends_data(request):
+    user = await request.auser()
+    if user.user_type != 'admin':
         return JsonResponse({'error': 'Access denied'}, status=403)
 
-    grades = Grade.objects.select_related('course__subject__department').order_by('created_at')
+    version = await Grade.objects.aaggregate(grade_count=Count('id'), grade_updated=Max('updated_at'))
+    etag = version_etag('performance_trends_data', version)
+    if response := not_modified(request, etag):
+        return response
 
     # Monthly trends
-    monthly_data = {}
-    for grade in grades:
-        month_key = grade.created_at.strftime('%Y-%m')
-        if month_key not in monthly_data:
-            monthly_data[month_key] = []
-        monthly_data[month_key].append(grade.gpa)
-
     months = []
     avg_gpas = []
-    for month in sorted(monthly_data.keys()):
-        months.append(month)
-        avg_gpa = sum(monthly_data[month]) / len(monthly_data[month])
-        avg_gpas.append(round(avg_gpa, 2))
+    async for data in monthly_grade_rollup().aiterator():
+        months.append(data['month'].strftime('%Y-%m'))
+        avg_gpas.append(round(data['avg_gpa'] or 0, 2))
 
-    return JsonResponse({
+    return with_etag(JsonResponse({
         'months': months,
         'avg_gpas': avg_gpas
-    })
+    }), etag)
 
 # CSV Import Views
+IMPORT_REQUIRED_COLUMNS = {
+    'students': ['username', 'email', 'first_name', 'last_name', 'student_id', 'department_code', 'year', 'enrollment_date'],
+    'grades': ['student_id', 'course_code', 'marks_obtained'],
+}
+
 @login_required
 def import_csv_data(request):
     if request.user.user_type != 'admin':
@@ -653,685 +798,177 @@ def import_csv_data(request):
             messages.error(request, 'Please upload a valid CSV file.')
             return redirect('sms:import_csv_data')
 
-        try:
-            # Read CSV file using pandas for better error handling
-            df = pd.read_csv(csv_file)
-
-            # Validate required columns
-            if import_type == 'students':
-                required_columns = ['username', 'email', 'first_name', 'last_name', 'student_id', 'department_code', 'year', 'enrollment_date']
-                missing_columns = [col for col in required_columns if col not in df.columns]
-                if missing_columns:
-                    messages.error(request, f'Missing required columns: {", ".join(missing_columns)}')
-                    return redirect('sms:import_csv_data')
-
-                success_count, error_count, error_details = import_students_pandas(df)
-            elif import_type == 'grades':
-                required_columns = ['student_id', 'course_code', 'marks_obtained']
-                missing_columns = [col for col in required_columns if col not in df.columns]
-                if missing_columns:
-                    messages.error(request, f'Missing required columns: {", ".join(missing_columns)}')
-                    return redirect('sms:import_csv_data')
-
-                success_count, error_count, predictions, error_details = import_grades_pandas(df)
-
-            # Display results
-            if success_count > 0:
-                messages.success(request, f'Successfully imported {success_count} records.')
-            if error_count > 0:
-                error_msg = f'{error_count} records had errors and were skipped.'
-                if error_details:
-                    error_msg += f' First few errors: {"; ".join(error_details[:3])}'
-                messages.warning(request, error_msg)
+        if import_type not in IMPORT_REQUIRED_COLUMNS:
+            messages.error(request, 'Unknown import type.')
+            return redirect('sms:import_csv_data')
 
-            # Show predictions if available
-            if import_type == 'grades' and 'predictions' in locals() and predictions:
-                context = {
-                    'predictions': predictions,
-                    'show_predictions': True
-                }
-                return render(request, 'sms/import_csv_data.html', context)
+        # Loaded on first upload rather than at startup, like the importers themselves
+        import pandas as pd
 
+        try:
+            # Only the header is read here; the rows are processed by the import job
+            columns = pd.read_csv(csv_file, nrows=0).columns
+            csv_file.seek(0)
         except pd.errors.EmptyDataError:
             messages.error(request, 'The CSV file is empty.')
+            return redirect('sms:import_csv_data')
         except pd.errors.ParserError as e:
             messages.error(request, f'Error parsing CSV file: {str(e)}')
-        except Exception as e:
-            messages.error(request, f'Error processing CSV file: {str(e)}')
-
-    return render(request, 'sms/import_csv_data.html')
-
-def import_students_pandas(df):
-    """Import students using pandas DataFrame with improved error handling"""
-    success_count = 0
-    error_count = 0
-    error_details = []
-
-    # Clean the data
-    df = df.dropna(subset=['username', 'email', 'student_id'])  # Remove rows with missing critical data
-    df['phone'] = df['phone'].fillna('')  # Fill missing phone numbers
-
-    for index, row in df.iterrows():
-        try:
-            # Validate required fields
-            if not row['username'] or not row['email'] or not row['student_id']:
-                error_details.append(f"Row {index + 2}: Missing required fields")
-                error_count += 1
-                continue
-
-            # Check if user already exists
-            if User.objects.filter(username=row['username']).exists():
-                error_details.append(f"Row {index + 2}: Username '{row['username']}' already exists")
-                error_count += 1
-                continue
-
-            if User.objects.filter(email=row['email']).exists():
-                error_details.append(f"Row {index + 2}: Email '{row['email']}' already exists")
-                error_count += 1
-                continue
-
-            if Student.objects.filter(student_id=row['student_id']).exists():
-                error_details.append(f"Row {index + 2}: Student ID '{row['student_id']}' already exists")
-                error_count += 1
-                continue
-
-            # Get department
-            try:
-                department = Department.objects.get(code=row['department_code'])
-            except Department.DoesNotExist:
-                error_details.append(f"Row {index + 2}: Department '{row['department_code']}' not found")
-                error_count += 1
-                continue
-
-            # Parse enrollment date
-            try:
-                enrollment_date = pd.to_datetime(row['enrollment_date']).date()
-            except:
-                error_details.append(f"Row {index + 2}: Invalid enrollment date format")
-                error_count += 1
-                continue
-
-            # Create user
-            user = User.objects.create_user(
-                username=row['username'],
-                email=row['email'],
-                password=row.get('password', 'student123'),
-                first_name=row['first_name'],
-                last_name=row['last_name'],
-                user_type='student',
-                phone=str(row.get('phone', ''))
-            )
-
-            # Create student profile
-            Student.objects.create(
-                user=user,
-                student_id=row['student_id'],
-                department=department,
-                year=str(row['year']),
-                enrollment_date=enrollment_date
-            )
-            success_count += 1
-
-        except Exception as e:
-            error_details.append(f"Row {index + 2}: {str(e)}")
-            error_count += 1
-            continue
-
-    return success_count, error_count, error_details
-
-def import_students_csv(csv_data):
-    """Legacy function for backward compatibility"""
-    success_count = 0
-    error_count = 0
-
-    for row in csv_data:
-        try:
-            # Create user
-            user = User.objects.create_user(
-                username=row['username'],
-                email=row['email'],
-                password=row.get('password', 'student123'),
-                first_name=row['first_name'],
-                last_name=row['last_name'],
-                user_type='student',
-                phone=row.get('phone', '')
-            )
-
-            # Create student profile
-            department = Department.objects.get(code=row['department_code'])
-            Student.objects.create(
-                user=user,
-                student_id=row['student_id'],
-                department=department,
-                year=row['year'],
-                enrollment_date=datetime.strptime(row['enrollment_date'], '%Y-%m-%d').date()
-            )
-            success_count += 1
-
-        except Exception as e:
-            error_count += 1
-            continue
-
-    return success_count, error_count
-
-def import_grades_pandas(df):
-    """Import grades using pandas DataFrame with improved error handling"""
-    success_count = 0
-    error_count = 0
-    error_details = []
-    predictions = []
-
-    # Clean the data
-    df = df.dropna(subset=['student_id', 'course_code', 'marks_obtained'])
-
-    for index, row in df.iterrows():
-        try:
-            # Get student
-            try:
-                student = Student.objects.get(student_id=row['student_id'])
-            except Student.DoesNotExist:
-                error_details.append(f"Row {index + 2}: Student '{row['student_id']}' not found")
-                error_count += 1
-                continue
-
-            # Get or create course
-            course_code = row['course_code']
-            try:
-                course = Course.objects.filter(subject__code=course_code).first()
-                if not course:
-                    raise Course.DoesNotExist()
-            except Course.DoesNotExist:
-                # Try to create the course if subject exists
-                try:
-                    subject = Subject.objects.get(code=course_code)
-                    course = Course.objects.create(
-                        subject=subject,
-                        year='1',
-                        semester='1',
-                        academic_year='2024-2025'
-                    )
-                except Subject.DoesNotExist:
-                    # Create both subject and course
-                    if course_code.startswith('CS'):
-                        dept_code = 'CS'
-                    elif course_code.startswith('EE'):
-                        dept_code = 'EE'
-                    elif course_code.startswith('ME'):
-                        dept_code = 'ME'
-                    else:
-                        dept_code = 'CS'  # Default to CS
-
-                    try:
-                        department = Department.objects.get(code=dept_code)
-                        subject = Subject.objects.create(
-                            name=f"{course_code} Subject",
-                            code=course_code,
-                            credits=3,
-                            department=department
-                        )
-                        course = Course.objects.create(
-                            subject=subject,
-                            year='1',
-                            semester='1',
-                            academic_year='2024-2025'
-                        )
-                    except Department.DoesNotExist:
-                        error_details.append(f"Row {index + 2}: Department for course '{course_code}' not found")
-                        error_count += 1
-                        continue
-
-            # Validate marks
-            try:
-                marks = float(row['marks_obtained'])
-                if marks < 0 or marks > course.max_marks:
-                    error_details.append(f"Row {index + 2}: Invalid marks {marks} (should be 0-{course.max_marks})")
-                    error_count += 1
-                    continue
-            except (ValueError, TypeError):
-                error_details.append(f"Row {index + 2}: Invalid marks format")
-                error_count += 1
-                continue
-
-            # Parse exam date
-            try:
-                if 'exam_date' in row and pd.notna(row['exam_date']):
-                    exam_date = pd.to_datetime(row['exam_date']).date()
-                else:
-                    exam_date = date.today()
-            except:
-                exam_date = date.today()
-
-            # Check if grade already exists
-            existing_grade = Grade.objects.filter(student=student, course=course).first()
-            if existing_grade:
-                existing_grade.marks_obtained = marks
-                existing_grade.exam_date = exam_date
-                existing_grade.save()
-                grade = existing_grade
-            else:
-                grade = Grade.objects.create(
-                    student=student,
-                    course=course,
-                    marks_obtained=marks,
-                    exam_date=exam_date
-                )
-
-            # AI-powered performance prediction
-            try:
-                prediction = predict_performance(student, grade)
-                predictions.append({
-                    'student': student,
-                    'current_grade': grade,
-                    'prediction': prediction
-                })
-            except:
-                pass  # Continue even if prediction fails
-
-            success_count += 1
-
-        except Exception as e:
-            error_details.append(f"Row {index + 2}: {str(e)}")
-            error_count += 1
-            continue
-
-    return success_count, error_count, predictions, error_details
+            return redirect('sms:import_csv_data')
 
-def import_grades_csv(csv_data):
-    success_count = 0
-    error_count = 0
-    predictions = []
+        # Validate required columns
+        missing_columns = [col for col in IMPORT_REQUIRED_COLUMNS[import_type] if col not in columns]
+        if missing_columns:
+            messages.error(request, f'Missing required columns: {", ".join(missing_columns)}')
+            return redirect('sms:import_csv_data')
 
-    for row in csv_data:
-        try:
-            # Get or create student
-            try:
-                student = Student.objects.get(student_id=row['student_id'])
-            except Student.DoesNotExist:
-                error_count += 1
-                continue
-
-            # Get or create course
-            course_code = row['course_code']
-            try:
-                # Use filter().first() to handle multiple courses with same subject code
-                course = Course.objects.filter(subject__code=course_code).first()
-                if not course:
-                    raise Course.DoesNotExist()
-            except Course.DoesNotExist:
-                # Try to create the course if subject exists
-                try:
-                    subject = Subject.objects.get(code=course_code)
-                    course = Course.objects.create(
-                        subject=subject,
-                        year='1',  # Default year
-                        semester='1',  # Default semester
-                        academic_year='2024-2025'
-                    )
-                except Subject.DoesNotExist:
-                    # Create both subject and course
-                    # Determine department based on course code
-                    if course_code.startswith('CS'):
-                        dept_code = 'CS'
-                    elif course_code.startswith('EE'):
-                        dept_code = 'EE'
-                    else:
-                        dept_code = 'CS'  # Default to CS
-
-                    try:
-                        department = Department.objects.get(code=dept_code)
-                        subject = Subject.objects.create(
-                            name=f"{course_code} Subject",
-                            code=course_code,
-                            credits=3,
-                            department=department
-                        )
-                        course = Course.objects.create(
-                            subject=subject,
-                            year='1',
-                            semester='1',
-                            academic_year='2024-2025'
-                        )
-                    except Department.DoesNotExist:
-                        error_count += 1
-                        continue
-
-            marks = float(row['marks_obtained'])
-
-            # Check if grade already exists
-            existing_grade = Grade.objects.filter(student=student, course=course).first()
-            if existing_grade:
-                # Update existing grade
-                existing_grade.marks_obtained = marks
-                existing_grade.exam_date = datetime.strptime(row.get('exam_date', str(date.today())), '%Y-%m-%d').date()
-                existing_grade.save()
-                grade = existing_grade
+        job = ImportJob.objects.create(
+            import_type=import_type,
+            dry_run=bool(request.POST.get('dry_run')),
+            file=csv_file,
+            original_name=csv_file.name,
+            created_by=request.user
+        )
+        import_jobs.submit_import_job(job)
+        return redirect(f"{reverse('sms:import_csv_data')}?job={job.pk}")
+
+    context = {}
+    job_id = request.GET.get('job')
+    if job_id and job_id.isdigit():
+        job = ImportJob.objects.filter(pk=job_id).first()
+        context['job'] = job
+        if job and job.is_finished and job.dry_run:
+            # Validation report; the stored error list is rendered by the template
+            if job.status == 'failed':
+                messages.error(request, job.errors[-1] if job.errors else 'Validation failed.')
+            elif job.error_count == 0:
+                messages.success(request, f'Validation passed: all {job.success_count} rows can be imported.')
             else:
-                # Create new grade
-                grade = Grade.objects.create(
-                    student=student,
-                    course=course,
-                    marks_obtained=marks,
-                    exam_date=datetime.strptime(row.get('exam_date', str(date.today())), '%Y-%m-%d').date()
-                )
-
-            # AI-powered performance prediction
-            prediction = predict_performance(student, grade)
-            predictions.append({
-                'student': student,
-                'current_grade': grade,
-                'prediction': prediction
-            })
-
-            success_count += 1
-
-        except Exception as e:
-            error_count += 1
-            continue
-
-    return success_count, error_count, predictions
-
-def predict_performance(student, current_grade):
-    """AI-powered performance prediction using K-Nearest Neighbors classification"""
-    try:
-        # Get all students' historical data for training
-        all_grades = Grade.objects.all().select_related('student', 'course')
-
-
-        if len(all_grades) < 10:  # Need minimum data for ML
-            return simple_prediction(student, current_grade)
-
-        # Prepare training data
-        features = []
-        labels = []
-
-        # Group grades by student to calculate features
-        student_data = {}
-        for grade in all_grades:
-            sid = grade.student.id
-            if sid not in student_data:
-                student_data[sid] = []
-            student_data[sid].append(grade)
-
-        # Extract features for each student
-        for sid, grades in student_data.items():
-            if len(grades) >= 2:  # Need at least 2 grades for trend analysis
-                grades_sorted = sorted(grades, key=lambda x: x.created_at)
-
-                # Calculate features
-                avg_gpa = sum(g.gpa for g in grades_sorted) / len(grades_sorted)
-                latest_gpa = grades_sorted[-1].gpa
-                trend = (grades_sorted[-1].gpa - grades_sorted[0].gpa) / len(grades_sorted)
-                consistency = 1.0 - (max(g.gpa for g in grades_sorted) - min(g.gpa for g in grades_sorted)) / 4.0
-                failing_count = sum(1 for g in grades_sorted if g.gpa < 2.0)
-
-                features.append([avg_gpa, latest_gpa, trend, consistency, failing_count])
-
-                # Classify performance based on latest GPA
-                if latest_gpa >= 3.7:
-                    labels.append('Excellent')
-                elif latest_gpa >= 3.0:
-                    labels.append('Best')
-                elif latest_gpa >= 2.5:
-                    labels.append('Better')
-                else:
-                    labels.append('Good')
-
-        if len(features) < 5:  # Not enough training data
-            return simple_prediction(student, current_grade)
-
-        # Train K-Nearest Neighbors model
-        features_array = np.array(features)
-        scaler = StandardScaler()
-        features_scaled = scaler.fit_transform(features_array)
-
-        # Ensure k is appropriate for the dataset
-        k = max(1, min(5, len(features) // 2))  # At least 1, at most 5
-        if k >= len(features):
-            k = len(features) - 1 if len(features) > 1 else 1
-
-        knn = KNeighborsClassifier(n_neighbors=k, weights='distance')
-        knn.fit(features_scaled, labels)
-
-        # Prepare current student's features
-        student_grades = Grade.objects.filter(student=student).order_by('created_at')
-
-        if len(student_grades) >= 1:
-            grades_list = list(student_grades)
-            avg_gpa = sum(g.gpa for g in grades_list) / len(grades_list)
-            latest_gpa = current_grade.gpa
-            trend = (current_grade.gpa - grades_list[0].gpa) / len(grades_list) if len(grades_list) > 1 else 0
-            consistency = 1.0 - (max(g.gpa for g in grades_list) - min(g.gpa for g in grades_list)) / 4.0 if len(grades_list) > 1 else 1.0
-            failing_count = sum(1 for g in grades_list if g.gpa < 2.0)
-
-            current_features = np.array([[avg_gpa, latest_gpa, trend, consistency, failing_count]])
-            current_features_scaled = scaler.transform(current_features)
-
-            # Make prediction
-            prediction = knn.predict(current_features_scaled)[0]
-            probabilities = knn.predict_proba(current_features_scaled)[0]
-            confidence = max(probabilities)
-
-            # Get detailed analysis
-            return get_ai_analysis(student, current_grade, prediction, confidence, avg_gpa, trend, consistency)
-
-        return simple_prediction(student, current_grade)
-
-    except Exception as e:
-        # Fallback to simple prediction if ML fails
-        return simple_prediction(student, current_grade)
-
-def simple_prediction(student, current_grade):
-    """Fallback prediction method when ML is not available"""
-    previous_grades = Grade.objects.filter(student=student).exclude(id=current_grade.id).order_by('created_at')
-
-    if not previous_grades.exists():
-        # For new students
-        if current_grade.gpa >= 3.7:
-            performance_class = 'Excellent'
-            recommendation = 'Outstanding start! Maintain this excellence.'
-        elif current_grade.gpa >= 3.0:
-            performance_class = 'Best'
-            recommendation = 'Great performance! Keep up the good work.'
-        elif current_grade.gpa >= 2.5:
-            performance_class = 'Better'
-            recommendation = 'Good foundation. Aim for consistency.'
-        else:
-            performance_class = 'Good'
-            recommendation = 'Focus on improvement. Seek academic support.'
-
-        # Determine risk level
-        risk_levels = {
-            'Excellent': 'Low',
-            'Best': 'Low',
-            'Better': 'Medium',
-            'Good': 'High'
-        }
-
-        return {
-            'ai_prediction': performance_class,
-            'predicted_gpa': round(current_grade.gpa, 2),
-            'confidence': 0.6,
-            'confidence_level': 'Medium',
-            'risk_level': risk_levels[performance_class],
-            'recommendation': recommendation,
-            'method': 'Rule-based (New Student)',
-            'factors': ['Initial performance assessment']
-        }
-
-    # For existing students - simple average-based prediction
-    grades_list = list(previous_grades) + [current_grade]
-    avg_gpa = sum(g.gpa for g in grades_list) / len(grades_list)
-
-    if avg_gpa >= 3.7:
-        performance_class = 'Excellent'
-    elif avg_gpa >= 3.0:
-        performance_class = 'Best'
-    elif avg_gpa >= 2.5:
-        performance_class = 'Better'
-    else:
-        performance_class = 'Good'
-
-    # Determine risk level
-    risk_levels = {
-        'Excellent': 'Low',
-        'Best': 'Low',
-        'Better': 'Medium',
-        'Good': 'High'
-    }
-
-    return {
-        'ai_prediction': performance_class,
-        'predicted_gpa': round(avg_gpa, 2),
-        'confidence': 0.7,
-        'confidence_level': 'Medium',
-        'risk_level': risk_levels[performance_class],
-        'recommendation': f'Continue current trajectory. Average GPA: {avg_gpa:.2f}',
-        'method': 'Rule-based (Historical Average)',
-        'factors': [f'Based on {len(grades_list)} grades']
-    }
-
-def get_ai_analysis(student, current_grade, prediction, confidence, avg_gpa, trend, consistency):
-    """Generate detailed AI analysis report"""
-
-    # Performance-based recommendations
-    recommendations = {
-        'Excellent': [
-            'Maintain exceptional performance standards',
-            'Consider mentoring struggling peers',
-            'Explore advanced coursework opportunities',
-            'Prepare for leadership roles'
-        ],
-        'Best': [
-            'Sustain current study methods',
-            'Challenge yourself with harder subjects',
-            'Maintain consistent effort',
-            'Consider academic competitions'
-        ],
-        'Better': [
-            'Focus on consistency improvement',
-            'Identify and strengthen weak areas',
-            'Develop better study habits',
-            'Seek additional practice materials'
-        ],
-        'Good': [
-            'Immediate academic intervention needed',
-            'Schedule regular tutoring sessions',
-            'Review fundamental concepts',
-            'Develop structured study plan'
-        ]
-    }
-
-    # Risk assessment based on prediction
-    risk_levels = {
-        'Excellent': 'Very Low',
-        'Best': 'Low',
-        'Better': 'Medium',
-        'Good': 'High'
-    }
+                messages.warning(request, f'Validation found errors in {job.error_count} rows; {job.success_count} rows can be imported.')
+            for warning in job.warnings[:20]:
+                messages.info(request, warning)
+        elif job and job.is_finished:
+            # Display results
+            if job.success_count > 0:
+                messages.success(request, f'Successfully imported {job.success_count} records.')
+            if job.status == 'failed':
+                messages.error(request, job.errors[-1] if job.errors else 'Import failed.')
+            if job.error_count > 0:
+                error_msg = f'{job.error_count} records had errors and were skipped.'
+                if job.errors:
+                    error_msg += f' First few errors: {"; ".join(job.errors[:3])}'
+                messages.warning(request, error_msg)
+            for warning in job.warnings[:20]:
+                messages.warning(request, warning)
 
-    # Confidence level interpretation
-    confidence_level = 'High' if confidence > 0.8 else 'Medium' if confidence > 0.6 else 'Low'
+            # Show predictions if available
+            if job.import_type == 'grades' and job.predictions:
+                context['predictions'] = job.predictions
+                context['show_predictions'] = True
 
-    # Trend analysis
-    trend_description = 'Improving' if trend > 0.1 else 'Declining' if trend < -0.1 else 'Stable'
+    return render(request, 'sms/import_csv_data.html', context)
 
-    # Generate factors
-    factors = [
-        f'K-NN Classification: {prediction}',
-        f'Average GPA: {avg_gpa:.2f}',
-        f'Performance Trend: {trend_description}',
-        f'Consistency Score: {consistency:.2f}',
-        f'Model Confidence: {confidence:.2f}'
-    ]
+@login_required
+def import_job_status(request, job_id):
+    """Progress of a background import, polled by import_csv_data.html"""
+    if request.user.user_type != 'admin':
+        return JsonResponse({'error': 'Access denied'}, status=403)
 
-    return {
-        'ai_prediction': prediction,
-        'predicted_gpa': round(avg_gpa, 2),
-        'confidence': round(confidence, 2),
-        'confidence_level': confidence_level,
-        'risk_level': risk_levels[prediction],
-        'recommendation': recommendations[prediction][0],
-        'detailed_recommendations': recommendations[prediction],
-        'trend': trend_description,
-        'consistency_score': round(consistency, 2),
-        'method': 'K-Nearest Neighbors ML',
-        'factors': factors
-    }
+    job = get_object_or_404(ImportJob, pk=job_id)
+    return JsonResponse({
+        'id': job.pk,
+        'import_type': job.import_type,
+        'file': job.original_name,
+        'status': job.status,
+        'finished': job.is_finished,
+        'progress': job.progress,
+        'total_rows': job.total_rows,
+        'processed_rows': job.processed_rows,
+        'success_count': job.success_count,
+        'error_count': job.error_count,
+        'errors': job.errors[:10],
+        'dry_run': job.dry_run,
+        'warnings': job.warnings[:10],
+    })
 
 # At-Risk Students Views
+AT_RISK_PAGE_SIZE = 25
+
+# Server-side sort options for the at-risk list
+AT_RISK_SORTS = {
+    'risk': ('risk_rank', 'academic_summary__avg_gpa', 'student_id'),
+    'gpa': ('academic_summary__avg_gpa', 'student_id'),
+    '-gpa': ('-academic_summary__avg_gpa', 'student_id'),
+    'failing': ('-academic_summary__failing_count', 'academic_summary__avg_gpa', 'student_id'),
+    'student_id': ('student_id',),
+    'name': ('user__first_name', 'user__last_name', 'student_id'),
+}
+
+def at_risk_queryset():
+    """Active students at risk, annotated with their risk level, in one query over the summaries"""
+    # Risk criteria: low GPA or any failing grade (a high failure rate implies one)
+    return (
+        Student.objects.select_related('user', 'department', 'academic_summary', 'academic_summary__latest_grade')
+        .filter(is_active=True, academic_summary__grade_count__gt=0)
+        .filter(Q(academic_summary__avg_gpa__lt=2.5) | Q(academic_summary__failing_count__gt=0))
+        .annotate(risk_rank=Case(
+            When(Q(academic_summary__avg_gpa__lt=1.5) | Q(academic_summary__failing_count__gte=2), then=Value(0)),
+            When(Q(academic_summary__avg_gpa__lt=2.0) | Q(academic_summary__failing_count__gte=1), then=Value(1)),
+            default=Value(2),
+        ))
+    )
+
 @login_required
 def at_risk_students(request):
     if request.user.user_type != 'admin':
         messages.error(request, 'Access denied. Admin privileges required.')
         return redirect('sms:login')
 
-    # Get students with low performance
-    at_risk_students = []
-    students = Student.objects.select_related('user', 'department').filter(is_active=True)
+    risk_levels = ['Critical', 'High', 'Medium']
+    students = at_risk_queryset()
 
-    for student in students:
-        grades = Grade.objects.filter(student=student)
-        if grades.exists():
-            avg_gpa = grades.aggregate(avg_gpa=Avg('gpa'))['avg_gpa']
-            failing_grades = grades.filter(grade='F').count()
-            total_grades = grades.count()
-
-            # Risk criteria
-            is_at_risk = (
-                avg_gpa < 2.5 or  # Low GPA
-                failing_grades > 0 or  # Has failing grades
-                (failing_grades / total_grades) > 0.3  # High failure rate
-            )
+    # Calculate risk level counts
+    risk_counts = students.aggregate(
+        critical_count=Count('pk', filter=Q(risk_rank=0)),
+        high_count=Count('pk', filter=Q(risk_rank=1)),
+        medium_count=Count('pk', filter=Q(risk_rank=2)),
+    )
+
+    risk_filter = request.GET.get('risk')
+    if risk_filter in risk_levels:
+        students = students.filter(risk_rank=risk_levels.index(risk_filter))
+    else:
+        risk_filter = ''
 
-            if is_at_risk:
-                # Get recent performance trend
-                recent_grades = grades.order_by('-created_at')[:3]
-                if recent_grades.count() >= 2:
-                    recent_avg = sum(g.gpa for g in recent_grades) / len(recent_grades)
-                    older_grades = grades.exclude(
-                        id__in=[g.id for g in recent_grades]
-                    )
-                    if older_grades.exists():
-                        older_avg = older_grades.aggregate(avg_gpa=Avg('gpa'))['avg_gpa']
-                        trend = 'Improving' if recent_avg > older_avg else 'Declining'
-                    else:
-                        trend = 'New Student'
-                else:
-                    trend = 'Insufficient Data'
+    sort = request.GET.get('sort')
+    if sort not in AT_RISK_SORTS:
+        sort = 'risk'
 
-                # Risk level calculation
-                if avg_gpa < 1.5 or failing_grades >= 2:
-                    risk_level = 'Critical'
-                elif avg_gpa < 2.0 or failing_grades >= 1:
-                    risk_level = 'High'
-                else:
-                    risk_level = 'Medium'
-
-                at_risk_students.append({
-                    'student': student,
-                    'avg_gpa': round(avg_gpa, 2),
-                    'failing_grades': failing_grades,
-                    'total_grades': total_grades,
-                    'trend': trend,
-                    'risk_level': risk_level,
-                    'last_grade': grades.order_by('-created_at').first()
-                })
-
-    # Sort by risk level and GPA
-    risk_order = {'Critical': 0, 'High': 1, 'Medium': 2}
-    at_risk_students.sort(key=lambda x: (risk_order[x['risk_level']], x['avg_gpa']))
+    page_obj = Paginator(students.order_by(*AT_RISK_SORTS[sort]), AT_RISK_PAGE_SIZE).get_page(request.GET.get('page'))
 
-    # Calculate risk level counts
-    critical_count = sum(1 for student in at_risk_students if student['risk_level'] == 'Critical')
-    high_count = sum(1 for student in at_risk_students if student['risk_level'] == 'High')
-    medium_count = sum(1 for student in at_risk_students if student['risk_level'] == 'Medium')
+    # Get students with low performance
+    at_risk_students = []
+    for student in page_obj:
+        summary = student.academic_summary
+        at_risk_students.append({
+            'student': student,
+            'avg_gpa': round(summary.avg_gpa, 2),
+            'failing_grades': summary.failing_count,
+            'total_grades': summary.grade_count,
+            'trend': summary.trend,
+            'risk_level': risk_levels[student.risk_rank],
+            'last_grade': summary.latest_grade
+        })
 
     context = {
         'at_risk_students': at_risk_students,
-        'total_at_risk': len(at_risk_students),
-        'critical_count': critical_count,
-        'high_count': high_count,
-        'medium_count': medium_count,
+        'page_obj': page_obj,
+        'sort': sort,
+        'risk_filter': risk_filter,
+        'total_at_risk': sum(risk_counts.values()),
+        'critical_count': risk_counts['critical_count'],
+        'high_count': risk_counts['high_count'],
+        'medium_count': risk_counts['medium_count'],
     }
     return render(request, 'sms/at_risk_students.html', context)
 
@@ -1345,6 +982,17 @@ def admin_panel(request):
     # Redirect to Django admin
     return redirect('/admin/')
 
+@login_required
+def request_timings(request):
+    """Per-view timing percentiles collected by RequestTimingMiddleware in this process"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+
+    return JsonResponse({
+        'enabled': settings.SMS_REQUEST_TIMING,
+        'views': instrumentation.request_timings.summary(),
+    })
+
 # Quick Actions Views
 @login_required
 def assignment_tracking(request):
@@ -1352,14 +1000,29 @@ def assignment_tracking(request):
         messages.error(request, 'Access denied. Admin privileges required.')
         return redirect('sms:login')
 
-    # Get all grades as assignments
-    assignments = Grade.objects.select_related('student__user', 'course__subject').all()
+    # Get grades as assignments, one keyset page at a time
+    filters = grade_listing_filters(request.GET)
+    assignments = filter_grades(
+        Grade.objects.select_related('student__user', 'course__subject', 'course__subject__department'),
+        filters
+    )
+    assignments, next_cursor = grade_keyset_page(assignments, request.GET.get('after'))
+
+    counts = Grade.objects.aggregate(
+        total_assignments=Count('id'),
+        pending_assignments=Count('id', filter=Q(grade='F')),
+    )
 
     context = {
         'assignments': assignments,
-        'total_assignments': assignments.count(),
-        'pending_assignments': assignments.filter(grade='F').count(),
-        'completed_assignments': assignments.exclude(grade='F').count(),
+        'next_cursor': next_cursor,
+        'filters': filters,
+        'grade_choices': Grade.GRADE_CHOICES,
+        'courses': Course.objects.select_related('subject').all(),
+        'departments': Department.objects.all(),
+        'total_assignments': counts['total_assignments'],
+        'pending_assignments': counts['pending_assignments'],
+        'completed_assignments': counts['total_assignments'] - counts['pending_assignments'],
     }
     return render(request, 'sms/assignment_tracking.html', context)
 
@@ -1387,74 +1050,93 @@ def data_export(request):
         }
         return render(request, 'sms/data_export.html', context)
 
-def export_students_csv(request):
-    import csv
-    from django.http import HttpResponse
+# Rows fetched per database round trip while streaming exports
+EXPORT_CHUNK_SIZE = 2000
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="students_export.csv"'
+class Echo:
+    """File-like object whose write() returns the value, so csv.writer can feed a generator"""
+    def write(self, value):
+        return value
 
-    writer = csv.writer(response)
-    writer.writerow(['Student ID', 'Name', 'Email', 'Department', 'Year', 'Phone', 'Enrollment Date', 'Status'])
+def streaming_csv_response(filename, header, rows):
+    """Stream a CSV download row by row instead of building it in memory"""
+    writer = csv.writer(Echo())
 
-    students = Student.objects.select_related('user', 'department').all()
-    for student in students:
-        writer.writerow([
-            student.student_id,
-            student.user.get_full_name(),
-            student.user.email,
-            student.department.name,
-            student.get_year_display(),
-            student.user.phone or 'N/A',
-            student.enrollment_date,
-            'Active' if student.is_active else 'Inactive'
-        ])
+    def content():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
 
+    response = StreamingHttpResponse(content(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
-def export_grades_csv(request):
-    import csv
-    from django.http import HttpResponse
-
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="grades_export.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Student ID', 'Student Name', 'Course', 'Subject Code', 'Marks Obtained', 'Max Marks', 'Grade', 'GPA', 'Exam Date'])
-
-    grades = Grade.objects.select_related('student__user', 'course__subject').all()
-    for grade in grades:
-        writer.writerow([
-            grade.student.student_id,
-            grade.student.user.get_full_name(),
-            grade.course.subject.name,
-            grade.course.subject.code,
-            grade.marks_obtained,
-            grade.course.max_marks,
-            grade.grade,
-            grade.gpa,
-            grade.exam_date or 'N/A'
-        ])
+def export_students_csv(request):
+    year_display = dict(Student.YEAR_CHOICES)
+    students = Student.objects.values_list(
+        'student_id', 'user__first_name', 'user__last_name', 'user__email', 'department__name',
+        'year', 'user__phone', 'enrollment_date', 'is_active'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    rows = (
+        [
+            student_id,
+            f"{first_name} {last_name}".strip(),
+            email,
+            department,
+            year_display.get(year, year),
+            phone or 'N/A',
+            enrollment_date,
+            'Active' if is_active else 'Inactive'
+        ]
+        for student_id, first_name, last_name, email, department, year, phone, enrollment_date, is_active in students
+    )
+    return streaming_csv_response(
+        'students_export.csv',
+        ['Student ID', 'Name', 'Email', 'Department', 'Year', 'Phone', 'Enrollment Date', 'Status'],
+        rows
+    )
 
-    return response
+def export_grades_csv(request):
+    grades = Grade.objects.values_list(
+        'student__student_id', 'student__user__first_name', 'student__user__last_name',
+        'course__subject__name', 'course__subject__code', 'marks_obtained', 'course__max_marks',
+        'grade', 'gpa', 'exam_date'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    rows = (
+        [
+            student_id,
+            f"{first_name} {last_name}".strip(),
+            subject_name,
+            subject_code,
+            marks_obtained,
+            max_marks,
+            grade,
+            gpa,
+            exam_date or 'N/A'
+        ]
+        for student_id, first_name, last_name, subject_name, subject_code, marks_obtained, max_marks, grade, gpa, exam_date in grades
+    )
+    return streaming_csv_response(
+        'grades_export.csv',
+        ['Student ID', 'Student Name', 'Course', 'Subject Code', 'Marks Obtained', 'Max Marks', 'Grade', 'GPA', 'Exam Date'],
+        rows
+    )
 
 def export_performance_csv(request):
-    import csv
-    from django.http import HttpResponse
-
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="performance_analysis.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Student ID', 'Student Name', 'Department', 'Average GPA', 'Total Grades', 'Failing Grades', 'Risk Level'])
-
-    students = Student.objects.select_related('user', 'department').filter(is_active=True)
-    for student in students:
-        grades = Grade.objects.filter(student=student)
-        if grades.exists():
-            avg_gpa = grades.aggregate(avg_gpa=Avg('gpa'))['avg_gpa']
-            failing_grades = grades.filter(grade='F').count()
-
+    # One query over the per-student summaries
+    students = (
+        Student.objects.filter(is_active=True, academic_summary__grade_count__gt=0)
+        .values_list(
+            'student_id', 'user__first_name', 'user__last_name', 'department__name',
+            'academic_summary__avg_gpa', 'academic_summary__grade_count', 'academic_summary__failing_count'
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+    def rows():
+        for student_id, first_name, last_name, department, avg_gpa, grade_count, failing_grades in students:
             # Determine risk level
             if avg_gpa < 2.0 or failing_grades > 0:
                 risk_level = 'High'
@@ -1463,17 +1145,21 @@ def export_performance_csv(request):
             else:
                 risk_level = 'Low'
 
-            writer.writerow([
-                student.student_id,
-                student.user.get_full_name(),
-                student.department.name,
+            yield [
+                student_id,
+                f"{first_name} {last_name}".strip(),
+                department,
                 round(avg_gpa, 2),
-                grades.count(),
+                grade_count,
                 failing_grades,
                 risk_level
-            ])
+            ]
 
-    return response
+    return streaming_csv_response(
+        'performance_analysis.csv',
+        ['Student ID', 'Student Name', 'Department', 'Average GPA', 'Total Grades', 'Failing Grades', 'Risk Level'],
+        rows()
+    )
 
 @login_required
 def student_dashboard(request):
@@ -1483,14 +1169,14 @@ def student_dashboard(request):
 
     try:
         student = request.user.student_profile
-        grades = Grade.objects.filter(student=student).select_related('course__subject')
-
-        # Calculate overall GPA
-        avg_gpa = grades.aggregate(avg_gpa=Avg('gpa'))['avg_gpa'] or 0
+        # Cached per student until their grades change
+        data = student_dashboard_data(student)
+        grades = data['grades']
+        avg_gpa = data['avg_gpa']
 
         # Check for failing grades (F grades)
-        failing_grades = grades.filter(grade='F')
-        failing_count = failing_grades.count()
+        failing_grades = data['failing_grades']
+        failing_count = data['failing_count']
 
         # Create alert messages for failing grades
         if failing_count > 0:
@@ -1515,27 +1201,41 @@ def student_dashboard(request):
         return redirect('sms:login')
 
 @login_required
-def student_performance(request):
-    if request.user.user_type != 'student':
+async def student_performance(request):
+    user = await request.auser()
+    if user.user_type != 'student':
         return JsonResponse({'error': 'Access denied'}, status=403)
 
-    try:
-        student = request.user.student_profile
-        grades = Grade.objects.filter(student=student).select_related('course__subject')
+    version = await Student.objects.filter(user=user).aaggregate(
+        student_id=Max('id'),
+        grade_count=Count('grades'),
+        grade_updated=Max('grades__updated_at'),
+        subject_updated=Max('grades__course__subject__updated_at'),
+    )
+    if version['student_id'] is None:
+        return JsonResponse({'error': 'Student profile not found'}, status=404)
+    etag = version_etag(f'student_performance:{user.pk}', version)
+    if response := not_modified(request, etag):
+        return response
+
+    # The version token identifies the payload, so it needs no other invalidation
+    cache_key = f'sms:student_performance:{user.pk}:{etag}'
+    data = await cache.aget(cache_key)
+    if data is None:
+        grades = await fetch_all(Grade.objects.filter(student__user=user).values_list('course__subject__name', 'marks_obtained'))
 
         # Prepare data for chart
         subjects = []
         marks = []
 
-        for grade in grades:
-            subjects.append(grade.course.subject.name)
-            marks.append(float(grade.marks_obtained))
+        for subject_name, marks_obtained in grades:
+            subjects.append(subject_name)
+            marks.append(float(marks_obtained))
 
         data = {
             'subjects': subjects,
             'marks': marks,
         }
+        await cache.aset(cache_key, data, STUDENT_DASHBOARD_TIMEOUT)
 
-        return JsonResponse(data)
-    except Student.DoesNotExist:
-        return JsonResponse({'error': 'Student profile not found'}, status=404)
+    return with_etag(JsonResponse(data), etag)
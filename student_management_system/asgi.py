@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "student_management_system.settings")
+# Read by settings.py: ASGI runs each request's sync code on a fresh thread, so
+# persistent (per-thread) database connections would never be reused
+os.environ.setdefault("SMS_ASGI", "1")
 
 application = get_asgi_application()
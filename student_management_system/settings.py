@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "sms.instrumentation.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -75,11 +76,84 @@ WSGI_APPLICATION = "student_management_system.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite tuned for concurrent readers and writers, applied to every new connection:
+# WAL lets reads proceed during a write, NORMAL sync only fsyncs at checkpoints
+# (still safe against application crashes), writers wait up to busy_timeout ms for
+# the lock, and the page cache / memory map keep hot pages out of read() calls.
+# Check the effect with `manage.py sqlite_load_test`.
+SQLITE_PRAGMAS = [
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "busy_timeout=20000",
+    "cache_size=-65536",  # KiB, i.e. 64 MB
+    "mmap_size=268435456",  # 256 MB
+    "temp_store=MEMORY",
+]
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Reuse connections across requests instead of reopening per request
+        # (not under ASGI, see asgi.py)
+        "CONN_MAX_AGE": 0 if os.environ.get("SMS_ASGI") else 600,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": "; ".join(f"PRAGMA {pragma}" for pragma in SQLITE_PRAGMAS),
+            # Take the write lock at BEGIN, where busy_timeout applies, rather than
+            # failing with "database is locked" when a read transaction upgrades
+            "transaction_mode": "IMMEDIATE",
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory is per process; set SMS_CACHE=file to share the cache between
+# worker processes so write-driven invalidation reaches all of them.
+# Each student with an open dashboard holds about two entries (~5 KB), which
+# the default limit of 300 entries would keep evicting during results week.
+
+CACHE_OPTIONS = {"MAX_ENTRIES": 20000}
+
+if os.environ.get("SMS_CACHE") == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / "cache",
+            "OPTIONS": CACHE_OPTIONS,
+        }
     }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "sms",
+            "OPTIONS": CACHE_OPTIONS,
+        }
+    }
+
+
+# Request instrumentation (sms/instrumentation.py), off unless SMS_REQUEST_TIMING=1:
+# Server-Timing headers, one JSON line per request on the sms.requests logger and
+# per-view percentiles of the last REQUEST_TIMING_SAMPLES requests at /request-timings/.
+
+SMS_REQUEST_TIMING = os.environ.get("SMS_REQUEST_TIMING") == "1"
+REQUEST_TIMING_SAMPLES = 1000
+
+if SMS_REQUEST_TIMING:
+    TEMPLATES[0]["BACKEND"] = "sms.instrumentation.TimedDjangoTemplates"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "sms.requests": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
 }
 
 
@@ -127,6 +201,12 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Background CSV imports (sms/import_jobs.py). When IMPORT_JOBS_IN_PROCESS is
+# False, uploads wait for `manage.py process_import_jobs`, which runs them on
+# one worker process per core.
+IMPORT_JOBS_IN_PROCESS = True
+IMPORT_JOB_THREADS = 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -139,3 +219,8 @@ AUTH_USER_MODEL = 'sms.User'
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/login/'
+
+# Performance prediction model (see sms/performance_model.py)
+PERFORMANCE_MODEL_PATH = BASE_DIR / 'ml_models' / 'performance_model.joblib'
+# Refit the model in the background once this many grades changed since training
+PERFORMANCE_MODEL_REFRESH_THRESHOLD = 100